@@ -1,52 +1,37 @@
 from typing import List, Dict, Any
-from utils.local_db import LocalDB
+from utils.registry import get_db
 
 class FilterAgent:
-    def __init__(self):
-        self.db = LocalDB()
+    def __init__(self, db=None):
+        self.db = db or get_db()
         
     def filter_by_skills(self, skills: List[str], require_all: bool = False) -> List[Dict[str, Any]]:
         """
         Filter resumes by required skills
         """
-        resumes = self.db.get_all_resumes()
-        
         if not skills or all(not s.strip() for s in skills):
-            return resumes
-        
-        skills_lower = [s.strip().lower() for s in skills if s.strip()]
-        
-        filtered = []
-        for resume in resumes:
-            candidate_skills = [str(s).strip().lower() for s in resume.get('skills', []) if s]
-            
-            if require_all:
-                if all(skill in candidate_skills for skill in skills_lower):
-                    filtered.append(resume)
-            else:
-                if any(skill in candidate_skills for skill in skills_lower):
-                    filtered.append(resume)
+            return self.db.get_all_resumes()
         
-        return filtered
+        return self.db.filter_resumes(skills=skills, match='all' if require_all else 'any')
     
     def filter_by_experience(self, min_years: int = None, max_years: int = None) -> List[Dict[str, Any]]:
         """
         Filter resumes by years of experience range
         """
-        filters = {}
-        if min_years is not None:
-            filters['total_years_experience'] = min_years
-        
-        resumes = self.db.filter_resumes(filters)
-        
-        if max_years is not None:
-            resumes = [r for r in resumes 
-                      if r.get('total_years_experience', 0) <= max_years]
-        
-        return resumes
+        return self.db.filter_resumes(min_years=min_years, max_years=max_years)
     
     def filter_by_cgpa(self, min_cgpa: float) -> List[Dict[str, Any]]:
         """
         Filter resumes by minimum CGPA
         """
-        return self.db.filter_resumes({'cgpa': min_cgpa})
+        return self.db.filter_resumes(min_cgpa=min_cgpa)
+    
+    def filter(self, skills: List[str] = None, require_all: bool = False, min_years: int = None,
+               max_years: int = None, min_cgpa: float = None, limit: int = None) -> List[Dict[str, Any]]:
+        """
+        Apply any combination of filters in a single indexed query
+        """
+        skills = [s.strip() for s in (skills or []) if s and s.strip()]
+        return self.db.filter_resumes(skills=skills, match='all' if require_all else 'any',
+                                      min_years=min_years, max_years=max_years,
+                                      min_cgpa=min_cgpa, limit=limit)
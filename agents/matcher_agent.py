@@ -1,48 +1,149 @@
+import os
 import re
-from typing import Dict, List, Tuple
-from utils.llm_client import TogetherLLMClient
+import json
+import asyncio
+import hashlib
+from typing import Dict, List, Tuple, Optional
+from utils.registry import get_llm_client
+
+# Maximum number of scoring requests in flight at once
+MATCH_CONCURRENCY = int(os.getenv('MATCH_CONCURRENCY', '8'))
+# Candidates packed into one scoring prompt; 1 scores each candidate separately
+MATCH_BATCH_SIZE = int(os.getenv('MATCH_BATCH_SIZE', '1'))
+# Completion budget per candidate in a batched response
+BATCH_TOKENS_PER_CANDIDATE = 60
+# Bump when the scoring prompts change so persisted match scores are not reused
+MATCH_PROMPT_VERSION = "1"
+# Explanation given when no usable score came back; such scores are never persisted
+SCORE_FALLBACK_EXPLANATION = "Score extraction failed, defaulting to neutral score"
 
 class MatcherAgent:
-    def __init__(self):
-        self.llm_client = TogetherLLMClient()
-    
-    def score_resume(self, resume_data: Dict, job_description: str, 
-                    required_skills: List[str] = None, 
-                    min_years: int = None,
-                    min_cgpa: float = None) -> Tuple[int, str]:
+    def __init__(self, max_concurrency: int = None, batch_size: int = None, llm_client=None):
+        self.llm_client = llm_client or get_llm_client()
+        self.max_concurrency = max_concurrency or MATCH_CONCURRENCY
+        self.batch_size = batch_size or MATCH_BATCH_SIZE
+
+    def _check_requirements(self, resume_data: Dict,
+                            required_skills: List[str] = None,
+                            min_years: int = None,
+                            min_cgpa: float = None) -> Optional[Tuple[int, str]]:
         """
-        Score a resume against job requirements and return (score, explanation)
+        Check hard requirements; returns (score, explanation) if the candidate
+        fails one, or None if the LLM should score them
         """
-        # First check hard requirements
-        if min_years and (not resume_data.get('total_years_experience') or 
+        if min_years and (not resume_data.get('total_years_experience') or
                          resume_data['total_years_experience'] < min_years):
             return 0, f"Does not meet minimum experience requirement of {min_years} years"
-            
-        if min_cgpa and (not resume_data.get('cgpa') or 
+
+        if min_cgpa and (not resume_data.get('cgpa') or
                         resume_data['cgpa'] < min_cgpa):
             return 0, f"Does not meet minimum CGPA requirement of {min_cgpa}"
-            
+
         if required_skills:
             candidate_skills = set(s.lower() for s in resume_data.get('skills', []))
-            missing_skills = [s for s in required_skills 
+            missing_skills = [s for s in required_skills
                             if s.lower() not in candidate_skills]
             if missing_skills:
                 return 2, f"Missing required skills: {', '.join(missing_skills)}"
-        
-        # Use LLM for detailed scoring
-        prompt = f"""Score this candidate for the job. Only output an integer between 1 and 10 (inclusive), where 10 is best fit and 1 is worst fit. Format: "<score>: <explanation>"
-        
+
+        return None
+
+    @staticmethod
+    def job_key(job_description: str) -> str:
+        """Hash of the job description with case and whitespace differences removed"""
+        normalized = ' '.join((job_description or '').lower().split())
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def profile_version(resume_data: Dict) -> str:
+        """Hash of everything the scoring prompts read from a resume, plus the prompt version"""
+        profile = [MATCH_PROMPT_VERSION, resume_data.get('content', ''), resume_data.get('skills', []),
+                   resume_data.get('total_years_experience'), resume_data.get('achievements', []),
+                   resume_data.get('cgpa')]
+        return hashlib.sha256(json.dumps(profile, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def meets_requirements(self, resume_data: Dict,
+                           required_skills: List[str] = None,
+                           min_years: int = None,
+                           min_cgpa: float = None) -> bool:
+        """True if the candidate passes the hard requirements and would be scored by the LLM"""
+        return self._check_requirements(resume_data, required_skills, min_years, min_cgpa) is None
+
+    def _build_prompt(self, resume_data: Dict, job_description: str) -> str:
+        return f"""Score this candidate for the job. Only output an integer between 1 and 10 (inclusive), where 10 is best fit and 1 is worst fit. Format: "<score>: <explanation>"
+
         Job Description:
         {job_description}
-        
+
         Candidate Profile:
         - Experience: {resume_data.get('total_years_experience')} years
         - Skills: {', '.join(resume_data.get('skills', []))}
         - Achievements: {' '.join(resume_data.get('achievements', []))}
         - CGPA: {resume_data.get('cgpa', 'Not specified')}
         """
-        
-        response = self.llm_client.get_completion(prompt)
+
+    def _compact_profile(self, label: str, resume_data: Dict) -> str:
+        """One-line candidate profile for batched prompts"""
+        achievements = ' '.join(resume_data.get('achievements', []))
+        if len(achievements) > 300:
+            achievements = achievements[:300] + '...'
+        return (f"{label}: Experience: {resume_data.get('total_years_experience')} years | "
+                f"Skills: {', '.join(resume_data.get('skills', []))} | "
+                f"Achievements: {achievements or 'None listed'} | "
+                f"CGPA: {resume_data.get('cgpa', 'Not specified')}")
+
+    def _build_batch_prompt(self, batch: List[Dict], job_description: str) -> str:
+        profiles = '\n'.join(self._compact_profile(f"C{i + 1}", resume) for i, resume in enumerate(batch))
+        return f"""Score each candidate for the job with an integer between 1 and 10 (inclusive), where 10 is best fit and 1 is worst fit.
+        Output ONLY a JSON array with one object per candidate, in this format:
+        [{{"candidate": "C1", "score": <score>, "explanation": "<one sentence>"}}]
+
+        Job Description:
+        {job_description}
+
+        Candidates:
+        {profiles}
+        """
+
+    def _parse_batch_scores(self, response, batch_len: int) -> Dict[int, Tuple[int, str]]:
+        """
+        Parse a batched scoring response into {batch index: (score, explanation)}.
+        Candidates missing from the response, or with unusable scores, are left out.
+        """
+        if hasattr(response, "choices") and len(response.choices) > 0:
+            response_text = getattr(response.choices[0].message, "content", "") or ""
+        else:
+            response_text = str(response)
+
+        entries = []
+        start, end = response_text.find('['), response_text.rfind(']')
+        if start != -1 and end > start:
+            try:
+                entries = json.loads(response_text[start:end + 1])
+            except json.JSONDecodeError:
+                entries = []
+        if not isinstance(entries, list) or not entries:
+            # Fall back to "C1: 7: explanation" lines
+            entries = [{'candidate': m.group(1), 'score': m.group(2), 'explanation': m.group(3)}
+                       for m in re.finditer(r'C(\d+)\W+(\d+)\W+(.+)', response_text)]
+
+        scores = {}
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            label = re.search(r'\d+', str(entry.get('candidate', '')))
+            try:
+                score = int(entry.get('score'))
+            except (TypeError, ValueError):
+                continue
+            if not label:
+                continue
+            index = int(label.group()) - 1
+            if 0 <= index < batch_len and index not in scores:
+                scores[index] = (max(1, min(score, 10)), str(entry.get('explanation', '')).strip())
+        return scores
+
+    def _parse_score(self, response) -> Tuple[int, str]:
         # Extract the actual message content (string) from the response object
         if hasattr(response, "choices") and len(response.choices) > 0:
             response_text = getattr(response.choices[0].message, "content", "")
@@ -57,28 +158,137 @@ class MatcherAgent:
             score = max(1, min(score, 10))
             explanation = match.group(2)
             return score, explanation
-        
-        return 5, "Score extraction failed, defaulting to neutral score"
-    
-    def rank_candidates(self, resumes: List[Dict], job_description: str, 
+
+        return 5, SCORE_FALLBACK_EXPLANATION
+
+    def score_resume(self, resume_data: Dict, job_description: str,
+                    required_skills: List[str] = None,
+                    min_years: int = None,
+                    min_cgpa: float = None) -> Tuple[int, str]:
+        """
+        Score a resume against job requirements and return (score, explanation)
+        """
+        # First check hard requirements
+        failed = self._check_requirements(resume_data, required_skills, min_years, min_cgpa)
+        if failed:
+            return failed
+
+        # Use LLM for detailed scoring
+        response = self.llm_client.get_completion(self._build_prompt(resume_data, job_description))
+        return self._parse_score(response)
+
+    async def score_resume_async(self, resume_data: Dict, job_description: str,
+                                 required_skills: List[str] = None,
+                                 min_years: int = None,
+                                 min_cgpa: float = None) -> Tuple[int, str]:
+        """
+        Async variant of score_resume
+        """
+        failed = self._check_requirements(resume_data, required_skills, min_years, min_cgpa)
+        if failed:
+            return failed
+
+        response = await self.llm_client.get_completion_async(self._build_prompt(resume_data, job_description))
+        return self._parse_score(response)
+
+    async def _score_batch_async(self, batch: List[Dict], job_description: str) -> List[Tuple[int, str]]:
+        """
+        Score up to batch_size candidates with one prompt. Candidates whose
+        score could not be parsed are re-requested one at a time.
+        """
+        try:
+            response = await self.llm_client.get_completion_async(
+                self._build_batch_prompt(batch, job_description),
+                max_tokens=BATCH_TOKENS_PER_CANDIDATE * len(batch) + 50
+            )
+            scores = self._parse_batch_scores(response, len(batch))
+        except Exception as e:
+            print(f"[DEBUG] Batch scoring failed: {str(e)}")
+            scores = {}
+
+        missing = [i for i in range(len(batch)) if i not in scores]
+        if missing:
+            print(f"[DEBUG] Re-requesting {len(missing)}/{len(batch)} candidates individually")
+        for i in missing:
+            try:
+                response = await self.llm_client.get_completion_async(self._build_prompt(batch[i], job_description))
+                scores[i] = self._parse_score(response)
+            except Exception as e:
+                print(f"[DEBUG] Scoring failed for resume {batch[i].get('id')}: {str(e)}")
+                scores[i] = (5, SCORE_FALLBACK_EXPLANATION)
+        return [scores[i] for i in range(len(batch))]
+
+    async def rank_candidates_async(self, resumes: List[Dict], job_description: str,
+                                    required_skills: List[str] = None,
+                                    min_years: int = None,
+                                    min_cgpa: float = None,
+                                    max_concurrency: int = None,
+                                    batch_size: int = None) -> List[Dict]:
+        """
+        Score all candidates concurrently, with at most max_concurrency LLM
+        requests in flight, and return them sorted by score. Ties keep the
+        input order, so results are deterministic. With batch_size > 1,
+        candidates passing the hard requirements are scored batch_size at a
+        time so the job description is sent once per batch.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        batch_size = batch_size or self.batch_size
+
+        async def score(resume: Dict) -> Tuple[int, str]:
+            async with semaphore:
+                try:
+                    return await self.score_resume_async(
+                        resume, job_description, required_skills, min_years, min_cgpa
+                    )
+                except Exception as e:
+                    print(f"[DEBUG] Scoring failed for resume {resume.get('id')}: {str(e)}")
+                    return 5, SCORE_FALLBACK_EXPLANATION
+
+        async def score_batch(batch: List[Dict]) -> List[Tuple[int, str]]:
+            async with semaphore:
+                return await self._score_batch_async(batch, job_description)
+
+        if batch_size > 1:
+            scores = [self._check_requirements(resume, required_skills, min_years, min_cgpa)
+                      for resume in resumes]
+            pending = [i for i, result in enumerate(scores) if result is None]
+            batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+            batch_scores = await asyncio.gather(
+                *(score_batch([resumes[i] for i in batch]) for batch in batches)
+            )
+            for batch, results in zip(batches, batch_scores):
+                for i, result in zip(batch, results):
+                    scores[i] = result
+        else:
+            # gather() returns results in submission order regardless of completion order
+            scores = await asyncio.gather(*(score(resume) for resume in resumes))
+
+        scored_candidates = [
+            {**resume, "match_score": score, "match_explanation": explanation}
+            for resume, (score, explanation) in zip(resumes, scores)
+        ]
+        return sorted(scored_candidates,
+                     key=lambda x: x['match_score'],
+                     reverse=True)
+
+    def rank_candidates(self, resumes: List[Dict], job_description: str,
                        required_skills: List[str] = None,
                        min_years: int = None,
-                       min_cgpa: float = None) -> List[Dict]:
+                       min_cgpa: float = None,
+                       batch_size: int = None) -> List[Dict]:
         """
         Rank all candidates for a job and return sorted results with scores
         """
-        scored_candidates = []
-        
-        for resume in resumes:
-            score, explanation = self.score_resume(
-                resume, job_description, required_skills, min_years, min_cgpa
-            )
-            scored_candidates.append({
-                **resume,
-                "match_score": score,
-                "match_explanation": explanation
-            })
-        
-        return sorted(scored_candidates, 
-                     key=lambda x: x['match_score'], 
-                     reverse=True)
+        async def rank() -> List[Dict]:
+            try:
+                return await self.rank_candidates_async(
+                    resumes, job_description, required_skills, min_years, min_cgpa,
+                    batch_size=batch_size
+                )
+            finally:
+                # The event loop ends with asyncio.run, so must its HTTP clients
+                aclose = getattr(self.llm_client, 'aclose', None)
+                if aclose is not None:
+                    await aclose()
+
+        return asyncio.run(rank())
@@ -1,20 +1,200 @@
-import spacy
+import os
 import re
 import json
-from typing import Dict, Any, Optional
-from utils.llm_client import TogetherLLMClient
+import time
+import threading
+from typing import Dict, Any, List, Optional
+from utils.registry import get_nlp, get_llm_client, get_skill_matcher
+from utils.text_sections import segment_sections, build_prompt_text
+from utils.fast_extract import (
+    FAST_PATH, FAST_PATH_THRESHOLD, EMAIL_RE, PHONE_RE, YEARS_RE, CGPA_RE, extract_fields
+)
+
+# Bump whenever prompt or parsing logic changes so cached ingests are invalidated
+PARSER_VERSION = "4"
+
+# Send only the resume sections each field needs instead of the raw PDF text
+PROMPT_COMPACTION = os.getenv('PROMPT_COMPACTION', 'true').lower() in ('1', 'true', 'yes')
+
+# Batched spaCy fallback (nlp.pipe); n_process > 1 forks worker processes
+SPACY_BATCH_SIZE = int(os.getenv('SPACY_BATCH_SIZE', 32))
+SPACY_N_PROCESS = int(os.getenv('SPACY_N_PROCESS', 1))
+
+# Completion budget for the combined profile + summary JSON response
+COMBINED_MAX_TOKENS = 900
+
+# Fields returned by parse_and_summarize, with a short description used in prompts
+PROFILE_FIELDS = {
+    'name': 'full name (string)',
+    'email': 'email address (string, "" if absent)',
+    'phone': 'phone number (string, "" if absent)',
+    'total_years_experience': 'total years of professional experience (integer)',
+    'skills': 'technical and professional skills (array of strings)',
+    'achievements': 'notable achievements (array of strings)',
+    'cgpa': 'CGPA/GPA (number, 0 if absent)',
+    'professional_summary': 'professional 4-5 sentence summary of the candidate in third-person voice, under 120 tokens (string)'
+}
+
+# Line format requested by the two-step parse_resume prompt
+LEGACY_PROMPT_LINES = {
+    'name': 'Name: [full name]',
+    'email': 'Email: [email]',
+    'phone': 'Phone: [phone number]',
+    'total_years_experience': 'Years of Experience: [number only]',
+    'skills': 'Skills: [comma-separated list]',
+    'achievements': 'Achievements: [semicolon-separated list]',
+    'cgpa': 'CGPA: [cgpa value]'
+}
+
+def _as_str_list(value) -> Optional[list]:
+    if isinstance(value, str):
+        value = [v for v in re.split(r'[;,\n]', value)]
+    if not isinstance(value, list):
+        return None
+    return [str(v).strip().strip('"').strip("'") for v in value if str(v).strip()]
+
+def _validate_field(field: str, value):
+    """Coerce a field to its schema type; returns (value, ok)"""
+    try:
+        if field in ('name', 'professional_summary'):
+            value = str(value).strip() if value is not None else ''
+            return value, bool(value)
+        if field in ('email', 'phone'):
+            value = '' if value is None else str(value).strip()
+            if field == 'email' and value and '@' not in value:
+                return '', False
+            return value, True
+        if field == 'total_years_experience':
+            if isinstance(value, str):
+                match = re.search(r'\d+', value)
+                value = int(match.group()) if match else 0
+            value = int(value or 0)
+            return value, 0 <= value <= 60
+        if field == 'cgpa':
+            if isinstance(value, str):
+                match = re.search(r'\d+\.?\d*', value)
+                value = float(match.group()) if match else 0.0
+            value = float(value or 0.0)
+            return value, 0.0 <= value <= 100.0
+        if field in ('skills', 'achievements'):
+            value = _as_str_list(value)
+            return (value, True) if value is not None else ([], False)
+    except (TypeError, ValueError):
+        pass
+    return None, False
+
+def _extract_json_object(content: str) -> Optional[dict]:
+    start, end = content.find('{'), content.rfind('}')
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(content[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+class LLMExtractionError(Exception):
+    """LLM extraction failed and the caller asked to handle the fallback itself (in a batch)"""
 
 class ParserAgent:
-    def __init__(self):
-        self.nlp = spacy.load("en_core_web_sm")
-        self.llm_client = TogetherLLMClient()
+    def __init__(self, nlp=None, llm_client=None, compact_prompts: Optional[bool] = None,
+                 fast_path: Optional[bool] = None, skill_matcher=None):
+        self._nlp = nlp
+        self._skill_matcher = skill_matcher
+        self.llm_client = llm_client or get_llm_client()
+        self.compact_prompts = PROMPT_COMPACTION if compact_prompts is None else compact_prompts
+        self.fast_path = FAST_PATH if fast_path is None else fast_path
+        self._stats_lock = threading.Lock()
+        self._stats = {'calls': 0, 'raw_tokens': 0, 'resume_tokens': 0, 'prompt_tokens': 0, 'latency_ms': 0.0,
+                       'fast_fields': 0, 'llm_fields': 0}
+        
+        # Common regex patterns (precompiled, shared with the fast path)
+        self.email_pattern = EMAIL_RE
+        self.phone_pattern = PHONE_RE
+        self.years_pattern = YEARS_RE
+        self.cgpa_pattern = CGPA_RE
+        
+    @property
+    def nlp(self):
+        """spaCy is only needed for the fallback path, so load it on first use"""
+        if self._nlp is None:
+            self._nlp = get_nlp()
+        return self._nlp
+    
+    @property
+    def skill_matcher(self):
+        if self._skill_matcher is None:
+            self._skill_matcher = get_skill_matcher()
+        return self._skill_matcher
+    
+    def _fast_fields(self, text: str, sections: Dict[str, str]) -> Dict[str, Any]:
+        """Fields the deterministic extractor is confident about, already validated"""
+        start = time.perf_counter()
+        results = extract_fields(text, sections, self.skill_matcher)
+        confident = {}
+        for field, (value, confidence) in results.items():
+            value, ok = _validate_field(field, value)
+            if ok and confidence >= FAST_PATH_THRESHOLD:
+                confident[field] = value
         
-        # Common regex patterns
-        self.email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        self.phone_pattern = r'\b(\+\d{1,2}\s?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b'
-        self.years_pattern = r'(\d+)\+?\s*(?:years?|yrs?)'
-        self.cgpa_pattern = r'(?:CGPA|GPA):\s*(\d+\.?\d*)'
+        with self._stats_lock:
+            self._stats['fast_fields'] += len(confident)
+            self._stats['llm_fields'] += len(results) - len(confident)
+        confidences = {field: confidence for field, (_, confidence) in results.items()}
+        print(f"[DEBUG] Fast path in {(time.perf_counter() - start) * 1000:.1f}ms, "
+              f"confidence: {confidences}")
+        return confident
+    
+    def _prompt_text(self, text: str, sections: Optional[Dict[str, str]], fields) -> str:
+        """Resume text to embed in a prompt asking for the given fields"""
+        if not self.compact_prompts:
+            return text
+        if sections is None:
+            sections = segment_sections(text)
+        return build_prompt_text(sections, fields) or text
+    
+    def _complete(self, prompt: str, raw_text: str, resume_text: str, max_tokens: Optional[int] = None):
+        """
+        get_completion, recording latency and how much of the raw resume
+        text (resume_text is what was actually embedded) went into the prompt
+        """
+        start = time.perf_counter()
+        response = self.llm_client.get_completion(prompt, max_tokens=max_tokens)
+        elapsed_ms = (time.perf_counter() - start) * 1000
         
+        # Same ~4 chars/token estimate the rate limiter uses
+        raw_tokens = len(raw_text) // 4
+        resume_tokens = len(resume_text) // 4
+        prompt_tokens = len(prompt) // 4
+        with self._stats_lock:
+            self._stats['calls'] += 1
+            self._stats['raw_tokens'] += raw_tokens
+            self._stats['resume_tokens'] += resume_tokens
+            self._stats['prompt_tokens'] += prompt_tokens
+            self._stats['latency_ms'] += elapsed_ms
+        print(f"[DEBUG] Parser prompt ~{prompt_tokens} tokens, resume text ~{resume_tokens} of ~{raw_tokens}, "
+              f"LLM latency {elapsed_ms:.0f}ms")
+        return response
+    
+    def prompt_stats(self) -> Dict[str, Any]:
+        """Average prompt size and latency of parser LLM calls since startup"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        calls = stats['calls']
+        raw_tokens = stats['raw_tokens']
+        return {
+            'compaction': self.compact_prompts,
+            'calls': calls,
+            'avg_raw_tokens': round(raw_tokens / calls, 1) if calls else 0,
+            'avg_resume_tokens': round(stats['resume_tokens'] / calls, 1) if calls else 0,
+            'avg_prompt_tokens': round(stats['prompt_tokens'] / calls, 1) if calls else 0,
+            'resume_token_reduction_pct': round(100 * (1 - stats['resume_tokens'] / raw_tokens), 1) if raw_tokens else 0,
+            'avg_latency_ms': round(stats['latency_ms'] / calls, 1) if calls else 0,
+            'fast_path': self.fast_path,
+            'fast_path_fields': stats['fast_fields'],
+            'llm_fields': stats['llm_fields']
+        }
+    
     def _extract_with_regex(self, text: str) -> Dict[str, Any]:
         """Fallback extraction using regex patterns"""
         email = re.search(self.email_pattern, text)
@@ -29,10 +209,8 @@ class ParserAgent:
             "cgpa": float(cgpa.group(1)) if cgpa else None
         }
     
-    def _extract_with_spacy(self, text: str) -> Dict[str, Any]:
-        """Extract entities using spaCy NER"""
-        doc = self.nlp(text)
-        
+    def _spacy_fields(self, doc) -> Dict[str, Any]:
+        """Name, skills and achievements from a processed spaCy Doc"""
         return {
             "name": next((ent.text for ent in doc.ents if ent.label_ == "PERSON"), None),
             "skills": [ent.text for ent in doc.ents if ent.label_ == "PRODUCT"],
@@ -41,11 +219,87 @@ class ParserAgent:
                                  for keyword in ["achieved", "award", "recognition", "led", "developed"])]
         }
     
-    def parse_resume(self, text: str) -> Dict[str, Any]:
+    def _extract_with_spacy(self, text: str) -> Dict[str, Any]:
+        """Extract entities using spaCy NER"""
+        return self._spacy_fields(self.nlp(text))
+    
+    def _apply_fallback(self, parsed_data: Dict[str, Any], fields: List[str],
+                        regex_data: Dict[str, Any], spacy_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Update parsed_data with any found values the fast path did not settle"""
+        if regex_data.get('email') and 'email' in fields:
+            parsed_data['email'] = regex_data['email']
+        if regex_data.get('phone') and 'phone' in fields:
+            parsed_data['phone'] = regex_data['phone']
+        if regex_data.get('total_years_experience') and 'total_years_experience' in fields:
+            parsed_data['total_years_experience'] = regex_data['total_years_experience']
+        if regex_data.get('cgpa') and 'cgpa' in fields:
+            parsed_data['cgpa'] = regex_data['cgpa']
+        
+        if spacy_data.get('name') and 'name' in fields:
+            parsed_data['name'] = spacy_data['name']
+        if spacy_data.get('skills') and 'skills' in fields:
+            parsed_data['skills'] = spacy_data['skills']
+        if spacy_data.get('achievements') and 'achievements' in fields:
+            parsed_data['achievements'] = spacy_data['achievements']
+        return parsed_data
+    
+    def parse_resumes_fallback(self, texts: List[str], sections_list: Optional[List[Dict[str, str]]] = None,
+                               batch_size: Optional[int] = None,
+                               n_process: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        LLM-free parse of many resumes: fast path and regex per resume, then
+        one batched nlp.pipe pass over the resumes that still need NER.
+        Used for bulk ingestion and uploads while the LLM is unavailable.
+        """
+        batch_size = batch_size or SPACY_BATCH_SIZE
+        n_process = n_process or SPACY_N_PROCESS
+        print(f"[DEBUG] Batched fallback parse of {len(texts)} resumes "
+              f"(batch_size={batch_size}, n_process={n_process})")
+        start = time.perf_counter()
+        
+        results = []
+        needs_spacy = []
+        for i, text in enumerate(texts):
+            parsed_data = {
+                'name': 'Unnamed',
+                'email': '',
+                'phone': '',
+                'total_years_experience': 0,
+                'skills': [],
+                'achievements': [],
+                'cgpa': 0.0
+            }
+            fields = list(LEGACY_PROMPT_LINES)
+            if self.fast_path:
+                sections = sections_list[i] if sections_list else segment_sections(text)
+                confident = self._fast_fields(text, sections)
+                parsed_data.update(confident)
+                fields = [field for field in fields if field not in confident]
+            self._apply_fallback(parsed_data, fields, self._extract_with_regex(text), {})
+            if any(field in fields for field in ('name', 'skills', 'achievements')):
+                needs_spacy.append(i)
+            results.append((parsed_data, fields))
+        
+        if needs_spacy:
+            docs = self.nlp.pipe((texts[i] for i in needs_spacy), batch_size=batch_size, n_process=n_process)
+            for i, doc in zip(needs_spacy, docs):
+                parsed_data, fields = results[i]
+                self._apply_fallback(parsed_data, fields, {}, self._spacy_fields(doc))
+        
+        print(f"[DEBUG] Fallback parsed {len(texts)} resumes ({len(needs_spacy)} through spaCy) "
+              f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+        return [parsed_data for parsed_data, _ in results]
+    
+    def parse_resume(self, text: str, sections: Optional[Dict[str, str]] = None,
+                     spacy_fallback: bool = True) -> Dict[str, Any]:
         """
         Parse resume text using a hybrid approach:
-        1. Try LLM structured output first
-        2. Fall back to regex + spaCy if LLM fails
+        1. Deterministic fast path; fields it is confident about skip the LLM
+        2. LLM structured output for the remaining fields
+        3. Fall back to regex + spaCy if LLM fails; with spacy_fallback=False
+           raise LLMExtractionError instead, so the caller can batch it
+           through parse_resumes_fallback
+        sections (from segment_sections) are computed here if not given.
         """
         print(f"[DEBUG] Starting resume parsing for text length: {len(text)}")
         
@@ -60,22 +314,29 @@ class ParserAgent:
             'cgpa': 0.0
         }
         
+        fields = list(LEGACY_PROMPT_LINES)
+        if self.fast_path:
+            if sections is None:
+                sections = segment_sections(text)
+            confident = self._fast_fields(text, sections)
+            parsed_data.update(confident)
+            fields = [field for field in fields if field not in confident]
+            if not fields:
+                print(f"[DEBUG] All fields from fast path, skipping LLM: {parsed_data}")
+                return parsed_data
+        
         # First attempt: LLM-based structured extraction
         try:
+            requested = '\n            '.join(LEGACY_PROMPT_LINES[field] for field in fields)
             llm_prompt = """Extract the following information from this resume. For each field, provide ONLY the extracted information, no explanations:
 
-            Name: [full name]
-            Email: [email]
-            Phone: [phone number]
-            Years of Experience: [number only]
-            Skills: [comma-separated list]
-            Achievements: [semicolon-separated list]
-            CGPA: [cgpa value]
+            """ + requested + """
 
             Resume text:
             {text}"""
             
-            llm_response = self.llm_client.get_completion(llm_prompt.format(text=text))
+            prompt_text = self._prompt_text(text, sections, fields)
+            llm_response = self._complete(llm_prompt.format(text=prompt_text), text, prompt_text)
             # Extract the actual content string from the response object
             content = ""
             if hasattr(llm_response, "choices") and len(llm_response.choices) > 0:
@@ -122,6 +383,9 @@ class ParserAgent:
             return parsed_data
             
         except Exception as e:
+            if not spacy_fallback:
+                print(f"[DEBUG] LLM extraction failed: {str(e)}. Deferring to batched fallback")
+                raise LLMExtractionError(str(e)) from e
             print(f"[DEBUG] LLM extraction failed: {str(e)}. Falling back to regex + spaCy")
             
             try:
@@ -133,21 +397,7 @@ class ParserAgent:
                 spacy_data = self._extract_with_spacy(text)
                 print(f"[DEBUG] Spacy extraction results: {spacy_data}")
                 
-                # Update parsed_data with any found values
-                if regex_data.get('email'):
-                    parsed_data['email'] = regex_data['email']
-                if regex_data.get('phone'):
-                    parsed_data['phone'] = regex_data['phone']
-                if regex_data.get('total_years_experience'):
-                    parsed_data['total_years_experience'] = regex_data['total_years_experience']
-                
-                if spacy_data.get('name'):
-                    parsed_data['name'] = spacy_data['name']
-                if spacy_data.get('skills'):
-                    parsed_data['skills'] = spacy_data['skills']
-                if spacy_data.get('achievements'):
-                    parsed_data['achievements'] = spacy_data['achievements']
-                
+                self._apply_fallback(parsed_data, fields, regex_data, spacy_data)
                 print(f"[DEBUG] Final parsed data: {parsed_data}")
                 return parsed_data
                 
@@ -155,3 +405,73 @@ class ParserAgent:
                 print(f"[DEBUG] Fallback extraction failed: {str(inner_e)}")
                 # Return the default parsed_data if all extraction methods fail
                 return parsed_data
+    
+    def _request_fields(self, text: str, fields: list,
+                        sections: Optional[Dict[str, str]] = None) -> Optional[dict]:
+        """Ask the LLM for the given profile fields as one JSON object"""
+        schema = '\n'.join(f'  "{field}": {PROFILE_FIELDS[field]}' for field in fields)
+        prompt_text = self._prompt_text(text, sections, fields)
+        prompt = f"""Extract the following fields from this resume. Respond with ONLY a JSON object with exactly these keys, no explanations:
+{{
+{schema}
+}}
+
+Resume text:
+{prompt_text}"""
+        response = self._complete(prompt, text, prompt_text, max_tokens=COMBINED_MAX_TOKENS)
+        content = ""
+        if hasattr(response, "choices") and len(response.choices) > 0:
+            content = response.choices[0].message.content or ""
+        print(f"[DEBUG] LLM JSON content:\n{content}")
+        return _extract_json_object(content)
+    
+    def parse_and_summarize(self, text: str, sections: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Extract every profile field plus the professional summary in a single
+        JSON response. Fields the deterministic fast path is confident about
+        are left out of the request, so usually only the summary and a few
+        fields remain. Fields that fail validation are re-requested on their
+        own (one repair call); anything still broken keeps its default.
+        Raises if the LLM call itself fails, so callers can fall back.
+        """
+        print(f"[DEBUG] Starting combined parse + summarize for text length: {len(text)}")
+        parsed_data = {
+            'name': 'Unnamed',
+            'email': '',
+            'phone': '',
+            'total_years_experience': 0,
+            'skills': [],
+            'achievements': [],
+            'cgpa': 0.0,
+            'professional_summary': ''
+        }
+        
+        if (self.compact_prompts or self.fast_path) and sections is None:
+            sections = segment_sections(text)
+        fields = list(PROFILE_FIELDS)
+        if self.fast_path:
+            confident = self._fast_fields(text, sections)
+            parsed_data.update(confident)
+            fields = [field for field in fields if field not in confident]
+        data = self._request_fields(text, fields, sections) or {}
+        broken = []
+        for field in fields:
+            value, ok = _validate_field(field, data.get(field))
+            if ok:
+                parsed_data[field] = value
+            else:
+                broken.append(field)
+        
+        if broken:
+            print(f"[DEBUG] Repairing invalid fields: {broken}")
+            # The repair prompt only carries the sections the broken fields need
+            repaired = self._request_fields(text, broken, sections) or {}
+            for field in broken:
+                value, ok = _validate_field(field, repaired.get(field))
+                if ok:
+                    parsed_data[field] = value
+                else:
+                    print(f"[DEBUG] Field still invalid after repair, keeping default: {field}")
+        
+        print(f"[DEBUG] Combined parsed data: {parsed_data}")
+        return parsed_data
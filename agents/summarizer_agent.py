@@ -1,8 +1,8 @@
-from utils.llm_client import TogetherLLMClient
+from utils.registry import get_llm_client
 
 class SummarizerAgent:
-    def __init__(self):
-        self.llm_client = TogetherLLMClient()
+    def __init__(self, llm_client=None):
+        self.llm_client = llm_client or get_llm_client()
     
     def generate_summary(self, resume_data: dict) -> str:
         """
@@ -26,3 +26,19 @@ class SummarizerAgent:
         if hasattr(response, "choices") and len(response.choices) > 0:
             summary_text = getattr(response.choices[0].message, "content", "")
         return summary_text
+    
+    def fallback_summary(self, resume_data: dict) -> str:
+        """Template summary from the parsed fields, used when the LLM is unavailable"""
+        name = resume_data.get('name') or 'The candidate'
+        sentences = []
+        years = resume_data.get('total_years_experience', 0)
+        if years:
+            sentences.append(f"{name} has {years} years of professional experience.")
+        skills = resume_data.get('skills', [])
+        if skills:
+            owner = 'Their' if sentences else f"{name}'s"
+            sentences.append(f"{owner} key skills include {', '.join(skills[:8])}.")
+        achievements = resume_data.get('achievements', [])
+        if achievements:
+            sentences.append(f"Notable achievements: {'; '.join(achievements[:3])}.")
+        return ' '.join(sentences)
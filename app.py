@@ -1,37 +1,53 @@
 import os
+import time
+import hashlib
 from dotenv import load_dotenv
 from flask import Flask, render_template, request, jsonify, flash, redirect, url_for
 
 # Load environment variables from .env file
 load_dotenv()
 from werkzeug.utils import secure_filename
-from utils.pdf_utils import validate_pdf, extract_text_from_pdf
-from utils.local_db import LocalDB
+from utils.pdf_utils import ingest_pdfs
+from utils.rate_limiter import get_rate_limiter
+from utils.registry import get_db, component_timings
 from workflows.resume_workflow import ResumeWorkflow
 from agents.filter_agent import FilterAgent
-from agents.matcher_agent import MatcherAgent
+from agents.parser_agent import LLMExtractionError
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
 
-# Initialize components
-db = LocalDB()
+# Initialize components; heavy pieces are built once and shared via the registry
+startup_start = time.perf_counter()
+db = get_db()
 workflow = ResumeWorkflow()
 filter_agent = FilterAgent()
-matcher_agent = MatcherAgent()
+STARTUP_MS = round((time.perf_counter() - startup_start) * 1000, 2)
+print(f"[DEBUG] Components initialized in {STARTUP_MS}ms: {component_timings()}")
 
 # Configure upload folder
 UPLOAD_FOLDER = 'uploads'
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
+# Keep a copy of every uploaded PDF on disk (set ARCHIVE_UPLOADS=false to disable)
+ARCHIVE_UPLOADS = os.getenv('ARCHIVE_UPLOADS', 'true').lower() in ('1', 'true', 'yes')
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() == 'pdf'
 
+# Resumes per page on the index and database listings
+LIST_PAGE_SIZE = 24
+
+def _list_page():
+    """One keyset-paginated page of resumes for the current request's cursor"""
+    return db.list_resumes(limit=LIST_PAGE_SIZE, after=request.args.get('after'),
+                           before=request.args.get('before'))
+
 @app.route('/')
 def index():
-    resumes = db.get_all_resumes()
-    return render_template('index.html', resumes=resumes)
+    page = _list_page()
+    return render_template('index.html', resumes=page['resumes'],
+                           next_cursor=page['next_cursor'], prev_cursor=page['prev_cursor'])
 
 @app.route('/delete_all_resumes')
 def delete_all_resumes():
@@ -46,9 +62,10 @@ def upload():
             print("[DEBUG] No files found in request")
             return 'No files selected', 400, {'Content-Type': 'text/plain'}
             
+        uploads = []
         valid_files = []
-        resume_texts = []
         invalid_files = []
+        seen_hashes = set()
             
         files = request.files.getlist('files[]')
         print(f"[DEBUG] Number of files received: {len(files)}")
@@ -65,36 +82,49 @@ def upload():
                 continue
                 
             filename = secure_filename(file.filename)
-            filepath = os.path.join(UPLOAD_FOLDER, filename)
-            
-            # Create upload folder if it doesn't exist
-            os.makedirs(UPLOAD_FOLDER, exist_ok=True)
             
-            print(f"[DEBUG] About to save file: {filename}")
-            print(f"[DEBUG] Full save path: {os.path.abspath(filepath)}")
-            print(f"[DEBUG] File object type: {type(file)}")
-            print(f"[DEBUG] File object attributes: {dir(file)}")
+            # Read the upload once; everything below works on these bytes
+            data = file.read()
+            content_hash = hashlib.sha256(data).hexdigest()
+            print(f"[DEBUG] Read {len(data)} bytes for {filename}, SHA-256: {content_hash}")
             
-            # Save the file in binary mode
-            file.save(filepath)
+            # The same file picked twice (or under two names) is parsed and saved once
+            if content_hash in seen_hashes:
+                print(f"[DEBUG] Skipping {filename}: same content as an earlier file in this upload")
+                continue
+            seen_hashes.add(content_hash)
             
-            # Verify the saved file
-            if os.path.exists(filepath):
-                size = os.path.getsize(filepath)
-                print(f"[DEBUG] File saved successfully. Size: {size} bytes")
-                # Read first few bytes to check PDF signature
-                with open(filepath, 'rb') as f:
-                    header = f.read(20)
-                    print(f"[DEBUG] Saved file header: {header}")
-            else:
-                print(f"[DEBUG] Error: File was not saved to {filepath}")
+            # Byte-identical re-uploads are answered from the ingest cache
+            cached_resume = workflow.get_cached_resume(content_hash)
+            if cached_resume is not None:
+                print(f"[DEBUG] Using cached parse for {filename}")
+            uploads.append({'filename': filename, 'data': data,
+                            'content_hash': content_hash, 'cached': cached_resume})
+        
+        # Validate, count pages and extract text for all cache misses in parallel
+        to_ingest = [u for u in uploads if u['cached'] is None]
+        ingested_results = ingest_pdfs(
+            [(u['filename'], u['data']) for u in to_ingest],
+            archive_dir=UPLOAD_FOLDER if ARCHIVE_UPLOADS else None
+        ) if to_ingest else []
+        ingested_iter = iter(ingested_results)
+        
+        for upload_entry in uploads:
+            filename = upload_entry['filename']
+            if upload_entry['cached'] is not None:
+                valid_files.append({'filename': filename, 'content_hash': upload_entry['content_hash'],
+                                    'text': None, 'cached': upload_entry['cached']})
+                continue
             
-            if not validate_pdf(filepath):
-                print(f"[DEBUG] Invalid PDF: {filename}")
-                invalid_files.append(f"{filename} (invalid PDF format)")
+            ingested = next(ingested_iter)
+            if not ingested['valid']:
+                print(f"[DEBUG] Invalid PDF: {filename} ({ingested['error']})")
+                invalid_files.append(f"{filename} ({ingested['error'] or 'invalid PDF format'})")
                 continue
                 
-            valid_files.append(filename)
+            print(f"[DEBUG] Ingested {filename}: {ingested['page_count']} pages")
+            valid_files.append({'filename': filename, 'content_hash': upload_entry['content_hash'],
+                                'text': ingested['text'], 'cached': None})
         
         if invalid_files:
             error_msg = "The following files could not be processed:\n" + "\n".join(f"• {f}" for f in invalid_files)
@@ -102,18 +132,18 @@ def upload():
                 
         # Process all resumes
         if valid_files:
-            print("[DEBUG] Extracting text from PDFs")
-            resume_texts = []
             processed_resumes = []
+            deferred = []
             
-            for filename in valid_files:
-                filepath = os.path.join(UPLOAD_FOLDER, filename)
+            for entry in valid_files:
+                filename = entry['filename']
                 print(f"\n[DEBUG] ===== Processing file: {filename} =====")
                 
-                # Extract text from PDF
-                print(f"[DEBUG] Starting text extraction from: {filepath}")
-                text = extract_text_from_pdf(filepath)
+                if entry['cached'] is not None:
+                    processed_resumes.append(entry['cached'])
+                    continue
                 
+                text = entry['text']
                 if not text:
                     print(f"[DEBUG] No text extracted from {filename}")
                     continue
@@ -123,115 +153,63 @@ def upload():
                 
                 # Process resume
                 print(f"\n[DEBUG] ----- Processing resume text -----")
-                workflow = ResumeWorkflow()
-                
                 try:
-                    # Process the resume and get the parsed data
-                    processed_resume = workflow.process_resume(text)
+                    processed_resume = workflow.process_resume(
+                        text, filename=filename, content_hash=entry['content_hash'], defer_fallback=True
+                    )
                     print(f"[DEBUG] Resume processing result: {processed_resume}")
-                    
-                    if processed_resume is None:
-                        print("[DEBUG] No resume data returned from processing")
-                        processed_resume = {
-                            'name': 'Unnamed',
-                            'total_years_experience': 0,
-                            'skills': [],
-                            'achievements': []
-                        }
-                    elif not isinstance(processed_resume, dict):
-                        print(f"[DEBUG] Converting non-dict result to dict: {type(processed_resume)}")
-                        # Try to convert from a generator or other type
-                        try:
-                            if hasattr(processed_resume, '__next__') or hasattr(processed_resume, '__iter__'):
-                                # If it's a generator or iterator, take the first item
-                                first_item = next(iter(processed_resume), None)
-                                if isinstance(first_item, dict):
-                                    processed_resume = first_item
-                                else:
-                                    print(f"[DEBUG] First item is not a dict: {type(first_item)}")
-                                    processed_resume = {
-                                        'name': str(first_item) if first_item else 'Unnamed',
-                                        'total_years_experience': 0,
-                                        'skills': [],
-                                        'achievements': []
-                                    }
-                            else:
-                                # Try to convert object attributes to dict
-                                processed_resume = {
-                                    'name': str(getattr(processed_resume, 'name', 'Unnamed')),
-                                    'total_years_experience': int(getattr(processed_resume, 'total_years_experience', 0)),
-                                    'skills': list(getattr(processed_resume, 'skills', [])),
-                                    'achievements': list(getattr(processed_resume, 'achievements', []))
-                                }
-                        except Exception as e:
-                            print(f"[DEBUG] Error converting to dict: {str(e)}")
-                            processed_resume = {
-                                'name': 'Unnamed',
-                                'total_years_experience': 0,
-                                'skills': [],
-                                'achievements': []
-                            }
-                    
                     processed_resumes.append(processed_resume)
-                    
+                except LLMExtractionError:
+                    print(f"[DEBUG] LLM unavailable for {filename}, deferring to batched fallback")
+                    deferred.append({'filename': filename, 'text': text})
                 except Exception as e:
                     print(f"[DEBUG] Error processing resume: {str(e)}")
                     print(f"[DEBUG] Error type: {type(e)}")
                     continue
-                
-                # Convert resume data to text format
-                print("[DEBUG] Converting to text format")
-                achievements = '\n'.join([f'• {a}' for a in processed_resume.get('achievements', [])]) if processed_resume.get('achievements', []) else 'None listed'
-                resume_text = f"""
-                Name: {processed_resume.get('name', 'Unnamed')}
-                Experience: {processed_resume.get('total_years_experience', 0)} years
-                Skills: {', '.join(str(s) for s in processed_resume.get('skills', []))}
-                Achievements:
-                {achievements}
-                """.strip()
+            
+            if deferred:
                 try:
-                    for resume in processed_resumes:
-                        print(f"[DEBUG] Processing resume: {type(resume)}")
-                        print(f"[DEBUG] Resume content: {resume}")
-                        
-                        if not isinstance(resume, dict):
-                            print(f"[DEBUG] Converting resume to dict: {resume}")
-                            resume = {
-                                'name': str(resume.name) if hasattr(resume, 'name') else 'Unnamed',
-                                'total_years_experience': getattr(resume, 'total_years_experience', 0),
-                                'skills': list(getattr(resume, 'skills', [])),
-                                'achievements': list(getattr(resume, 'achievements', []))
-                            }
-                        
-                        # Format skills as comma-separated list
-                        skills = resume.get('skills', [])
-                        if not isinstance(skills, list):
-                            skills = list(skills) if skills else []
-                        skills_text = ', '.join(str(s) for s in skills)
-                        
-                        # Format achievements as bullet points
-                        achievements = resume.get('achievements', [])
-                        if not isinstance(achievements, list):
-                            achievements = list(achievements) if achievements else []
-                        achievements_text = '\n'.join([f'• {a}' for a in achievements]) if achievements else 'None listed'
-                        
-                        resume_text = f"""
-                        Name: {resume.get('name', 'Unnamed')}
-                        Experience: {resume.get('total_years_experience', 0)} years
-                        Skills: {skills_text}
-                        Achievements:
-                        {achievements_text}
-                        """.strip()
-                        
-                        print(f"[DEBUG] Formatted resume text:\n{resume_text}")
-                        resume_texts.append(resume_text)
-                    
-                    response_text = f"Successfully processed {len(processed_resumes)} resumes\n\n" + "\n\n---\n\n".join(resume_texts)
-                    return response_text, 200, {'Content-Type': 'text/plain'}
+                    processed_resumes.extend(workflow.process_fallback_batch(deferred))
                 except Exception as e:
-                    error_message = f'Error processing resumes: {str(e)}'
-                    print(f'[DEBUG] {error_message}')
-                    return error_message, 500, {'Content-Type': 'text/plain'}
+                    print(f"[DEBUG] Batched fallback failed: {str(e)}")
+            
+            if not processed_resumes:
+                return 'No text could be extracted from the uploaded files', 400, {'Content-Type': 'text/plain'}
+            
+            # Convert resume data to text format
+            print("[DEBUG] Converting to text format")
+            try:
+                resume_texts = []
+                for resume in processed_resumes:
+                    # Format skills as comma-separated list
+                    skills = resume.get('skills', [])
+                    if not isinstance(skills, list):
+                        skills = list(skills) if skills else []
+                    skills_text = ', '.join(str(s) for s in skills)
+                    
+                    # Format achievements as bullet points
+                    achievements = resume.get('achievements', [])
+                    if not isinstance(achievements, list):
+                        achievements = list(achievements) if achievements else []
+                    achievements_text = '\n'.join([f'• {a}' for a in achievements]) if achievements else 'None listed'
+                    
+                    resume_text = f"""
+                    Name: {resume.get('name', 'Unnamed')}
+                    Experience: {resume.get('total_years_experience', 0)} years
+                    Skills: {skills_text}
+                    Achievements:
+                    {achievements_text}
+                    """.strip()
+                    
+                    print(f"[DEBUG] Formatted resume text:\n{resume_text}")
+                    resume_texts.append(resume_text)
+                
+                response_text = f"Successfully processed {len(processed_resumes)} resumes\n\n" + "\n\n---\n\n".join(resume_texts)
+                return response_text, 200, {'Content-Type': 'text/plain'}
+            except Exception as e:
+                error_message = f'Error processing resumes: {str(e)}'
+                print(f'[DEBUG] {error_message}')
+                return error_message, 500, {'Content-Type': 'text/plain'}
         
         return 'No valid files to process', 400, {'Content-Type': 'text/plain'}
     
@@ -266,10 +244,17 @@ def match():
             min_years = int(min_years) if min_years else None
             min_cgpa = request.form.get('min_cgpa')
             min_cgpa = float(min_cgpa) if min_cgpa else None
-            matched_resumes = workflow.match_resumes(job_description)
+            matched_resumes, match_stats = workflow.match_resumes_with_stats(
+                job_description,
+                required_skills=required_skills,
+                min_years=min_years,
+                min_cgpa=min_cgpa
+            )
             return render_template(
                 'match_result.html',
                 candidates=matched_resumes,
+                match_stats=match_stats,
+                job_description=job_description,
                 required_skills=required_skills,
                 min_years=min_years,
                 min_cgpa=min_cgpa
@@ -277,15 +262,6 @@ def match():
         except Exception as e:
             flash(f"An error occurred: {str(e)}")
             return redirect(request.url)
-        resumes = filter_agent.db.get_all_resumes()
-        try:
-            matched = matcher_agent.rank_candidates(
-                resumes, job_description, required_skills, min_years, min_cgpa)
-            return render_template('match.html', resumes=matched, job_description=job_description)
-        except Exception as e:
-            return render_template('match.html', resumes=[], job_description=job_description, error=f"Error matching resumes: {e}")
-        except Exception as e:
-            return render_template('match.html', resumes=[], job_description=job_description, error=f"Error matching resumes: {e}")
     else:
         return render_template('match.html', resumes=[], job_description='')
 
@@ -298,29 +274,69 @@ def filter_resumes():
     min_cgpa = request.args.get('min_cgpa')
     min_cgpa = float(min_cgpa) if min_cgpa else None
 
-    resumes = filter_agent.db.get_all_resumes()
-    results = []
-    for resume in resumes:
-        # Skills filter: match if any skill substring matches (case-insensitive)
-        if skills:
-            candidate_skills = [str(s).strip().lower() for s in resume.get('skills', []) if s]
-            if not any(any(skill in cs for cs in candidate_skills) for skill in [sk.lower() for sk in skills]):
-                continue
-        # Experience filter
-        if min_years is not None:
-            if int(resume.get('total_years_experience', resume.get('experience', 0)) or 0) < min_years:
-                continue
-        # CGPA filter
-        if min_cgpa is not None:
-            if float(resume.get('cgpa', 0.0) or 0.0) < min_cgpa:
-                continue
-        results.append(resume)
+    match = request.args.get('match', 'any')
+    limit = request.args.get('limit', type=int)
+
+    # Skills are matched on canonical names (aliases like "js" included) via the resume_skills index
+    results = filter_agent.filter(skills=skills, require_all=(match == 'all'), min_years=min_years,
+                                  min_cgpa=min_cgpa, limit=limit)
     return jsonify(results)
 
+@app.route('/api/llm_stats')
+def llm_stats():
+    cache = workflow.parser.llm_client.cache
+    return jsonify({
+        'rate_limiter': get_rate_limiter().stats(),
+        'response_cache': cache.stats() if cache is not None else None,
+        'parser_prompts': workflow.parser.prompt_stats()
+    })
+
+@app.route('/api/components')
+def components():
+    return jsonify({
+        'startup_ms': STARTUP_MS,
+        'build_ms': component_timings(),
+        'resume_cache': db.read_cache_stats()
+    })
+
+SEARCH_PAGE_SIZE = 20
+
+def _search(query: str, page: int):
+    """Run a full-text search; returns (hits, elapsed milliseconds)"""
+    start = time.perf_counter()
+    hits = db.search_resumes(query, limit=SEARCH_PAGE_SIZE, offset=(page - 1) * SEARCH_PAGE_SIZE)
+    return hits, round((time.perf_counter() - start) * 1000, 2)
+
+@app.route('/search')
+def search():
+    query = request.args.get('q', '').strip()
+    page = max(1, request.args.get('page', 1, type=int))
+    hits, elapsed_ms = _search(query, page) if query else ([], 0)
+    return render_template('search.html', query=query, hits=hits, page=page,
+                           page_size=SEARCH_PAGE_SIZE, elapsed_ms=elapsed_ms)
+
+@app.route('/api/search')
+def api_search():
+    query = request.args.get('q', '').strip()
+    page = max(1, request.args.get('page', 1, type=int))
+    hits, elapsed_ms = _search(query, page) if query else ([], 0)
+    return jsonify({'query': query, 'page': page, 'elapsed_ms': elapsed_ms, 'results': hits})
+
+@app.route('/api/similar')
+def api_similar():
+    """Nearest resumes to free text (e.g. a job description) in the embedding index"""
+    query = request.args.get('q', '').strip()
+    limit = min(100, max(1, request.args.get('limit', 10, type=int)))
+    start = time.perf_counter()
+    hits = db.similar_resumes(query, limit) if query else []
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+    return jsonify({'query': query, 'elapsed_ms': elapsed_ms, 'results': hits})
+
 @app.route('/database')
 def view_database():
-    resumes = db.get_all_resumes()
-    return render_template('database.html', resumes=resumes)
+    page = _list_page()
+    return render_template('database.html', resumes=page['resumes'],
+                           next_cursor=page['next_cursor'], prev_cursor=page['prev_cursor'])
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,123 @@
+"""
+Compare one-candidate-per-prompt scoring against batched scoring prompts:
+
+    python -m benchmarks.batched_scoring --candidates 200 --batch-sizes 1 5 10 20
+
+Uses a simulated LLM (no network, no API key) whose latency grows with the
+number of prompt and completion tokens, and reports prompt tokens and wall
+time per candidate for each batch size.
+"""
+import re
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+from typing import List, Dict
+from agents.matcher_agent import MatcherAgent
+from utils.llm_cache import completion_from_text
+
+JOB_DESCRIPTION = """We are hiring a backend engineer to design and operate Python services.
+Requirements: 3+ years of experience with Python, Flask or Django, SQL databases, Docker
+and cloud deployments on AWS or GCP. Experience with message queues, caching, CI/CD
+pipelines and observability is a plus. You will own services end to end, mentor junior
+engineers and work closely with product and data teams to ship reliable features."""
+
+SKILL_POOL = ['Python', 'Flask', 'Django', 'SQL', 'PostgreSQL', 'Docker', 'Kubernetes', 'AWS', 'GCP',
+              'React', 'Java', 'Spring', 'Redis', 'Kafka', 'Terraform', 'Go', 'C++', 'Pandas', 'PyTorch']
+
+def make_candidates(count: int) -> List[Dict]:
+    candidates = []
+    for i in range(count):
+        digest = hashlib.sha256(str(i).encode()).digest()
+        skills = [SKILL_POOL[b % len(SKILL_POOL)] for b in digest[:6]]
+        candidates.append({
+            'id': i,
+            'name': f'Candidate {i}',
+            'total_years_experience': digest[6] % 12,
+            'skills': sorted(set(skills)),
+            'achievements': [f'Led migration of service {digest[7]} to the cloud',
+                             f'Reduced p99 latency by {digest[8] % 60}%'],
+            'cgpa': round(6 + (digest[9] % 40) / 10, 1)
+        })
+    return candidates
+
+class SimulatedLLMClient:
+    """Deterministic stand-in for the Together client that tracks token usage"""
+    def __init__(self, base_latency: float, per_prompt_token: float, per_output_token: float):
+        self.base_latency = base_latency
+        self.per_prompt_token = per_prompt_token
+        self.per_output_token = per_output_token
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+    def _respond(self, prompt: str) -> str:
+        labels = re.findall(r'^\s*(C\d+):', prompt, flags=re.MULTILINE)
+        if labels:
+            return json.dumps([
+                {'candidate': label, 'score': 1 + int(hashlib.md5(label.encode()).hexdigest(), 16) % 10,
+                 'explanation': 'Relevant backend experience with most required skills.'}
+                for label in labels
+            ])
+        return f"{1 + len(prompt) % 10}: Relevant backend experience with most required skills."
+
+    def _record(self, prompt: str, content: str) -> float:
+        """Count one call's tokens and return its simulated latency in seconds"""
+        prompt_tokens = len(prompt) // 4
+        output_tokens = len(content) // 4
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.output_tokens += output_tokens
+        return (self.base_latency + prompt_tokens * self.per_prompt_token
+                + output_tokens * self.per_output_token)
+
+    async def get_completion_async(self, prompt: str, use_cache: bool = True, max_tokens: int = None):
+        content = self._respond(prompt)
+        await asyncio.sleep(self._record(prompt, content))
+        return completion_from_text(content)
+
+def run(candidates: List[Dict], batch_size: int, concurrency: int, latency: Dict[str, float]) -> Dict:
+    client = SimulatedLLMClient(**latency)
+    matcher = MatcherAgent(max_concurrency=concurrency, batch_size=batch_size, llm_client=client)
+
+    start = time.perf_counter()
+    ranked = matcher.rank_candidates(candidates, JOB_DESCRIPTION, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+
+    assert len(ranked) == len(candidates)
+    return {
+        'batch_size': batch_size,
+        'calls': client.calls,
+        'prompt_tokens_per_candidate': client.prompt_tokens / len(candidates),
+        'output_tokens_per_candidate': client.output_tokens / len(candidates),
+        'ms_per_candidate': elapsed * 1000 / len(candidates),
+        'total_seconds': elapsed
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batched vs one-at-a-time candidate scoring')
+    parser.add_argument('--candidates', type=int, default=200)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 5, 10, 20])
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--base-latency', type=float, default=0.3,
+                        help='Fixed seconds per request (network + queueing)')
+    parser.add_argument('--per-prompt-token', type=float, default=0.00005,
+                        help='Seconds per prompt token (prefill)')
+    parser.add_argument('--per-output-token', type=float, default=0.01,
+                        help='Seconds per generated token (decode)')
+    args = parser.parse_args()
+
+    latency = {'base_latency': args.base_latency, 'per_prompt_token': args.per_prompt_token,
+               'per_output_token': args.per_output_token}
+    candidates = make_candidates(args.candidates)
+
+    print(f"{args.candidates} candidates, concurrency {args.concurrency}")
+    print(f"{'batch':>5} {'calls':>6} {'prompt tok/cand':>16} {'output tok/cand':>16} {'ms/cand':>9} {'total s':>8}")
+    for batch_size in args.batch_sizes:
+        r = run(candidates, batch_size, args.concurrency, latency)
+        print(f"{r['batch_size']:>5} {r['calls']:>6} {r['prompt_tokens_per_candidate']:>16.1f} "
+              f"{r['output_tokens_per_candidate']:>16.1f} {r['ms_per_candidate']:>9.1f} {r['total_seconds']:>8.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Time job-description queries against the memory-mapped embedding index:
+
+    python -m benchmarks.embedding_search --resumes 100000 --queries 50
+
+Builds a throwaway index in a temporary directory from synthetic resumes
+(--distinct of them are encoded for real, the rest are perturbed copies so
+building 100k rows stays quick), then reports per-query latency of
+EmbeddingIndex.search and how fast the encoder runs at ingest.
+"""
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+from benchmarks.batched_scoring import JOB_DESCRIPTION, make_candidates
+from benchmarks.prefilter_recall import add_text
+from utils.embedding_index import EmbeddingIndex
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark embedding index queries')
+    parser.add_argument('--resumes', type=int, default=100000)
+    parser.add_argument('--distinct', type=int, default=2000, help='Resumes encoded for real')
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--k', type=int, default=50)
+    args = parser.parse_args()
+
+    candidates = add_text(make_candidates(min(args.distinct, args.resumes)))
+    with tempfile.TemporaryDirectory() as tmp:
+        index = EmbeddingIndex(os.path.join(tmp, 'bench.emb'))
+
+        start = time.perf_counter()
+        encoded = np.stack([index.encode(f"{c['professional_summary']}\n{c['content']}",
+                                         [s.lower() for s in c['skills']]) for c in candidates])
+        encode_ms = (time.perf_counter() - start) * 1000 / len(candidates)
+
+        rng = np.random.default_rng(0)
+        written = 0
+        while written < args.resumes:
+            count = min(len(encoded), args.resumes - written)
+            block = encoded[:count] + rng.normal(0, 0.01, (count, index.dim)).astype(np.float32)
+            block /= np.linalg.norm(block, axis=1, keepdims=True)
+            index.write(list(range(written + 1, written + count + 1)), block)
+            written += count
+
+        queries = [JOB_DESCRIPTION] + [c['professional_summary'] for c in candidates[:args.queries - 1]]
+        index.search(queries[0], args.k)  # map the file and warm the page cache
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            hits = index.search(query, args.k)
+            timings.append((time.perf_counter() - start) * 1000)
+        assert len(hits) == min(args.k, args.resumes)
+
+        size_mb = os.path.getsize(index.path) / (1024 * 1024)
+        print(f"\n{index.rows} resumes x {index.dim} dims ({size_mb:.1f} MB), top {args.k}")
+        print(f"encode: {encode_ms:.2f} ms/resume")
+        print(f"query:  p50 {np.percentile(timings, 50):.2f} ms, p95 {np.percentile(timings, 95):.2f} ms, "
+              f"max {max(timings):.2f} ms over {len(timings)} queries")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Deterministic local stand-in for the Together chat completions API:
+
+    python -m benchmarks.llm_standin_server --port 8001 --latency lognormal --median 1.2 --sigma 0.4
+
+then run the app or a benchmark with LLM_BACKEND=local. Responses are derived
+from a hash of the prompt, so the same prompt always gets the same answer,
+and each request sleeps for a latency drawn (reproducibly, from --seed and
+the prompt) from the configured distribution. --error-rate makes a fraction
+of requests fail with 429 + Retry-After to exercise the client's backoff.
+"""
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SKILLS = ['Python', 'SQL', 'Docker', 'AWS', 'React', 'Java', 'Machine Learning', 'Flask', 'Kubernetes', 'Git']
+
+def prompt_seed(prompt: str) -> int:
+    return int(hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16], 16)
+
+def fake_completion(prompt: str) -> str:
+    """Answer in the format each agent's prompt asks for"""
+    rng = random.Random(prompt_seed(prompt))
+    labels = re.findall(r'^\s*(C\d+):', prompt, flags=re.MULTILINE)
+    if labels:
+        # MatcherAgent batched scoring
+        return json.dumps([{'candidate': label, 'score': rng.randint(1, 10),
+                            'explanation': 'Solid overlap with the required skills.'} for label in labels])
+    if 'Respond with ONLY a JSON object' in prompt:
+        # ParserAgent combined extraction / field repair: answer only the requested keys
+        keys = re.findall(r'^\s*"(\w+)":', prompt, flags=re.MULTILINE)
+        profile = {
+            'name': f"Candidate {rng.randint(1000, 9999)}",
+            'email': f"candidate{rng.randint(1, 999)}@example.com",
+            'phone': f"555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+            'total_years_experience': rng.randint(0, 15),
+            'skills': rng.sample(SKILLS, 5),
+            'achievements': [f"Led a team of {rng.randint(2, 9)} engineers", "Shipped a data platform"],
+            'cgpa': rng.randint(60, 100) / 10,
+            'professional_summary': ("The candidate is an engineer with hands-on experience across backend "
+                                     "and data work. They have delivered production systems and led small teams.")
+        }
+        return json.dumps({key: profile.get(key, '') for key in keys})
+    if 'Score this candidate' in prompt:
+        return f"{rng.randint(1, 10)}: Solid overlap with the required skills."
+    if 'Extract the following information' in prompt:
+        skills = ', '.join(rng.sample(SKILLS, 5))
+        return (f"Name: Candidate {rng.randint(1000, 9999)}\n"
+                f"Email: candidate{rng.randint(1, 999)}@example.com\n"
+                f"Phone: 555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}\n"
+                f"Years of Experience: {rng.randint(0, 15)}\n"
+                f"Skills: {skills}\n"
+                f"Achievements: Led a team of {rng.randint(2, 9)} engineers; Shipped a data platform\n"
+                f"CGPA: {rng.randint(60, 100) / 10}")
+    return ("The candidate is an engineer with hands-on experience across backend and data work. "
+            "They have delivered production systems and led small teams. "
+            "Their skills span modern languages and cloud tooling. "
+            "They would be a strong fit for engineering roles.")
+
+class LatencyModel:
+    def __init__(self, kind: str, median: float, sigma: float, low: float, high: float, seed: int):
+        self.kind = kind
+        self.median = median
+        self.sigma = sigma
+        self.low = low
+        self.high = high
+        self.seed = seed
+
+    def sample(self, prompt: str) -> float:
+        rng = random.Random(self.seed ^ prompt_seed(prompt))
+        if self.kind == 'constant':
+            return self.median
+        if self.kind == 'uniform':
+            return rng.uniform(self.low, self.high)
+        # lognormal: median * exp(N(0, sigma)) gives a realistic long tail
+        return self.median * rng.lognormvariate(0, self.sigma)
+
+def make_handler(latency: LatencyModel, error_rate: float, seed: int):
+    error_rng = random.Random(seed)
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, body: dict, headers: dict = None):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            if self.path.rstrip('/') != '/v1/chat/completions':
+                self._send_json(404, {'error': 'not found'})
+                return
+
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            prompt = '\n'.join(m.get('content', '') for m in request.get('messages', []))
+
+            if error_rate and error_rng.random() < error_rate:
+                self._send_json(429, {'error': 'rate limited'}, {'Retry-After': '1'})
+                return
+
+            time.sleep(latency.sample(prompt))
+            content = fake_completion(prompt)
+            self._send_json(200, {
+                'id': f"standin-{prompt_seed(prompt):x}",
+                'object': 'chat.completion',
+                'model': request.get('model'),
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content},
+                             'finish_reason': 'stop'}],
+                'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': len(content) // 4}
+            })
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the Together chat completions API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', choices=['constant', 'uniform', 'lognormal'], default='lognormal')
+    parser.add_argument('--median', type=float, default=1.0, help='Constant/median latency in seconds')
+    parser.add_argument('--sigma', type=float, default=0.5, help='Lognormal shape; larger means a longer tail')
+    parser.add_argument('--low', type=float, default=0.5, help='Uniform lower bound in seconds')
+    parser.add_argument('--high', type=float, default=2.0, help='Uniform upper bound in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    latency = LatencyModel(args.latency, args.median, args.sigma, args.low, args.high, args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(latency, args.error_rate, args.seed))
+    print(f"LLM stand-in listening on http://{args.host}:{args.port} ({args.latency} latency)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
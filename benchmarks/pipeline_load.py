@@ -0,0 +1,74 @@
+"""
+Load-test the parse → summarize pipeline without live API calls:
+
+    python -m benchmarks.llm_standin_server --latency lognormal --median 1.0 &
+    LLM_BACKEND=local LLM_CACHE=false python -m benchmarks.pipeline_load --resumes 200 --concurrency 16
+
+or replay a recorded session with LLM_BACKEND=replay. Reports throughput
+and per-resume latency percentiles. Nothing is written to the database.
+Use --mode two_step to measure the legacy parse then summarize round trips
+instead of the single combined extraction call.
+"""
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from dotenv import load_dotenv
+
+load_dotenv()
+from agents.parser_agent import ParserAgent
+from agents.summarizer_agent import SummarizerAgent
+
+def make_resume_text(i: int) -> str:
+    return f"""Candidate {i}
+candidate{i}@example.com | 555-010-{i % 10000:04d}
+
+EXPERIENCE
+Software Engineer, Example Corp ({2015 + i % 8} - present)
+- Built data pipelines in Python and SQL serving {i % 50 + 10} internal teams
+- Led migration of legacy services to Docker and AWS
+
+EDUCATION
+B.Tech Computer Science, CGPA: {6 + (i % 40) / 10}
+
+SKILLS
+Python, SQL, Docker, AWS, Flask, Git
+"""
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure parse + summarize throughput and tail latency')
+    parser.add_argument('--resumes', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--mode', choices=['combined', 'two_step'], default='combined')
+    args = parser.parse_args()
+
+    parser_agent = ParserAgent()
+    summarizer = SummarizerAgent()
+    texts = [make_resume_text(i) for i in range(args.resumes)]
+
+    def process(text: str) -> float:
+        start = time.perf_counter()
+        if args.mode == 'combined':
+            parser_agent.parse_and_summarize(text)
+        else:
+            parsed = parser_agent.parse_resume(text)
+            summarizer.generate_summary(parsed)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        latencies = list(executor.map(process, texts))
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{args.resumes} resumes, concurrency {args.concurrency}, mode {args.mode}")
+    print(f"Throughput: {args.resumes / elapsed * 60:.1f} resumes/min ({elapsed:.2f}s total)")
+    print(f"Latency p50: {percentile(latencies, 50):.3f}s  p95: {percentile(latencies, 95):.3f}s  "
+          f"p99: {percentile(latencies, 99):.3f}s  max: {max(latencies):.3f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Measure how well the BM25 prefilter (utils/retrieval.py) preserves the
+LLM matcher's ranking, and how many scoring calls it saves:
+
+    python -m benchmarks.prefilter_recall --candidates 1000 --k 10 25 50 100
+    python -m benchmarks.prefilter_recall --from-db --job-file job.txt --k 25 50
+
+For each K, recall@K is the share of the full ranking's top --top-n (every
+resume scored by the LLM) that the K-candidate shortlist still contains,
+counting candidates tied with the n-th score as interchangeable; "score
+kept" compares the summed LLM scores of both top --top-n lists. The first
+row's prefilter time includes building the index.
+
+Synthetic runs give every candidate a hidden fit for the job. The resume
+text is generated from it with noise (strong candidates tend to list more
+of the job's skills, some only in prose or under other names, weak ones
+pad with keywords), and a simulated judge scores the hidden fit without
+reading the fields the prefilter ranks on. The numbers therefore depend on
+that noise model; --from-db uses the resumes in the local database and the
+configured LLM client (real calls) and is the figure to trust.
+"""
+import re
+import time
+import random
+import argparse
+from typing import List, Dict, Tuple
+from agents.matcher_agent import MatcherAgent
+from benchmarks.batched_scoring import JOB_DESCRIPTION, SKILL_POOL, SimulatedLLMClient
+from utils.retrieval import ResumePrefilter, parse_weights, recall_at_k, PREFILTER_WEIGHTS
+
+JOB_SKILLS = ['Python', 'Flask', 'Django', 'SQL', 'PostgreSQL', 'Docker', 'AWS', 'GCP', 'Redis', 'Kafka']
+OTHER_SKILLS = [s for s in SKILL_POOL if s not in JOB_SKILLS] + ['Excel', 'Salesforce', 'Figma', 'SAP']
+# How a candidate may describe a skill in prose instead of listing it
+PROSE_NAMES = {'PostgreSQL': 'Postgres', 'AWS': 'Amazon Web Services', 'GCP': 'Google Cloud',
+               'SQL': 'relational databases', 'Kafka': 'event streaming', 'Docker': 'containers'}
+
+def make_judged_candidates(count: int, seed: int = 0) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    Synthetic candidates plus the judge's hidden score for each, keyed by the
+    project number in the candidate's first achievement (it appears in the prompt)
+    """
+    candidates, fits = [], {}
+    for i in range(count):
+        rng = random.Random(seed * 1_000_003 + i)
+        # Few candidates are an excellent fit, as in a real applicant pool
+        quality = rng.random() ** 3
+        fit = 1 + round(9 * quality)
+        relevant = rng.sample(JOB_SKILLS, sum(rng.random() < 0.2 + 0.6 * quality for _ in range(7)))
+        padding = rng.sample(OTHER_SKILLS, rng.randint(0, 4))
+        # Keyword stuffing: some weak candidates list the job's skills anyway
+        if quality < 0.3 and rng.random() < 0.2:
+            padding += rng.sample(JOB_SKILLS, 3)
+        listed = [s for s in relevant if rng.random() < 0.7] + padding
+        in_prose = [PROSE_NAMES.get(s, s) if rng.random() < 0.5 else s for s in relevant if s not in listed]
+        years = max(0, min(15, round(10 * quality) + rng.randint(-3, 3)))
+
+        delivered = rng.choice(['an internal tool', 'a customer feature', 'a data pipeline'])
+        achievements = [f'Project #{i}: delivered {delivered}', f'Reduced costs by {rng.randint(5, 40)}%']
+        summary_skills = ', '.join((listed + in_prose)[:3]) or 'a range of tools'
+        candidates.append({
+            'id': i,
+            'name': f'Candidate {i}',
+            'total_years_experience': years,
+            'skills': sorted(set(listed)),
+            'achievements': achievements,
+            'cgpa': round(rng.uniform(6, 10), 1),
+            'professional_summary': f'Engineer with {years} years of experience working with {summary_skills}.',
+            'content': (f"Candidate {i}\nSKILLS\n{', '.join(listed)}\nEXPERIENCE\n" + '\n'.join(achievements)
+                        + (f"\nAlso worked with {', '.join(in_prose)}." if in_prose else ''))
+        })
+        fits[i] = fit
+    return candidates, fits
+
+class JudgeLLMClient(SimulatedLLMClient):
+    """Simulated matcher LLM that returns each candidate's hidden fit"""
+    def __init__(self, fits: Dict[int, int], **latency):
+        super().__init__(**latency)
+        self.fits = fits
+
+    def _respond(self, prompt: str) -> str:
+        project = re.search(r'Project #(\d+):', prompt)
+        score = self.fits.get(int(project.group(1)), 1) if project else 1
+        return f"{score}: Judged fit for the role."
+
+def add_text(candidates: List[Dict]) -> List[Dict]:
+    """Give synthetic candidates the summary and resume text the prefilter reads"""
+    for c in candidates:
+        skills = ', '.join(c['skills'])
+        others = [s for s in SKILL_POOL if s not in c['skills']][:3]
+        c['professional_summary'] = (f"Engineer with {c['total_years_experience']} years of experience "
+                                     f"working mainly with {skills}.")
+        c['content'] = (f"{c['name']}\nSKILLS\n{skills}\nEXPERIENCE\n"
+                        + '\n'.join(c['achievements'])
+                        + f"\nBuilt internal tools with {skills}; familiar with {', '.join(others)}.")
+    return candidates
+
+def main():
+    parser = argparse.ArgumentParser(description='Recall@K of the BM25 prefilter against full LLM ranking')
+    parser.add_argument('--candidates', type=int, default=1000, help='Number of synthetic candidates')
+    parser.add_argument('--k', type=int, nargs='+', default=[10, 25, 50, 100], help='Shortlist sizes')
+    parser.add_argument('--top-n', type=int, default=5, help='Matches returned to the user')
+    parser.add_argument('--weights', help='Prefilter weights, e.g. "skills=3,summary=1.5,content=1,semantic=1" '
+                             '(semantic only applies with --from-db)')
+    parser.add_argument('--from-db', action='store_true', help='Use the local database and real LLM')
+    parser.add_argument('--job-file', help='Job description text file (default: built-in backend job)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    job_description = JOB_DESCRIPTION
+    if args.job_file:
+        with open(args.job_file, encoding='utf-8') as f:
+            job_description = f.read()
+
+    embeddings = None
+    if args.from_db:
+        from utils.registry import get_db
+        candidates = get_db().get_all_resumes()
+        embeddings = get_db().embeddings
+        matcher = MatcherAgent(max_concurrency=args.concurrency)
+    else:
+        candidates, fits = make_judged_candidates(args.candidates)
+        client = JudgeLLMClient(fits, base_latency=0, per_prompt_token=0, per_output_token=0)
+        # One candidate per prompt, so the judge can find each candidate's fit
+        matcher = MatcherAgent(max_concurrency=args.concurrency, batch_size=1, llm_client=client)
+    if not candidates:
+        parser.error('no resumes to benchmark')
+
+    weights = parse_weights(args.weights) if args.weights else PREFILTER_WEIGHTS
+    prefilter = ResumePrefilter(weights, embeddings=embeddings)
+
+    start = time.perf_counter()
+    full = matcher.rank_candidates(candidates, job_description)
+    full_seconds = time.perf_counter() - start
+    reference = [(c['id'], c['match_score']) for c in full]
+    reference_score = sum(c['match_score'] for c in full[:args.top_n])
+
+    print(f"\n{len(candidates)} candidates, top {args.top_n}, weights {weights}")
+    print(f"full ranking: {len(candidates)} LLM calls, {full_seconds:.2f}s")
+    print(f"{'K':>5} {'llm calls':>10} {'recall@K':>9} {'score kept':>11} {'prefilter ms':>13} {'total s':>8}")
+    for k in args.k:
+        start = time.perf_counter()
+        shortlist = [candidates[i] for i in prefilter.shortlist(candidates, job_description, k)]
+        prefilter_ms = (time.perf_counter() - start) * 1000
+        ranked = matcher.rank_candidates(shortlist, job_description)
+        total = time.perf_counter() - start
+
+        recall = recall_at_k(reference, [c['id'] for c in shortlist], args.top_n)
+        kept = sum(c['match_score'] for c in ranked[:args.top_n]) / reference_score if reference_score else 1.0
+        print(f"{k:>5} {len(shortlist):>10} {recall:>9.2f} {100 * kept:>10.1f}% {prefilter_ms:>13.1f} {total:>8.2f}")
+
+if __name__ == '__main__':
+    main()
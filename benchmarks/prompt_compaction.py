@@ -0,0 +1,141 @@
+"""
+Measure how much section-aware prompt compaction shrinks parser prompts and
+what that does to LLM latency:
+
+    python -m benchmarks.prompt_compaction --resumes 50
+    python -m benchmarks.prompt_compaction --pdf-dir uploads/
+
+Uses a simulated LLM (no network, no API key) whose latency grows with the
+number of prompt and completion tokens, and answers with the same
+deterministic responses as the local stand-in server. Synthetic resumes carry
+the usual noise (preserved whitespace, running headers, page numbers,
+references); --pdf-dir runs real PDFs through the normal extraction instead.
+"""
+import os
+import time
+import argparse
+from typing import List, Dict
+from agents.parser_agent import ParserAgent
+from benchmarks.batched_scoring import SimulatedLLMClient
+from benchmarks.llm_standin_server import fake_completion
+from utils.llm_cache import completion_from_text
+from utils.pdf_utils import extract_text_from_pdf
+
+def make_resume_text(i: int) -> str:
+    header = f"Candidate {i}      |      Curriculum Vitae\n"
+    page_one = f"""{header}
+Candidate {i}
+candidate{i}@example.com   |   +1 555-010-{i % 10000:04d}   |   linkedin.com/in/candidate{i}
+221B Example Street,    Springfield,     12345
+
+
+PROFESSIONAL SUMMARY
+Backend engineer with {3 + i % 9} years of experience building data-heavy Python services.
+
+
+WORK EXPERIENCE
+Senior Software Engineer,    Example Corp        ({2015 + i % 8} - present)
+  -   Built data pipelines in Python and SQL serving {i % 50 + 10} internal teams
+  -   Led migration of legacy services to Docker and AWS, cutting hosting cost by {10 + i % 30}%
+  -   Mentored {2 + i % 5} junior engineers and ran the on-call rotation
+Software Engineer,    Sample Systems        (2012 - 2015)
+  -   Maintained Flask APIs and PostgreSQL schemas for the billing platform
+  -   Introduced CI pipelines with automated tests and code review
+
+Page 1 of 2
+"""
+    page_two = f"""{header}
+PROJECTS
+Realtime metrics dashboard  -  Kafka, Redis, React; used by {i % 20 + 5} teams
+Open-source contributor to a Python task queue library
+
+
+EDUCATION
+B.Tech Computer Science,    State University    (2008 - 2012)
+CGPA: {6 + (i % 40) / 10}
+
+
+SKILLS
+Python, SQL, Docker, AWS, Flask, Git, Kafka, Redis, PostgreSQL
+
+
+ACHIEVEMENTS
+Engineering excellence award {2018 + i % 5}
+Speaker at a regional Python conference
+
+
+HOBBIES
+Running,    chess,    photography
+
+
+REFERENCES
+Available upon request.
+
+DECLARATION
+I hereby declare that the above information is true to the best of my knowledge.
+
+Page 2 of 2
+"""
+    return page_one + page_two + header
+
+class StandinLLMClient(SimulatedLLMClient):
+    """Synchronous simulated client answering like the local stand-in server"""
+    model = 'simulated'
+
+    def _respond(self, prompt: str) -> str:
+        return fake_completion(prompt)
+
+    def get_completion(self, prompt: str, use_cache: bool = True, max_tokens: int = None):
+        content = self._respond(prompt)
+        time.sleep(self._record(prompt, content))
+        return completion_from_text(content)
+
+def run(texts: List[str], compact: bool, latency: Dict[str, float]) -> Dict:
+    parser = ParserAgent(llm_client=StandinLLMClient(**latency), compact_prompts=compact)
+    start = time.perf_counter()
+    for text in texts:
+        parser.parse_and_summarize(text)
+    elapsed = time.perf_counter() - start
+
+    stats = parser.prompt_stats()
+    stats['ms_per_resume'] = elapsed * 1000 / len(texts)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark prompt compaction for resume parsing')
+    parser.add_argument('--resumes', type=int, default=50, help='Number of synthetic resumes')
+    parser.add_argument('--pdf-dir', help='Use the PDFs in this directory instead of synthetic resumes')
+    parser.add_argument('--base-latency', type=float, default=0.05,
+                        help='Fixed seconds per request (network + queueing)')
+    parser.add_argument('--per-prompt-token', type=float, default=0.0002,
+                        help='Seconds per prompt token (prefill)')
+    parser.add_argument('--per-output-token', type=float, default=0.001,
+                        help='Seconds per generated token (decode)')
+    args = parser.parse_args()
+
+    if args.pdf_dir:
+        paths = sorted(os.path.join(args.pdf_dir, f) for f in os.listdir(args.pdf_dir)
+                       if f.lower().endswith('.pdf'))
+        texts = [text for text in (extract_text_from_pdf(path) for path in paths) if text]
+    else:
+        texts = [make_resume_text(i) for i in range(args.resumes)]
+    if not texts:
+        parser.error('no resumes to benchmark')
+
+    latency = {'base_latency': args.base_latency, 'per_prompt_token': args.per_prompt_token,
+               'per_output_token': args.per_output_token}
+    results = [run(texts, False, latency), run(texts, True, latency)]
+
+    print(f"\n{len(texts)} resumes")
+    print(f"{'compaction':>10} {'calls':>6} {'raw tok':>8} {'resume tok':>11} {'reduction':>10} "
+          f"{'prompt tok':>11} {'llm ms/call':>12} {'ms/resume':>10}")
+    for r in results:
+        print(f"{str(r['compaction']):>10} {r['calls']:>6} {r['avg_raw_tokens']:>8.0f} "
+              f"{r['avg_resume_tokens']:>11.0f} {r['resume_token_reduction_pct']:>9.1f}% "
+              f"{r['avg_prompt_tokens']:>11.0f} {r['avg_latency_ms']:>12.1f} {r['ms_per_resume']:>10.1f}")
+    baseline, compacted = results
+    print(f"Prompt tokens: {100 * (compacted['avg_prompt_tokens'] / baseline['avg_prompt_tokens'] - 1):+.1f}% per call")
+    print(f"Latency change: {100 * (compacted['ms_per_resume'] / baseline['ms_per_resume'] - 1):+.1f}% per resume")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+from utils.fast_extract import FAST_PATH_THRESHOLD, extract_fields
+from utils.skill_matcher import SkillMatcher
+from utils.text_sections import segment_sections
+
+matcher = SkillMatcher()
+
+def fields(text):
+    return extract_fields(text, segment_sections(text), matcher)
+
+def test_job_title_on_first_line_is_left_to_the_llm():
+    name, confidence = fields('Software Engineer\nhiring@example.com\nSkills: Python, SQL, Docker')['name']
+    assert name == 'Software Engineer'
+    assert confidence < FAST_PATH_THRESHOLD
+
+def test_name_confirmed_by_email_or_label():
+    name, confidence = fields('Jane Doe\njane.doe@example.com\nSkills: Python, SQL, Docker')['name']
+    assert (name, confidence >= FAST_PATH_THRESHOLD) == ('Jane Doe', True)
+    name, confidence = fields('Senior Developer\nName: Ravi Kumar\nrk@example.com')['name']
+    assert (name, confidence >= FAST_PATH_THRESHOLD) == ('Ravi Kumar', True)
+
+def test_skills_outside_the_taxonomy_go_to_the_llm():
+    skills, confidence = fields('Jane Doe\nSkills: Python, SQL, Docker, SAP HANA, Salesforce')['skills']
+    assert confidence < FAST_PATH_THRESHOLD
+    skills, confidence = fields('Jane Doe\nSkills\nLanguages: Python, Go\nTools: Docker, SQL')['skills']
+    assert skills == ['Python', 'Go', 'Docker', 'SQL'] and confidence >= FAST_PATH_THRESHOLD
+
+def test_short_aliases_only_match_in_the_skills_section():
+    text = ('Jane Doe\nSkills: Python, SQL, Docker\nExperience\n'
+            'Led the Go to market plan for R&D with C. Smith, using Rust')
+    skills, _ = fields(text)['skills']
+    assert skills == ['Python', 'SQL', 'Docker', 'Rust']
@@ -0,0 +1,47 @@
+import asyncio
+from utils.llm_cache import LLMResponseCache, completion_from_text
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / 'cache.db'), max_mb=250 / (1024 * 1024))
+    cache.set('a', 'm', 'x' * 100)
+    cache.set('b', 'm', 'y' * 100)
+    cache.set('a', 'm', 'z' * 100)  # replacing an entry must not count it twice
+    assert cache.get('a') == 'z' * 100 and cache.get('b') == 'y' * 100
+
+    cache.set('c', 'm', 'w' * 100)
+
+    assert cache.get('a') is None
+    assert cache.get('c') == 'w' * 100
+    assert cache.stats()['bytes'] == cache._total_size == 200
+
+def test_running_size_survives_reopen(tmp_path):
+    LLMResponseCache(str(tmp_path / 'cache.db')).set('a', 'm', 'x' * 100)
+
+    assert LLMResponseCache(str(tmp_path / 'cache.db'))._total_size == 100
+
+class EchoTransport:
+    name = 'echo'
+
+    def __init__(self):
+        self.calls = 0
+
+    async def acreate(self, model, messages, temperature, max_tokens):
+        self.calls += 1
+        return completion_from_text(messages[0]['content'].upper())
+
+def test_async_completions_are_cached(tmp_path):
+    from utils.llm_client import AsyncTogetherLLMClient
+
+    transport = EchoTransport()
+    client = AsyncTogetherLLMClient(transport=transport)
+    client.cache = LLMResponseCache(str(tmp_path / 'cache.db'))
+
+    async def complete_twice():
+        first = await client.get_completion_async('score me')
+        second = await client.get_completion_async('score me')
+        return first, second
+
+    first, second = asyncio.run(complete_twice())
+
+    assert first.choices[0].message.content == second.choices[0].message.content == 'SCORE ME'
+    assert transport.calls == 1 and getattr(second, 'cached', False)
@@ -0,0 +1,29 @@
+import sys
+import types
+import asyncio
+from utils.llm_transport import TogetherTransport
+
+class FakeAsyncTogether:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+def test_async_client_per_event_loop_is_closed(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'together', types.SimpleNamespace(
+        Together=lambda: None, AsyncTogether=FakeAsyncTogether
+    ))
+    monkeypatch.setenv('TOGETHER_API_KEY', 'test')
+    transport = TogetherTransport()
+
+    async def use_client():
+        client = transport._get_async_client()
+        assert transport._get_async_client() is client
+        await transport.aclose()
+        return client
+
+    first, second = asyncio.run(use_client()), asyncio.run(use_client())
+
+    assert first is not second and first.closed and second.closed
+    assert not transport._async_clients
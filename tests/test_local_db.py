@@ -0,0 +1,12 @@
+from utils.local_db import LocalDB
+
+def test_delete_all_resumes_clears_ingest_checkpoints(tmp_path):
+    db = LocalDB(str(tmp_path / 'resumes.db'))
+    resume_id = db.save_resume({'filename': 'a.pdf', 'content': 'Backend engineer', 'name': 'A',
+                                'summary': 'Backend engineer', 'skills': ['Python'], 'experience': 5})
+    db.save_ingest_checkpoint('uploads/a.pdf', 'abc', 'done', resume_id=resume_id)
+
+    db.delete_all_resumes()
+
+    assert db.get_all_resumes() == []
+    assert db.get_ingest_checkpoints() == {}
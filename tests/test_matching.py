@@ -0,0 +1,38 @@
+from agents.matcher_agent import MatcherAgent
+from utils.llm_cache import completion_from_text
+from utils.local_db import LocalDB
+
+class RecordingLLMClient:
+    """Answers every scoring prompt with 8 and keeps the prompts"""
+    model = 'test'
+
+    def __init__(self):
+        self.prompts = []
+        self.closed = 0
+
+    async def get_completion_async(self, prompt, use_cache=True, max_tokens=None):
+        self.prompts.append(prompt)
+        return completion_from_text('8: Strong backend profile.')
+
+    async def aclose(self):
+        self.closed += 1
+
+def test_min_years_uses_stored_experience(tmp_path):
+    db = LocalDB(str(tmp_path / 'resumes.db'))
+    db.save_resume({'filename': 'a.pdf', 'content': 'Backend engineer', 'name': 'A',
+                    'summary': 'Backend engineer', 'skills': ['Python'], 'experience': 5})
+    client = RecordingLLMClient()
+    matcher = MatcherAgent(llm_client=client)
+
+    ranked = matcher.rank_candidates(db.get_all_resumes(), 'Python backend engineer', min_years=2)
+
+    assert ranked[0]['match_score'] == 8
+    assert 'Experience: 5 years' in client.prompts[0]
+
+def test_rank_candidates_closes_client_for_its_event_loop():
+    client = RecordingLLMClient()
+    resumes = [{'id': 1, 'skills': ['Python'], 'total_years_experience': 3}]
+
+    MatcherAgent(llm_client=client).rank_candidates(resumes, 'Python engineer')
+
+    assert client.closed == 1
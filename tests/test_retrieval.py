@@ -0,0 +1,43 @@
+from utils.retrieval import ResumePrefilter
+
+def make_resumes(start, count):
+    return [{'id': i, 'skills': ['Python', 'SQL'] if i % 2 else ['Java'],
+             'summary': f'Engineer {i}', 'content': f'Built services in Python, resume {i}'}
+            for i in range(start, start + count)]
+
+class InterleavingMatcher:
+    """Skill matcher that runs another request's scoring mid-way, like a thread switch would"""
+    def __init__(self, matcher, interleave):
+        self.matcher = matcher
+        self.interleave = interleave
+
+    def canonical(self, skill):
+        return self.matcher.canonical(skill)
+
+    def find(self, text):
+        interleave, self.interleave = self.interleave, None
+        if interleave:
+            interleave()
+        return self.matcher.find(text)
+
+def test_shortlist_survives_concurrent_build_for_other_resumes():
+    prefilter = ResumePrefilter()
+    first, second = make_resumes(1, 40), make_resumes(100, 75)
+    prefilter.skill_matcher = InterleavingMatcher(
+        prefilter.skill_matcher, lambda: prefilter.shortlist(second, 'Java developer', 10)
+    )
+
+    shortlist = prefilter.shortlist(first, 'Python developer with SQL', 10)
+
+    assert len(shortlist) == 10 and max(shortlist) < len(first)
+
+def test_shortlist_breaks_ties_by_input_order():
+    prefilter = ResumePrefilter()
+    # Three distinct profiles in a scrambled order, so many resumes tie at the cut-off
+    profiles = [['Python', 'SQL'], ['Python'], ['Java']]
+    resumes = [{'id': i, 'skills': profiles[i * 7 % 11 % 3], 'summary': 'Engineer', 'content': 'Services'}
+               for i in range(500)]
+    scores = prefilter.scores(resumes, 'Python developer with SQL')
+    expected = sorted(range(len(resumes)), key=lambda i: -scores[i])[:50]
+
+    assert prefilter.shortlist(resumes, 'Python developer with SQL', 50) == expected
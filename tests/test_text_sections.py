@@ -0,0 +1,24 @@
+from utils.text_sections import build_prompt_text, segment_sections
+
+RESUME = """John Smith
+john.smith@example.com
+TECHNICAL SKILLS
+Languages: Python, Java, C++
+Frameworks: Django, Flask
+Tools: Docker, Git
+EXPERIENCE
+Backend Engineer, Example Corp (2019 - present)"""
+
+def test_sub_labelled_skills_block_stays_in_skills():
+    sections = segment_sections(RESUME)
+
+    assert sections['skills'] == 'Languages: Python, Java, C++\nFrameworks: Django, Flask\nTools: Docker, Git'
+    assert sections['experience'] == 'Backend Engineer, Example Corp (2019 - present)'
+    assert 'other' not in sections
+    assert 'Frameworks: Django, Flask' in build_prompt_text(sections, ['skills'])
+
+def test_inline_heading_still_starts_a_section():
+    sections = segment_sections('Jane Doe\nSummary: Backend engineer\nSkills: Python, SQL')
+
+    assert sections['summary'] == 'Backend engineer'
+    assert sections['skills'] == 'Python, SQL'
@@ -0,0 +1,184 @@
+"""
+Persistent embedding index for semantic matching. Every resume is encoded
+once at ingest by a local feature-hashing encoder into a fixed-width float32
+vector, stored in a flat file that is memory-mapped for queries. Row i holds
+resume id base_id + i; base_id and deleted ids live in a small JSON sidecar.
+A query is one matrix-vector product plus argpartition for the top K.
+"""
+import os
+import json
+import hashlib
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from utils.retrieval import tokenize
+from utils.registry import get_skill_matcher
+
+EMBEDDING_INDEX = os.getenv('EMBEDDING_INDEX', 'true').lower() in ('1', 'true', 'yes')
+EMBEDDING_DIM = int(os.getenv('EMBEDDING_DIM', 256))
+# Canonical skills count this many times as much as a word of free text
+SKILL_FEATURE_WEIGHT = 3.0
+
+@lru_cache(maxsize=200000)
+def _slot(feature: str, dim: int) -> Tuple[int, float]:
+    """Stable (bucket, sign) for a feature; Python's hash() is salted per process"""
+    digest = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+    return digest % dim, 1.0 if digest >> 63 else -1.0
+
+class HashingEncoder:
+    """
+    Signed feature hashing of words, word bigrams and canonical skills, with
+    log-scaled counts and L2 normalization, so dot products are cosine
+    similarities. Needs no training, so vectors never go stale.
+    """
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f'hashing-v1-{dim}'
+
+    def encode(self, text: str, skills: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Vector for text; skills defaults to the taxonomy skills found in text"""
+        if skills is None:
+            skills = get_skill_matcher().find(text or '')
+        words = tokenize(text)
+        features = words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+        skill_features = [f'skill:{str(skill).lower()}' for skill in skills]
+
+        slots = [_slot(feature, self.dim) for feature in features + skill_features]
+        if not slots:
+            return np.zeros(self.dim, dtype=np.float32)
+        index = np.fromiter((s[0] for s in slots), dtype=np.int64, count=len(slots))
+        weights = np.fromiter((s[1] for s in slots), dtype=np.float64, count=len(slots))
+        weights[len(features):] *= SKILL_FEATURE_WEIGHT
+        vector = np.bincount(index, weights=weights, minlength=self.dim)
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).astype(np.float32)
+
+class EmbeddingIndex:
+    def __init__(self, path: str, encoder: Optional[HashingEncoder] = None):
+        self.path = path
+        self.meta_path = path + '.json'
+        self.encoder = encoder or HashingEncoder()
+        self.dim = self.encoder.dim
+        self._row_bytes = self.dim * 4
+        self._lock = threading.Lock()
+        self._state = None
+        self._view = (None, None, np.zeros(0, dtype=np.int64))
+        if self._read_meta().get('encoder') != self.encoder.name or not os.path.exists(self.path):
+            # New index, or vectors from a different encoder: start over (LocalDB backfills)
+            self.truncate()
+
+    def _read_meta(self) -> Dict:
+        try:
+            with open(self.meta_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, meta: Dict):
+        tmp = f'{self.meta_path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp, self.meta_path)
+
+    @property
+    def rows(self) -> int:
+        try:
+            return os.path.getsize(self.path) // self._row_bytes
+        except OSError:
+            return 0
+
+    def encode(self, text: str, skills: Optional[Iterable[str]] = None) -> np.ndarray:
+        return self.encoder.encode(text, skills)
+
+    def write(self, ids: Sequence[int], vectors: np.ndarray):
+        """
+        Store vectors for resume ids (normally fresh, increasing ids, so this
+        appends). Call while holding the database write lock, which is what
+        serializes writers across processes.
+        """
+        if not len(ids):
+            return
+        meta = self._read_meta()
+        base = meta.get('base_id')
+        if base is None:
+            base = meta['base_id'] = int(min(ids))
+        deleted = set(meta.get('deleted', []))
+        rows = self.rows
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+
+        with open(self.path, 'r+b') as f:
+            if list(ids) == list(range(ids[0], ids[0] + len(ids))) and ids[0] >= base:
+                f.seek((ids[0] - base) * self._row_bytes)
+                f.write(vectors.tobytes())
+            else:
+                for resume_id, vector in zip(ids, vectors):
+                    if resume_id < base:
+                        print(f"[DEBUG] Embedding for resume {resume_id} predates the index base, skipped")
+                        continue
+                    f.seek((resume_id - base) * self._row_bytes)
+                    f.write(vector.tobytes())
+
+        # Rows skipped over stay zero-filled; mark them so they are never returned
+        written = set(int(i) for i in ids)
+        gap = set(range(base + rows, max(written) + 1)) - written
+        if gap or deleted & written:
+            meta['deleted'] = sorted((deleted | gap) - written)
+        self._write_meta(meta)
+
+    def truncate(self):
+        """
+        Drop every vector. The empty file replaces the old one atomically, so
+        other processes' existing mappings stay valid until they remap.
+        """
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        open(tmp, 'wb').close()
+        os.replace(tmp, self.path)
+        self._write_meta({'encoder': self.encoder.name, 'dim': self.dim, 'base_id': None, 'deleted': []})
+
+    def _matrix(self):
+        """(memmap, base_id, deleted rows), remapped when another writer changed the files"""
+        try:
+            stat = os.stat(self.path)
+            meta_stat = os.stat(self.meta_path)
+            state = (stat.st_ino, stat.st_size, meta_stat.st_ino, meta_stat.st_mtime_ns)
+        except OSError:
+            return None, None, np.zeros(0, dtype=np.int64)
+        with self._lock:
+            if state != self._state:
+                meta = self._read_meta()
+                rows = stat.st_size // self._row_bytes
+                base = meta.get('base_id')
+                matrix = None
+                if rows and base is not None:
+                    matrix = np.memmap(self.path, dtype=np.float32, mode='r', shape=(rows, self.dim))
+                deleted = np.asarray(meta.get('deleted', []), dtype=np.int64) - (base or 0)
+                deleted = deleted[(deleted >= 0) & (deleted < rows)]
+                self._view = (matrix, base, deleted)
+                self._state = state
+            return self._view
+
+    def search(self, text: str, k: int = 10) -> List[Tuple[int, float]]:
+        """[(resume id, cosine similarity)] of the k nearest resumes, best first"""
+        matrix, base, deleted = self._matrix()
+        if matrix is None or k <= 0:
+            return []
+        scores = matrix @ self.encode(text)
+        scores[deleted] = -np.inf
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(base + int(row), float(scores[row])) for row in top if np.isfinite(scores[row])]
+
+    def similarity(self, ids: Sequence[int], query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of query to each given resume id (0 for ids without a vector)"""
+        matrix, base, deleted = self._matrix()
+        result = np.zeros(len(ids), dtype=np.float32)
+        if matrix is None or not len(ids):
+            return result
+        rows = np.asarray(ids, dtype=np.int64) - base
+        valid = (rows >= 0) & (rows < len(matrix))
+        valid[valid] &= ~np.isin(rows[valid], deleted)
+        result[valid] = matrix[rows[valid]] @ query
+        return result
@@ -0,0 +1,158 @@
+"""
+Deterministic fast path for resume fields. Every field comes back with a
+confidence in [0, 1]; ParserAgent only asks the LLM for fields below
+FAST_PATH_THRESHOLD, so a well-structured resume needs few or no LLM fields.
+"""
+import os
+import re
+import datetime
+from typing import Any, Dict, List, Tuple
+
+FAST_PATH = os.getenv('FAST_PATH', 'true').lower() in ('1', 'true', 'yes')
+FAST_PATH_THRESHOLD = float(os.getenv('FAST_PATH_THRESHOLD', 0.8))
+
+EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+PHONE_RE = re.compile(r'(?<![\w+])\+?\d[\d\s().-]{8,}\d(?!\w)')
+YEARS_RE = re.compile(r'(\d+)\+?\s*(?:years?|yrs?)', re.IGNORECASE)
+YEARS_OF_EXPERIENCE_RE = re.compile(
+    r'(\d{1,2})\+?\s*(?:years?|yrs?)\s+(?:of\s+)?(?:\w+\s+){0,2}experience', re.IGNORECASE
+)
+CGPA_RE = re.compile(
+    r'\b(?:C?GPA|CPI)\b\s*(?:of\s*)?[:\-]?\s*(\d{1,2}(?:\.\d{1,2})?)(?:\s*/\s*(\d{1,2}(?:\.\d+)?))?',
+    re.IGNORECASE
+)
+DATE_RANGE_RE = re.compile(
+    r'(?:[A-Za-z]{3,9}\.?\s+)?((?:19|20)\d{2})\s*(?:-|–|—|to)\s*'
+    r'(?:[A-Za-z]{3,9}\.?\s+)?((?:19|20)\d{2}|present|current|now|date|ongoing)',
+    re.IGNORECASE
+)
+NAME_RE = re.compile(r"^[A-Z][A-Za-z.'-]+(?:\s+[A-Z][A-Za-z.'-]*){1,3}$")
+NAME_LABEL_RE = re.compile(r'^\s*(?:full\s+)?name\s*[:\-]\s*(.+?)\s*$', re.IGNORECASE | re.MULTILINE)
+# Separators between entries of a skills list ("Languages: Python, Go | SQL")
+SKILL_ITEM_RE = re.compile(r'[,;|•·\n]')
+BULLET_RE = re.compile(r'^\s*(?:[-*•▪◦●○■►✓]|\d+[.)])\s*')
+
+def _matches_email(name: str, email: str) -> bool:
+    """Whether the first or last name appears in the email's local part (john.smith@, jsmith@)"""
+    local = re.sub(r'[^a-z]', '', email.split('@')[0].lower())
+    parts = [re.sub(r'[^a-z]', '', part) for part in name.lower().split()]
+    return any(len(part) >= 3 and part in local for part in (parts[0], parts[-1]))
+
+def _extract_name(header: str, email: str = '') -> Tuple[str, float]:
+    label = NAME_LABEL_RE.search(header)
+    if label and NAME_RE.match(label.group(1)):
+        return label.group(1), 0.9
+
+    for i, line in enumerate(header.split('\n')[:4]):
+        for part in line.split('|'):
+            part = part.strip()
+            lowered = part.lower()
+            if not part or 'resume' in lowered or 'curriculum vitae' in lowered:
+                continue
+            if NAME_RE.match(part):
+                if email and _matches_email(part, email):
+                    return part, 0.9
+                # A capitalised first line is usually the name, but could as well be
+                # a job title ("Software Engineer"), so let the LLM confirm it
+                return part, 0.7 if i == 0 else 0.6
+    return '', 0.0
+
+def _extract_phone(text: str) -> Tuple[str, float]:
+    for match in PHONE_RE.finditer(text):
+        digits = re.sub(r'\D', '', match.group())
+        if 10 <= len(digits) <= 13:
+            return match.group().strip(), 0.9
+    return '', 0.0
+
+def _extract_cgpa(text: str) -> Tuple[float, float]:
+    values = []
+    for match in CGPA_RE.finditer(text):
+        value = float(match.group(1))
+        scale = float(match.group(2)) if match.group(2) else None
+        if scale is not None and (scale <= 0 or value > scale):
+            continue
+        if value <= 10 and value not in values:
+            values.append(value)
+    if not values:
+        return 0.0, 0.0
+    # Several different GPAs (school, college, ...) need a judgement call
+    return values[0], 0.9 if len(values) == 1 else 0.5
+
+def _extract_years(sections: Dict[str, str]) -> Tuple[int, float]:
+    for section in ('summary', 'header', 'experience'):
+        match = YEARS_OF_EXPERIENCE_RE.search(sections.get(section, ''))
+        if match:
+            return int(match.group(1)), 0.9
+
+    experience = sections.get('experience', '')
+    current_year = datetime.date.today().year
+    spans = []
+    for match in DATE_RANGE_RE.finditer(experience):
+        start = int(match.group(1))
+        end = current_year if not match.group(2).isdigit() else int(match.group(2))
+        if start <= end <= current_year:
+            spans.append((start, end))
+    if not spans:
+        return 0, 0.0
+
+    # Merge overlapping roles so concurrent positions are not double counted
+    spans.sort()
+    total = 0
+    current_start, current_end = spans[0]
+    for start, end in spans[1:]:
+        if start <= current_end:
+            current_end = max(current_end, end)
+        else:
+            total += current_end - current_start
+            current_start, current_end = start, end
+    total += current_end - current_start
+    return total, 0.8
+
+def _covered_by_taxonomy(skills_text: str, skill_matcher) -> bool:
+    """Whether every entry of a skills list names a taxonomy skill"""
+    items = [BULLET_RE.sub('', item).strip() for item in SKILL_ITEM_RE.split(skills_text)]
+    items = [item.split(':', 1)[-1].strip() for item in items]
+    items = [item for item in items if item]
+    return bool(items) and all(skill_matcher.find(item) for item in items)
+
+def _extract_skills(sections: Dict[str, str], skill_matcher) -> Tuple[List[str], float]:
+    skills_text = sections.get('skills', '')
+    listed = skill_matcher.find(skills_text)
+    # One- and two-letter aliases (R, C, Go) only count inside a skills list;
+    # in prose they are usually words ("Go to market", "R&D", "C. Smith")
+    mentioned = skill_matcher.find('\n'.join(
+        sections.get(section, '') for section in ('experience', 'projects', 'summary')
+    ), short_aliases=False)
+    skills = listed + [skill for skill in mentioned if skill not in listed]
+    # Entries the taxonomy doesn't know (SAP HANA, Salesforce) would be dropped
+    if len(listed) >= 3 and _covered_by_taxonomy(skills_text, skill_matcher):
+        return skills, 0.9
+    if not skills:
+        # Fall back to scanning everything, but let the LLM confirm
+        skills = skill_matcher.find('\n'.join(sections.values()), short_aliases=False)
+    return skills, 0.5 if skills else 0.0
+
+def _extract_achievements(sections: Dict[str, str]) -> Tuple[List[str], float]:
+    lines = [BULLET_RE.sub('', line).strip() for line in sections.get('achievements', '').split('\n')]
+    achievements = [line for line in lines if len(line) > 3]
+    return achievements, 0.85 if achievements else 0.0
+
+def extract_fields(text: str, sections: Dict[str, str], skill_matcher) -> Dict[str, Tuple[Any, float]]:
+    """{field: (value, confidence)} for every profile field except the summary"""
+    header = sections.get('header', '')
+    email = EMAIL_RE.search(header) or EMAIL_RE.search(text)
+    email = email.group() if email else ''
+    phone, phone_confidence = _extract_phone(header)
+    if not phone:
+        phone, phone_confidence = _extract_phone(text)
+        phone_confidence = min(phone_confidence, 0.7)
+
+    return {
+        'name': _extract_name(header, email),
+        'email': (email, 0.95) if email else ('', 0.0),
+        'phone': (phone, phone_confidence),
+        'total_years_experience': _extract_years(sections),
+        'skills': _extract_skills(sections, skill_matcher),
+        'achievements': _extract_achievements(sections),
+        'cgpa': _extract_cgpa(sections.get('education', '') or text)
+    }
@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional
+
+# Cache settings; set LLM_CACHE=false to disable caching entirely
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE', 'true').lower() in ('1', 'true', 'yes')
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))
+LLM_CACHE_MAX_MB = float(os.getenv('LLM_CACHE_MAX_MB', '100'))
+
+def completion_from_text(content: str, **extra) -> SimpleNamespace:
+    """
+    Build an object shaped like a chat completion response
+    (response.choices[0].message.content) so callers can't tell the difference
+    """
+    message = SimpleNamespace(role='assistant', content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], **extra)
+
+class LLMResponseCache:
+    """
+    Persistent prompt → response cache stored in its own SQLite file.
+    Entries expire after a TTL and the least recently used entries are
+    evicted once the total response size exceeds the configured cap.
+    """
+    def __init__(self, db_file: Optional[str] = None, ttl_seconds: Optional[int] = None,
+                 max_mb: Optional[float] = None):
+        if db_file is None:
+            db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database')
+            if not os.path.exists(db_path):
+                os.makedirs(db_path)
+            db_file = os.path.join(db_path, 'llm_cache.db')
+
+        self.db_file = db_file
+        self.ttl_seconds = LLM_CACHE_TTL if ttl_seconds is None else ttl_seconds
+        self.max_bytes = int((LLM_CACHE_MAX_MB if max_mb is None else max_mb) * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        # One connection per cache, shared by every thread (and the async
+        # scorers' worker threads) under the lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+        self._init_db()
+
+    def _init_db(self):
+        cursor = self._conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_llm_responses_last_accessed ON llm_responses (last_accessed)')
+        self._conn.commit()
+        # Running total of response sizes, so writes don't scan the table
+        self._total_size = self._table_size()
+
+    def _table_size(self) -> int:
+        return self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM llm_responses').fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, params: Dict[str, Any], messages: List[Dict[str, str]]) -> str:
+        """Key on model, sampling parameters and a hash of the prompt messages"""
+        payload = json.dumps({'model': model, 'params': params, 'messages': messages}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """Return the cached response text, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute('SELECT response, created_at, size FROM llm_responses WHERE cache_key = ?', (cache_key,))
+            row = cursor.fetchone()
+
+            if row and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                cursor.execute('DELETE FROM llm_responses WHERE cache_key = ?', (cache_key,))
+                self._conn.commit()
+                self._total_size -= row[2]
+                row = None
+            elif row:
+                cursor.execute('UPDATE llm_responses SET last_accessed = ? WHERE cache_key = ?', (now, cache_key))
+                self._conn.commit()
+
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if row else None
+
+    def set(self, cache_key: str, model: str, response: str):
+        """Store a response and evict least recently used entries over the size cap"""
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            cursor = self._conn.cursor()
+            replaced = cursor.execute('SELECT size FROM llm_responses WHERE cache_key = ?', (cache_key,)).fetchone()
+            cursor.execute('''
+                INSERT OR REPLACE INTO llm_responses (cache_key, model, response, size, created_at, last_accessed)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (cache_key, model, response, size, now, now))
+            self._total_size += size - (replaced[0] if replaced else 0)
+
+            if self._total_size > self.max_bytes:
+                # Other processes write to the same file; recount before evicting
+                total_size = self._table_size()
+                evict = []
+                if total_size > self.max_bytes:
+                    cursor.execute('SELECT cache_key, size FROM llm_responses ORDER BY last_accessed ASC')
+                    for key, entry_size in cursor.fetchall():
+                        if total_size <= self.max_bytes:
+                            break
+                        evict.append((key,))
+                        total_size -= entry_size
+                    cursor.executemany('DELETE FROM llm_responses WHERE cache_key = ?', evict)
+                    print(f"[DEBUG] LLM cache evicted {len(evict)} entries")
+                self._total_size = total_size
+
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM llm_responses')
+            self._conn.commit()
+            self._total_size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus the current size of the cache"""
+        with self._lock:
+            entries, total_size = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses'
+            ).fetchone()
+
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': entries,
+            'bytes': total_size
+        }
@@ -1,58 +1,119 @@
-import os
-from together import Together
-from typing import Dict, Any
+import time
+import asyncio
+from typing import Dict, Any, Optional
+from utils.llm_cache import LLMResponseCache, LLM_CACHE_ENABLED, completion_from_text
+from utils.llm_transport import get_transport
+from utils.rate_limiter import (
+    get_rate_limiter, estimate_tokens, error_status, retry_after, is_retryable,
+    backoff_delay, LLM_MAX_RETRIES
+)
 
 class TogetherLLMClient:
-    def __init__(self):
+    def __init__(self, transport=None):
         print("[DEBUG] Initializing TogetherLLMClient")
-        api_key = os.getenv('TOGETHER_API_KEY')
-        print(f"[DEBUG] API key found: {bool(api_key)}")
-        
-        if not api_key:
-            print("[DEBUG] ERROR: TOGETHER_API_KEY environment variable not set")
-            raise ValueError("TOGETHER_API_KEY environment variable not set")
-        
         try:
-            print("[DEBUG] Setting up Together client")
-            os.environ['TOGETHER_API_KEY'] = api_key
-            self.client = Together()
+            # Together API by default; LLM_BACKEND selects record/replay/local instead
+            self.transport = transport or get_transport()
             self.model = "meta-llama/Llama-3.3-70B-Instruct-Turbo-Free"
-            print(f"[DEBUG] Together client initialized with model: {self.model}")
+            self.temperature = 0.7
+            self.max_tokens = 500
+            print(f"[DEBUG] {self.transport.name} transport initialized with model: {self.model}")
         except Exception as e:
-            print(f"[DEBUG] Error initializing Together client: {str(e)}")
+            print(f"[DEBUG] Error initializing LLM transport: {str(e)}")
             raise
         
-    def _make_request(self, messages: list) -> Dict[str, Any]:
-        try:
-            print("\n[DEBUG] ===== Making Together API Request =====")
-            print(f"[DEBUG] Messages: {messages}")
-            
-            print("\n[DEBUG] ----- API Call Details -----")
-            print(f"[DEBUG] Model: {self.model}")
-            print(f"[DEBUG] Temperature: 0.7")
-            print(f"[DEBUG] Max tokens: 500")
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=500
-            )
-            
-            print("\n[DEBUG] ----- Raw API Response -----")
-            print(f"[DEBUG] Response type: {type(response)}")
-            print(f"[DEBUG] Response dir: {dir(response)}")
-            print(f"[DEBUG] Response repr: {repr(response)}")
-            
-            # Do NOT convert response to list or check for iterability; always return the raw response object
-            return response
+        self.cache = LLMResponseCache() if LLM_CACHE_ENABLED else None
+        self.rate_limiter = get_rate_limiter()
+        
+    def _retry_delay(self, attempt: int, error: Exception) -> Optional[float]:
+        """
+        Seconds to wait before retrying a failed request, or None if the
+        error is not retryable or retries are exhausted
+        """
+        if attempt >= LLM_MAX_RETRIES or not is_retryable(error):
+            return None
+        
+        status = error_status(error)
+        self.rate_limiter.record_retry(status)
+        delay = backoff_delay(attempt, error)
+        if retry_after(error) is not None:
+            # The provider told us when to come back; hold back every caller
+            self.rate_limiter.pause(delay)
+        print(f"[DEBUG] Retryable error (status {status}), retry {attempt + 1}/{LLM_MAX_RETRIES} in {delay:.1f}s")
+        return delay
+    
+    def _make_request(self, messages: list, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        max_tokens = max_tokens or self.max_tokens
+        tokens = estimate_tokens(messages, max_tokens)
+        attempt = 0
+        while True:
+            waited = self.rate_limiter.acquire(tokens)
+            if waited > 0.01:
+                print(f"[DEBUG] Rate limiter delayed request by {waited:.2f}s")
             
-        except Exception as e:
-            print(f"\n[DEBUG] !!!!! API REQUEST ERROR: {str(e)}")
-            print(f"[DEBUG] Error type: {type(e)}")
-            raise
+            try:
+                print(f"\n[DEBUG] ===== Making {self.transport.name} LLM Request =====")
+                print(f"[DEBUG] Messages: {messages}")
+                
+                print("\n[DEBUG] ----- API Call Details -----")
+                print(f"[DEBUG] Model: {self.model}")
+                print(f"[DEBUG] Temperature: {self.temperature}")
+                print(f"[DEBUG] Max tokens: {max_tokens}")
+                
+                response = self.transport.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=max_tokens
+                )
+                
+                print("\n[DEBUG] ----- Raw API Response -----")
+                print(f"[DEBUG] Response type: {type(response)}")
+                print(f"[DEBUG] Response dir: {dir(response)}")
+                print(f"[DEBUG] Response repr: {repr(response)}")
+                
+                # Do NOT convert response to list or check for iterability; always return the raw response object
+                return response
+                
+            except Exception as e:
+                print(f"\n[DEBUG] !!!!! API REQUEST ERROR: {str(e)}")
+                print(f"[DEBUG] Error type: {type(e)}")
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
 
-    def get_completion(self, prompt: str):
+    def _cache_key(self, messages: list, max_tokens: Optional[int] = None) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return self.cache.make_key(
+            self.model, {'temperature': self.temperature, 'max_tokens': max_tokens or self.max_tokens}, messages
+        )
+    
+    def _cached_completion(self, cache_key: Optional[str]):
+        if cache_key is None:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return None
+        print(f"[DEBUG] LLM cache hit ({self.cache.hits} hits / {self.cache.misses} misses)")
+        return completion_from_text(cached, cached=True)
+    
+    def _store_in_cache(self, cache_key: Optional[str], response):
+        if cache_key is None or not hasattr(response, 'choices') or len(response.choices) == 0:
+            return
+        content = getattr(response.choices[0].message, 'content', None)
+        if content:
+            self.cache.set(cache_key, self.model, content)
+    
+    def get_completion(self, prompt: str, use_cache: bool = True, max_tokens: Optional[int] = None):
+        """
+        Get a chat completion for a single user prompt. Identical requests are
+        served from the persistent response cache; pass use_cache=False to
+        always call the API (the fresh response still refreshes the cache).
+        max_tokens overrides the default completion budget for this call.
+        """
         try:
             print("\n[DEBUG] ===== Starting get_completion =====")
             print(f"[DEBUG] Prompt length: {len(prompt)}")
@@ -61,8 +122,15 @@ class TogetherLLMClient:
             messages = [{"role": "user", "content": prompt}]
             print(f"[DEBUG] Formatted messages: {messages}")
             
+            cache_key = self._cache_key(messages, max_tokens)
+            if use_cache:
+                cached = self._cached_completion(cache_key)
+                if cached is not None:
+                    return cached
+            
             print("\n[DEBUG] ----- Getting API Response -----")
-            response = self._make_request(messages)
+            response = self._make_request(messages, max_tokens)
+            self._store_in_cache(cache_key, response)
             
             print("\n[DEBUG] ----- Processing Response -----")
             print(f"[DEBUG] Response type: {type(response)}")
@@ -82,3 +150,56 @@ class TogetherLLMClient:
         
         response = self.get_completion(prompt)
         return response  # Caller should handle JSON parsing/validation
+
+
+class AsyncTogetherLLMClient(TogetherLLMClient):
+    """
+    TogetherLLMClient with an asyncio variant of get_completion, so many
+    prompts can be in flight at once. Shares model settings and the response
+    cache with the sync client; the sync methods keep working as before.
+    """
+    async def _make_request_async(self, messages: list, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        max_tokens = max_tokens or self.max_tokens
+        tokens = estimate_tokens(messages, max_tokens)
+        attempt = 0
+        while True:
+            waited = await self.rate_limiter.acquire_async(tokens)
+            if waited > 0.01:
+                print(f"[DEBUG] Rate limiter delayed async request by {waited:.2f}s")
+            
+            try:
+                print(f"[DEBUG] Making async {self.transport.name} request (model: {self.model})")
+                return await self.transport.acreate(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=max_tokens
+                )
+            except Exception as e:
+                print(f"\n[DEBUG] !!!!! ASYNC API REQUEST ERROR: {str(e)}")
+                print(f"[DEBUG] Error type: {type(e)}")
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+    
+    async def get_completion_async(self, prompt: str, use_cache: bool = True,
+                                   max_tokens: Optional[int] = None):
+        """Async counterpart of get_completion with the same caching behaviour"""
+        messages = [{"role": "user", "content": prompt}]
+        cache_key = self._cache_key(messages, max_tokens)
+        # Cache lookups hit SQLite; keep them off the event loop
+        if use_cache and cache_key is not None:
+            cached = await asyncio.to_thread(self._cached_completion, cache_key)
+            if cached is not None:
+                return cached
+        
+        response = await self._make_request_async(messages, max_tokens)
+        if cache_key is not None:
+            await asyncio.to_thread(self._store_in_cache, cache_key, response)
+        return response
+    
+    async def aclose(self):
+        """Release the transport's connections for the running event loop"""
+        await self.transport.aclose()
@@ -0,0 +1,199 @@
+"""
+Pluggable transports behind TogetherLLMClient, selected with LLM_BACKEND:
+
+- together (default): the Together API; needs TOGETHER_API_KEY
+- local:   an OpenAI-compatible HTTP server at LLM_LOCAL_URL, e.g. the
+           stand-in from `python -m benchmarks.llm_standin_server`
+- record:  call LLM_RECORD_BACKEND (together or local) and append every
+           prompt/response pair to LLM_RECORD_PATH as JSON lines
+- replay:  answer from LLM_RECORD_PATH only; unknown prompts raise
+
+Set LLM_CACHE=false while recording, otherwise cache hits never reach the
+transport and are not captured.
+"""
+import os
+import json
+import asyncio
+import threading
+from typing import Dict, List, Optional
+import requests
+from utils.llm_cache import LLMResponseCache, completion_from_text
+
+LLM_BACKEND = os.getenv('LLM_BACKEND', 'together').lower()
+LLM_RECORD_BACKEND = os.getenv('LLM_RECORD_BACKEND', 'together').lower()
+LLM_LOCAL_URL = os.getenv('LLM_LOCAL_URL', 'http://127.0.0.1:8001')
+LLM_RECORD_PATH = os.getenv(
+    'LLM_RECORD_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'llm_recordings.jsonl')
+)
+
+class LLMTransportError(Exception):
+    """HTTP error from a non-Together transport; carries status and headers for the retry logic"""
+    def __init__(self, message: str, status_code: Optional[int] = None, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+def _response_text(response) -> str:
+    if hasattr(response, 'choices') and len(response.choices) > 0:
+        return getattr(response.choices[0].message, 'content', '') or ''
+    return ''
+
+class TogetherTransport:
+    name = 'together'
+
+    def __init__(self):
+        from together import Together
+
+        api_key = os.getenv('TOGETHER_API_KEY')
+        print(f"[DEBUG] API key found: {bool(api_key)}")
+        if not api_key:
+            print("[DEBUG] ERROR: TOGETHER_API_KEY environment variable not set")
+            raise ValueError("TOGETHER_API_KEY environment variable not set")
+
+        self.client = Together()
+        # Event loop -> AsyncTogether; the HTTP connection pool is bound to the
+        # loop it was created on, and the sync wrappers run a fresh loop per call
+        self._async_clients = {}
+        self._async_lock = threading.Lock()
+
+    def _get_async_client(self):
+        from together import AsyncTogether
+
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = self._async_clients[loop] = AsyncTogether()
+        return client
+
+    async def aclose(self):
+        """Close the async client opened on the running event loop, if any"""
+        with self._async_lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        close = getattr(client, 'close', None)
+        if close is not None:
+            # Older SDKs open a session per request and have nothing to close
+            result = close()
+            if asyncio.iscoroutine(result):
+                await result
+
+    def create(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int):
+        return self.client.chat.completions.create(
+            model=model, messages=messages, temperature=temperature, max_tokens=max_tokens
+        )
+
+    async def acreate(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int):
+        return await self._get_async_client().chat.completions.create(
+            model=model, messages=messages, temperature=temperature, max_tokens=max_tokens
+        )
+
+class LocalTransport:
+    """OpenAI-compatible /v1/chat/completions endpoint, e.g. the local stand-in server"""
+    name = 'local'
+
+    def __init__(self, base_url: str = LLM_LOCAL_URL, timeout: float = 120):
+        self.url = base_url.rstrip('/') + '/v1/chat/completions'
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def create(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int):
+        payload = {'model': model, 'messages': messages, 'temperature': temperature, 'max_tokens': max_tokens}
+        try:
+            response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise ConnectionError(f"Local LLM server unreachable at {self.url}: {e}") from e
+
+        if response.status_code != 200:
+            raise LLMTransportError(
+                f"Local LLM server returned {response.status_code}: {response.text[:200]}",
+                status_code=response.status_code, headers=dict(response.headers)
+            )
+        body = response.json()
+        return completion_from_text(body['choices'][0]['message']['content'], usage=body.get('usage'))
+
+    async def acreate(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int):
+        # requests is blocking; run it on the default thread pool
+        return await asyncio.to_thread(self.create, model, messages, temperature, max_tokens)
+
+    async def aclose(self):
+        pass
+
+class RecordingTransport:
+    """Delegates to another transport and appends each prompt/response pair to a JSONL file"""
+    name = 'record'
+
+    def __init__(self, inner, path: str = LLM_RECORD_PATH):
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _record(self, model: str, messages: List[Dict[str, str]], temperature: float,
+                max_tokens: int, response):
+        entry = {
+            'key': LLMResponseCache.make_key(model, {'temperature': temperature, 'max_tokens': max_tokens}, messages),
+            'model': model,
+            'params': {'temperature': temperature, 'max_tokens': max_tokens},
+            'messages': messages,
+            'response': _response_text(response)
+        }
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+
+    def create(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int):
+        response = self.inner.create(model, messages, temperature, max_tokens)
+        self._record(model, messages, temperature, max_tokens, response)
+        return response
+
+    async def acreate(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int):
+        response = await self.inner.acreate(model, messages, temperature, max_tokens)
+        self._record(model, messages, temperature, max_tokens, response)
+        return response
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+class ReplayTransport:
+    """Serves responses captured by RecordingTransport; never touches the network"""
+    name = 'replay'
+
+    def __init__(self, path: str = LLM_RECORD_PATH):
+        self.path = path
+        self.responses = {}
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.responses[entry['key']] = entry['response']
+        print(f"[DEBUG] Loaded {len(self.responses)} recorded LLM responses from {path}")
+
+    def create(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int):
+        key = LLMResponseCache.make_key(model, {'temperature': temperature, 'max_tokens': max_tokens}, messages)
+        if key not in self.responses:
+            raise LookupError(f"No recorded response for this prompt in {self.path}")
+        return completion_from_text(self.responses[key], replayed=True)
+
+    async def acreate(self, model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int):
+        return self.create(model, messages, temperature, max_tokens)
+
+    async def aclose(self):
+        pass
+
+def _make_backend(name: str):
+    if name == 'together':
+        return TogetherTransport()
+    if name == 'local':
+        return LocalTransport()
+    raise ValueError(f"Unknown LLM backend: {name}")
+
+def get_transport(backend: Optional[str] = None):
+    """Build the transport selected by LLM_BACKEND (or the given backend name)"""
+    backend = (backend or LLM_BACKEND).lower()
+    print(f"[DEBUG] Using LLM backend: {backend}")
+    if backend == 'record':
+        return RecordingTransport(_make_backend(LLM_RECORD_BACKEND))
+    if backend == 'replay':
+        return ReplayTransport()
+    return _make_backend(backend)
@@ -1,21 +1,124 @@
+import re
+import html
 import sqlite3
 import json
-from typing import Dict, Any, List, Optional
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, List, Optional
 import os
+from utils.registry import get_skill_matcher
+from utils.embedding_index import EmbeddingIndex, EMBEDDING_INDEX
+
+# Per-connection tuning; WAL lets readers proceed while a writer commits
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', 30))
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+# In-process cache of decoded resume reads (0 disables); entries are dropped
+# least recently used first once their estimated size passes the cap
+RESUME_CACHE_MAX_MB = float(os.getenv('RESUME_CACHE_MAX_MB', 64))
+
+# bm25() column weights for resumes_fts (name, summary, skills, content)
+SEARCH_WEIGHTS = (10.0, 4.0, 8.0, 1.0)
+# Snippet highlight markers; control characters so they cannot collide with resume text
+_HIGHLIGHT_START, _HIGHLIGHT_END = '\x02', '\x03'
+# Columns listing pages need; leaves out the large content/sections text
+LIST_COLUMNS = 'id, filename, name, summary, skills, experience, cgpa, created_at'
+# Resume ids per match_scores lookup query
+MATCH_SCORES_CHUNK = 500
 
 class LocalDB:
-    def __init__(self):
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database')
-        if not os.path.exists(db_path):
-            os.makedirs(db_path)
+    def __init__(self, db_file: Optional[str] = None):
+        if db_file is None:
+            db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database')
+            if not os.path.exists(db_path):
+                os.makedirs(db_path)
+            db_file = os.path.join(db_path, 'resumes.db')
         
-        self.db_file = os.path.join(db_path, 'resumes.db')
+        self.db_file = db_file
+        # One persistent connection per thread; sqlite3 connections must not be shared across threads
+        self._local = threading.local()
+        # Read-through cache: key -> (generation, value, estimated bytes)
+        self._read_cache = OrderedDict()
+        self._read_cache_bytes = 0
+        self._read_cache_lock = threading.Lock()
+        self._read_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        # Resume vectors for semantic search, stored next to the database file
+        self.embeddings = EmbeddingIndex(db_file + '.emb') if EMBEDDING_INDEX else None
         self._init_db()
     
+    def _connect(self) -> sqlite3.Connection:
+        """This thread's connection, opened and tuned on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None: statements autocommit unless inside _transaction()
+            conn = sqlite3.connect(self.db_file, timeout=SQLITE_BUSY_TIMEOUT, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+            # Negative cache_size is in KiB rather than pages
+            conn.execute(f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            self._local.conn = conn
+        return conn
+    
+    @contextmanager
+    def _transaction(self):
+        """
+        Cursor inside a write transaction: committed on success, rolled back
+        on error. BEGIN IMMEDIATE takes the write lock up front so concurrent
+        writers wait on busy_timeout instead of failing mid-transaction.
+        Nested use joins the outer transaction.
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        if conn.in_transaction:
+            yield cursor
+            return
+        
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            yield cursor
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+    
+    def close(self):
+        """Close the calling thread's connection (reopened on next use)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+    
     def _init_db(self):
         """Initialize the database with required tables and columns"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
+        with self._transaction() as cursor:
+            self._create_schema(cursor)
+            if self.embeddings is not None and self.embeddings.rows == 0:
+                self._backfill_embeddings(cursor)
+    
+    def _embed(self, summary: str, content: str, skill_keys: List[str]):
+        """Embedding of a resume's summary and content text plus its canonical skills"""
+        return self.embeddings.encode(f"{summary or ''}\n{content or ''}", skill_keys)
+    
+    def _backfill_embeddings(self, cursor: sqlite3.Cursor):
+        """Encode resumes stored before the embedding index existed (or after an encoder change)"""
+        cursor.execute('SELECT id, content, summary, skills FROM resumes ORDER BY id')
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        ids = [row[0] for row in rows]
+        vectors = [self._embed(summary, content, self._skill_keys(json.loads(skills or '[]')))
+                   for _, content, summary, skills in rows]
+        self.embeddings.write(ids, vectors)
+        print(f"[DEBUG] Backfilled embeddings for {len(rows)} resumes")
+    
+    def _create_schema(self, cursor: sqlite3.Cursor):
+        """Create/migrate tables; runs inside _init_db's transaction"""
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        existing_tables = {row[0] for row in cursor.fetchall()}
+        backfill_skills = 'resume_skills' not in existing_tables
         
         # Create resumes table if not exists (without 'name')
         cursor.execute('''
@@ -36,48 +139,251 @@ class LocalDB:
         columns = [row[1] for row in cursor.fetchall()]
         if 'name' not in columns:
             cursor.execute("ALTER TABLE resumes ADD COLUMN name TEXT DEFAULT ''")
+        # Normalized resume sections (JSON) used to build compact prompts
+        if 'sections' not in columns:
+            cursor.execute("ALTER TABLE resumes ADD COLUMN sections TEXT DEFAULT '{}'")
         
-        conn.commit()
-        conn.close()
-    
-    def save_resume(self, resume_data: Dict[str, Any]) -> int:
-        """Save resume data to SQLite and return the document ID"""
-        print("[DEBUG] Starting save_resume")
-        print(f"[DEBUG] Input resume_data type: {type(resume_data)}")
-        print(f"[DEBUG] Input resume_data content: {resume_data}")
+        # Ingestion cache keyed by PDF content hash + parser/model version
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ingest_cache (
+                cache_key TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                text TEXT NOT NULL,
+                parsed TEXT NOT NULL,
+                resume_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
         
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
+        # Progress of bulk directory ingestion runs, so interrupted runs can resume
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+                path TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                resume_id INTEGER,
+                error TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
         
-        # Convert lists/dicts to JSON strings for storage
-        if 'skills' in resume_data and isinstance(resume_data['skills'], list):
-            print("[DEBUG] Converting skills list to JSON string")
-            resume_data['skills'] = json.dumps(resume_data['skills'])
+        # One row per (canonical skill, resume) so skill filters are index lookups
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS resume_skills (
+                skill TEXT NOT NULL,
+                resume_id INTEGER NOT NULL,
+                PRIMARY KEY (skill, resume_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_resume_skills_resume ON resume_skills(resume_id)')
         
+        # Single-row counter bumped by every write to resumes; cached reads are
+        # tagged with it, so writes from any process invalidate every cache
         cursor.execute('''
-            INSERT INTO resumes (filename, content, name, summary, skills, experience, cgpa)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
+            CREATE TABLE IF NOT EXISTS resumes_generation (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                generation INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('INSERT OR IGNORE INTO resumes_generation (id, generation) VALUES (0, 0)')
+        
+        # LLM match scores, reused while the job description, resume and model are unchanged
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS match_scores (
+                job_hash TEXT NOT NULL,
+                resume_id INTEGER NOT NULL,
+                resume_version TEXT NOT NULL,
+                model TEXT NOT NULL,
+                score INTEGER NOT NULL,
+                explanation TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (job_hash, resume_id, resume_version, model)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_resumes_experience ON resumes(experience)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_resumes_cgpa ON resumes(cgpa)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_resumes_created_at ON resumes(created_at, id)')
+        
+        # Full-text index over resumes (external content, so the text is not stored twice),
+        # kept in sync by triggers on every insert/update/delete
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS resumes_fts USING fts5(
+                name, summary, skills, content,
+                content='resumes', content_rowid='id',
+                tokenize='porter unicode61 remove_diacritics 2'
+            )
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS resumes_fts_insert AFTER INSERT ON resumes BEGIN
+                INSERT INTO resumes_fts (rowid, name, summary, skills, content)
+                VALUES (new.id, new.name, new.summary, new.skills, new.content);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS resumes_fts_delete AFTER DELETE ON resumes BEGIN
+                INSERT INTO resumes_fts (resumes_fts, rowid, name, summary, skills, content)
+                VALUES ('delete', old.id, old.name, old.summary, old.skills, old.content);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS resumes_fts_update AFTER UPDATE ON resumes BEGIN
+                INSERT INTO resumes_fts (resumes_fts, rowid, name, summary, skills, content)
+                VALUES ('delete', old.id, old.name, old.summary, old.skills, old.content);
+                INSERT INTO resumes_fts (rowid, name, summary, skills, content)
+                VALUES (new.id, new.name, new.summary, new.skills, new.content);
+            END
+        ''')
+        if 'resumes_fts' not in existing_tables:
+            cursor.execute("INSERT INTO resumes_fts (resumes_fts) VALUES ('rebuild')")
+            print("[DEBUG] Built full-text index for existing resumes")
+        
+        if backfill_skills:
+            cursor.execute('SELECT id, skills FROM resumes')
+            rows = cursor.fetchall()
+            for resume_id, skills in rows:
+                self._save_skills(cursor, resume_id, json.loads(skills) if skills else [])
+            print(f"[DEBUG] Backfilled resume_skills for {len(rows)} resumes")
+    
+    def _bump_generation(self, cursor: sqlite3.Cursor):
+        """Invalidate cached reads everywhere; call inside the writing transaction"""
+        cursor.execute('UPDATE resumes_generation SET generation = generation + 1 WHERE id = 0')
+    
+    def _generation(self) -> int:
+        return self._connect().execute('SELECT generation FROM resumes_generation WHERE id = 0').fetchone()[0]
+    
+    @staticmethod
+    def _copy_result(value: Any) -> Any:
+        """Copy of the dicts/lists in a decoded result; much cheaper than deepcopy"""
+        if isinstance(value, dict):
+            return {k: LocalDB._copy_result(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [LocalDB._copy_result(v) for v in value]
+        return value
+    
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        """Rough in-memory size of a decoded result, for the cache cap"""
+        return len(json.dumps(value, default=str)) * 2
+    
+    def _read_through(self, key: tuple, load: Callable[[], Any]) -> Any:
+        """
+        Cached result of load() for key, valid while the stored generation is
+        unchanged. Callers get a copy, so mutating a result cannot leak into
+        later reads.
+        """
+        max_bytes = RESUME_CACHE_MAX_MB * 1024 * 1024
+        if max_bytes <= 0:
+            return load()
+        # Read the generation before the data: a write in between only costs a later miss
+        generation = self._generation()
+        with self._read_cache_lock:
+            entry = self._read_cache.get(key)
+            if entry is not None and entry[0] == generation:
+                self._read_cache.move_to_end(key)
+                self._read_cache_stats['hits'] += 1
+                return self._copy_result(entry[1])
+            self._read_cache_stats['misses'] += 1
+        
+        value = load()
+        size = self._estimate_size(value)
+        if size > max_bytes:
+            return value
+        with self._read_cache_lock:
+            old = self._read_cache.pop(key, None)
+            if old is not None:
+                self._read_cache_bytes -= old[2]
+            self._read_cache[key] = (generation, self._copy_result(value), size)
+            self._read_cache_bytes += size
+            while self._read_cache_bytes > max_bytes:
+                _, (_, _, evicted_size) = self._read_cache.popitem(last=False)
+                self._read_cache_bytes -= evicted_size
+                self._read_cache_stats['evictions'] += 1
+        return value
+    
+    def read_cache_stats(self) -> Dict[str, Any]:
+        with self._read_cache_lock:
+            return dict(self._read_cache_stats, entries=len(self._read_cache),
+                        size_mb=round(self._read_cache_bytes / (1024 * 1024), 2),
+                        max_mb=RESUME_CACHE_MAX_MB)
+    
+    def _skill_keys(self, skills: List[str]) -> List[str]:
+        """Canonical, lower-cased, de-duplicated skill keys as stored in resume_skills"""
+        matcher = get_skill_matcher()
+        keys = []
+        for skill in skills:
+            if skill and str(skill).strip():
+                key = matcher.canonical(skill).lower()
+                if key not in keys:
+                    keys.append(key)
+        return keys
+    
+    def _save_skills(self, cursor: sqlite3.Cursor, resume_id: int, skills: List[str]):
+        cursor.executemany(
+            'INSERT OR IGNORE INTO resume_skills (skill, resume_id) VALUES (?, ?)',
+            [(key, resume_id) for key in self._skill_keys(skills)]
+        )
+    
+    @staticmethod
+    def _resume_row(resume_data: Dict[str, Any]) -> tuple:
+        """resumes column values for a profile; skills may be a list or a JSON string"""
+        skills = resume_data.get('skills', [])
+        if not isinstance(skills, str):
+            skills = json.dumps(skills or [])
+        return (
             resume_data.get('filename', ''),
             resume_data.get('content', ''),
             resume_data.get('name', ''),
             resume_data.get('summary', ''),
-            resume_data.get('skills', '[]'),
+            skills,
             resume_data.get('experience', 0),
-            resume_data.get('cgpa', 0.0)
-        ))
-        
-        last_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        return last_id
+            resume_data.get('cgpa', 0.0),
+            json.dumps(resume_data.get('sections') or {})
+        )
+    
+    def save_resumes(self, resumes: List[Dict[str, Any]]) -> List[int]:
+        """
+        Insert many resumes (and their resume_skills rows) in one transaction
+        and return their IDs in input order. The input dicts are not modified.
+        """
+        if not resumes:
+            return []
+        rows = [self._resume_row(resume_data) for resume_data in resumes]
+        skill_keys = [self._skill_keys(json.loads(row[4] or '[]')) for row in rows]
+        # Encode outside the transaction so the write lock is held only for the writes
+        vectors = None
+        if self.embeddings is not None:
+            vectors = [self._embed(row[3], row[1], keys) for row, keys in zip(rows, skill_keys)]
+        with self._transaction() as cursor:
+            cursor.executemany('''
+                INSERT INTO resumes (filename, content, name, summary, skills, experience, cgpa, sections)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            # AUTOINCREMENT hands out consecutive IDs, and the write lock held by
+            # the transaction keeps other writers out, so the new rows end at seq
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'resumes'")
+            last_id = cursor.fetchone()[0]
+            ids = list(range(last_id - len(rows) + 1, last_id + 1))
+            cursor.executemany(
+                'INSERT OR IGNORE INTO resume_skills (skill, resume_id) VALUES (?, ?)',
+                [(key, resume_id) for resume_id, keys in zip(ids, skill_keys) for key in keys]
+            )
+            if vectors is not None:
+                self.embeddings.write(ids, vectors)
+            self._bump_generation(cursor)
+        print(f"[DEBUG] save_resumes inserted {len(ids)} resumes")
+        return ids
+    
+    def save_resume(self, resume_data: Dict[str, Any]) -> int:
+        """Save resume data to SQLite and return the document ID"""
+        print(f"[DEBUG] save_resume: {resume_data.get('filename', '')}")
+        return self.save_resumes([resume_data])[0]
     
     def get_resume(self, resume_id: int) -> Optional[Dict[str, Any]]:
         """Retrieve a specific resume by ID"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM resumes WHERE id = ?', (resume_id,))
+        return self._read_through(('resume', resume_id), lambda: self._load_resume(resume_id))
+    
+    def _load_resume(self, resume_id: int) -> Optional[Dict[str, Any]]:
+        cursor = self._connect().execute('SELECT * FROM resumes WHERE id = ?', (resume_id,))
         row = cursor.fetchone()
         
         if row:
@@ -87,6 +393,7 @@ class LocalDB:
             # Convert JSON strings back to Python objects
             if resume_dict.get('skills'):
                 resume_dict['skills'] = json.loads(resume_dict['skills'])
+            resume_dict['sections'] = json.loads(resume_dict.get('sections') or '{}')
             # Map DB fields to app fields
             resume_dict['professional_summary'] = resume_dict.get('summary', '')
             resume_dict['total_years_experience'] = int(resume_dict.get('experience', 0) or 0)
@@ -99,23 +406,109 @@ class LocalDB:
             
             return resume_dict
         
-        conn.close()
         return None
     
+    def resume_exists(self, resume_id: int) -> bool:
+        """Check whether a resume row with the given ID exists"""
+        cursor = self._connect().execute('SELECT 1 FROM resumes WHERE id = ?', (resume_id,))
+        return cursor.fetchone() is not None
+    
+    def get_ingest_cache(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached ingestion result (extracted text + parsed profile)"""
+        cursor = self._connect().execute(
+            'SELECT content_hash, text, parsed, resume_id FROM ingest_cache WHERE cache_key = ?',
+            (cache_key,)
+        )
+        row = cursor.fetchone()
+        
+        if not row:
+            return None
+        return {
+            'content_hash': row[0],
+            'text': row[1],
+            'parsed': json.loads(row[2]),
+            'resume_id': row[3]
+        }
+    
+    def save_ingest_cache(self, cache_key: str, content_hash: str, text: str,
+                          parsed: Dict[str, Any], resume_id: Optional[int]):
+        """Store (or replace) the ingestion result for a PDF content hash"""
+        with self._transaction() as cursor:
+            cursor.execute('''
+                INSERT OR REPLACE INTO ingest_cache (cache_key, content_hash, text, parsed, resume_id)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (cache_key, content_hash, text, json.dumps(parsed), resume_id))
+    
+    def get_ingest_checkpoints(self) -> Dict[str, Dict[str, Any]]:
+        """Return bulk ingestion checkpoints keyed by file path"""
+        cursor = self._connect().execute(
+            'SELECT path, content_hash, status, resume_id, error FROM ingest_checkpoints'
+        )
+        return {
+            row[0]: {'content_hash': row[1], 'status': row[2], 'resume_id': row[3], 'error': row[4]}
+            for row in cursor.fetchall()
+        }
+    
+    def save_ingest_checkpoint(self, path: str, content_hash: str, status: str,
+                               resume_id: Optional[int] = None, error: Optional[str] = None):
+        """Record the outcome ('done' or 'failed') of ingesting one file"""
+        with self._transaction() as cursor:
+            cursor.execute('''
+                INSERT OR REPLACE INTO ingest_checkpoints (path, content_hash, status, resume_id, error, updated_at)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ''', (path, content_hash, status, resume_id, error))
+    
+    def get_match_scores(self, job_hash: str, model: str,
+                         versions: Dict[int, str]) -> Dict[int, tuple]:
+        """
+        Stored (score, explanation) for the job, keyed by resume id, for the
+        resumes in versions ({resume_id: resume_version}) whose version matches
+        """
+        ids = list(versions)
+        found = {}
+        conn = self._connect()
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(ids), MATCH_SCORES_CHUNK):
+            chunk = ids[i:i + MATCH_SCORES_CHUNK]
+            placeholders = ', '.join('?' for _ in chunk)
+            cursor = conn.execute(f'''
+                SELECT resume_id, resume_version, score, explanation FROM match_scores
+                WHERE job_hash = ? AND model = ? AND resume_id IN ({placeholders})
+            ''', [job_hash, model] + chunk)
+            for resume_id, version, score, explanation in cursor.fetchall():
+                if versions[resume_id] == version:
+                    found[resume_id] = (score, explanation)
+        return found
+    
+    def save_match_scores(self, job_hash: str, model: str, scores: List[tuple]):
+        """Persist [(resume_id, resume_version, score, explanation)] for the job"""
+        if not scores:
+            return
+        with self._transaction() as cursor:
+            cursor.executemany('''
+                INSERT OR REPLACE INTO match_scores (job_hash, resume_id, resume_version, model, score, explanation)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(job_hash, resume_id, version, model, score, explanation)
+                  for resume_id, version, score, explanation in scores])
+    
     def delete_all_resumes(self):
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM resumes')
-        conn.commit()
-        conn.close()
+        with self._transaction() as cursor:
+            cursor.execute('DELETE FROM resumes')
+            cursor.execute('DELETE FROM resume_skills')
+            cursor.execute('DELETE FROM match_scores')
+            # Checkpoints point at the deleted rows; a bulk re-run must ingest again
+            cursor.execute('DELETE FROM ingest_checkpoints')
+            if self.embeddings is not None:
+                self.embeddings.truncate()
+            self._bump_generation(cursor)
 
     def get_all_resumes(self) -> List[Dict[str, Any]]:
         """Retrieve all resumes"""
+        return self._read_through(('all',), self._load_all_resumes)
+    
+    def _load_all_resumes(self) -> List[Dict[str, Any]]:
         print("[DEBUG] Starting get_all_resumes")
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM resumes ORDER BY created_at DESC')
+        cursor = self._connect().execute('SELECT * FROM resumes ORDER BY created_at DESC')
         rows = cursor.fetchall()
         print(f"[DEBUG] Retrieved {len(rows)} rows from database")
         
@@ -132,9 +525,232 @@ class LocalDB:
             if resume_dict.get('skills'):
                 print("[DEBUG] Converting skills JSON string back to list")
                 resume_dict['skills'] = json.loads(resume_dict['skills'])
+            resume_dict['sections'] = json.loads(resume_dict.get('sections') or '{}')
+            # Map DB fields to app fields, as get_resume does
+            resume_dict['professional_summary'] = resume_dict.get('summary', '')
+            resume_dict['total_years_experience'] = int(resume_dict.get('experience', 0) or 0)
             
             resumes.append(resume_dict)
             print(f"[DEBUG] Added resume to list, current count: {len(resumes)}")
         
-        conn.close()
         return resumes
+
+    @staticmethod
+    def _parse_cursor(cursor_token: Optional[str]):
+        """(created_at, id) from a "created_at|id" page cursor, or None if missing/malformed"""
+        if not cursor_token or '|' not in cursor_token:
+            return None
+        created_at, resume_id = cursor_token.rsplit('|', 1)
+        if not resume_id.isdigit():
+            return None
+        return created_at, int(resume_id)
+
+    def list_resumes(self, limit: int = 20, after: Optional[str] = None,
+                     before: Optional[str] = None) -> Dict[str, Any]:
+        """
+        One page of resumes, newest first, for listings. Uses keyset
+        pagination on (created_at, id) so every page is an index range scan,
+        and leaves out the content/sections columns. Pass the previous
+        result's next_cursor as after (or prev_cursor as before) to page;
+        cursors are None when there is no page in that direction.
+        """
+        return self._read_through(('page', limit, after, before),
+                                  lambda: self._load_page(limit, after, before))
+    
+    def _load_page(self, limit: int, after: Optional[str], before: Optional[str]) -> Dict[str, Any]:
+        after_key = self._parse_cursor(after)
+        before_key = self._parse_cursor(before) if after_key is None else None
+
+        query = f'SELECT {LIST_COLUMNS} FROM resumes'
+        params = []
+        if after_key is not None:
+            query += ' WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC'
+            params.extend(after_key)
+        elif before_key is not None:
+            # Walk backwards from the cursor, then flip the page back to newest first
+            query += ' WHERE (created_at, id) > (?, ?) ORDER BY created_at ASC, id ASC'
+            params.extend(before_key)
+        else:
+            query += ' ORDER BY created_at DESC, id DESC'
+        # One extra row tells us whether another page exists
+        query += ' LIMIT ?'
+        params.append(limit + 1)
+
+        cursor = self._connect().execute(query, params)
+        columns = [desc[0] for desc in cursor.description]
+        rows = cursor.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if before_key is not None:
+            rows.reverse()
+
+        resumes = []
+        for row in rows:
+            resume_dict = dict(zip(columns, row))
+            resume_dict['skills'] = json.loads(resume_dict['skills']) if resume_dict.get('skills') else []
+            resume_dict['professional_summary'] = resume_dict.get('summary', '')
+            resume_dict['total_years_experience'] = int(resume_dict.get('experience', 0) or 0)
+            resumes.append(resume_dict)
+
+        if before_key is not None:
+            has_next, has_prev = True, has_more
+        else:
+            has_next, has_prev = has_more, after_key is not None
+        first, last = (resumes[0], resumes[-1]) if resumes else (None, None)
+        print(f"[DEBUG] list_resumes returned {len(resumes)} resumes")
+        return {
+            'resumes': resumes,
+            'next_cursor': f"{last['created_at']}|{last['id']}" if has_next and last else None,
+            'prev_cursor': f"{first['created_at']}|{first['id']}" if has_prev and first else None
+        }
+
+    def filter_resumes(self, skills: Optional[List[str]] = None, match: str = 'any',
+                       min_years: Optional[int] = None, max_years: Optional[int] = None,
+                       min_cgpa: Optional[float] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Resumes matching all given criteria, newest first. skills are
+        canonicalized like stored skills (aliases such as "js" match
+        "JavaScript"); match='any' needs one of them, match='all' every one.
+        """
+        key = ('filter', tuple(skills or ()), match, min_years, max_years, min_cgpa, limit)
+        return self._read_through(key, lambda: self._load_filtered(skills, match, min_years,
+                                                                   max_years, min_cgpa, limit))
+    
+    def _load_filtered(self, skills: Optional[List[str]], match: str, min_years: Optional[int],
+                       max_years: Optional[int], min_cgpa: Optional[float],
+                       limit: Optional[int]) -> List[Dict[str, Any]]:
+        conditions = []
+        params = []
+        keys = self._skill_keys(skills or [])
+        if keys:
+            placeholders = ', '.join('?' for _ in keys)
+            if match == 'all':
+                conditions.append(f'''id IN (SELECT resume_id FROM resume_skills WHERE skill IN ({placeholders})
+                                         GROUP BY resume_id HAVING COUNT(*) = ?)''')
+                params.extend(keys + [len(keys)])
+            else:
+                conditions.append(f'id IN (SELECT resume_id FROM resume_skills WHERE skill IN ({placeholders}))')
+                params.extend(keys)
+        if min_years is not None:
+            conditions.append('experience >= ?')
+            params.append(min_years)
+        if max_years is not None:
+            conditions.append('experience <= ?')
+            params.append(max_years)
+        if min_cgpa is not None:
+            conditions.append('cgpa >= ?')
+            params.append(min_cgpa)
+        
+        query = 'SELECT * FROM resumes'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY created_at DESC, id DESC'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        
+        cursor = self._connect().execute(query, params)
+        columns = [desc[0] for desc in cursor.description]
+        resumes = []
+        for row in cursor.fetchall():
+            resume_dict = dict(zip(columns, row))
+            resume_dict['skills'] = json.loads(resume_dict['skills']) if resume_dict.get('skills') else []
+            resume_dict['sections'] = json.loads(resume_dict.get('sections') or '{}')
+            resume_dict['professional_summary'] = resume_dict.get('summary', '')
+            resume_dict['total_years_experience'] = int(resume_dict.get('experience', 0) or 0)
+            resumes.append(resume_dict)
+        print(f"[DEBUG] filter_resumes matched {len(resumes)} resumes")
+        return resumes
+    
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """
+        Turn a search box query into safe FTS5 syntax: every word or "quoted
+        phrase" becomes a quoted string (so C++, e-mail etc. cannot break the
+        parser), a trailing * keeps prefix search, and an uppercase OR between
+        terms is kept. Terms are otherwise ANDed.
+        """
+        parts = []
+        for token in re.findall(r'"[^"]*"|\S+', query or ''):
+            if token == 'OR':
+                if parts and parts[-1] != 'OR':
+                    parts.append('OR')
+                continue
+            prefix = token.endswith('*') and not token.startswith('"')
+            term = token.strip('"').rstrip('*')
+            if not re.search(r'\w', term):
+                continue
+            parts.append('"' + term.replace('"', '""') + '"' + ('*' if prefix else ''))
+        if parts and parts[-1] == 'OR':
+            parts.pop()
+        return ' '.join(parts)
+    
+    @staticmethod
+    def _highlight(snippet: Optional[str]) -> str:
+        """Escape a snippet for HTML and turn the match markers into <mark> tags"""
+        escaped = html.escape(snippet or '')
+        return escaped.replace(_HIGHLIGHT_START, '<mark>').replace(_HIGHLIGHT_END, '</mark>')
+    
+    def search_resumes(self, query: str, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        BM25-ranked full-text search over name, summary, skills and content.
+        Each hit carries 'score' (lower is better, as in SQLite's bm25) and
+        HTML-safe 'summary_snippet'/'content_snippet' with <mark> highlights.
+        """
+        match = self._fts_query(query)
+        if not match:
+            return []
+        
+        weights = ', '.join(str(w) for w in SEARCH_WEIGHTS)
+        cursor = self._connect().execute(f'''
+            SELECT r.id, r.filename, r.name, r.skills, r.experience, r.cgpa, r.created_at,
+                   bm25(resumes_fts, {weights}) AS score,
+                   snippet(resumes_fts, 1, ?, ?, '…', 24) AS summary_snippet,
+                   snippet(resumes_fts, 3, ?, ?, '…', 24) AS content_snippet
+            FROM resumes_fts
+            JOIN resumes r ON r.id = resumes_fts.rowid
+            WHERE resumes_fts MATCH ?
+            ORDER BY score
+            LIMIT ? OFFSET ?
+        ''', (_HIGHLIGHT_START, _HIGHLIGHT_END, _HIGHLIGHT_START, _HIGHLIGHT_END, match, limit, offset))
+        
+        columns = [desc[0] for desc in cursor.description]
+        results = []
+        for row in cursor.fetchall():
+            hit = dict(zip(columns, row))
+            hit['skills'] = json.loads(hit['skills']) if hit.get('skills') else []
+            hit['total_years_experience'] = int(hit.get('experience', 0) or 0)
+            hit['score'] = round(hit['score'], 4)
+            hit['summary_snippet'] = self._highlight(hit['summary_snippet'])
+            hit['content_snippet'] = self._highlight(hit['content_snippet'])
+            results.append(hit)
+        print(f"[DEBUG] search_resumes({match!r}) returned {len(results)} hits")
+        return results
+    
+    def similar_resumes(self, text: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Resumes nearest to text (e.g. a job description) in the embedding
+        index, best first, each with its cosine 'similarity'
+        """
+        if self.embeddings is None:
+            return []
+        hits = self.embeddings.search(text, limit)
+        if not hits:
+            return []
+        placeholders = ', '.join('?' for _ in hits)
+        cursor = self._connect().execute(
+            f'SELECT {LIST_COLUMNS} FROM resumes WHERE id IN ({placeholders})', [i for i, _ in hits]
+        )
+        columns = [desc[0] for desc in cursor.description]
+        by_id = {row[0]: dict(zip(columns, row)) for row in cursor.fetchall()}
+        results = []
+        for resume_id, similarity in hits:
+            resume_dict = by_id.get(resume_id)
+            if resume_dict is None:
+                continue
+            resume_dict['skills'] = json.loads(resume_dict['skills']) if resume_dict.get('skills') else []
+            resume_dict['professional_summary'] = resume_dict.get('summary', '')
+            resume_dict['total_years_experience'] = int(resume_dict.get('experience', 0) or 0)
+            resume_dict['similarity'] = round(similarity, 4)
+            results.append(resume_dict)
+        return results
@@ -0,0 +1,65 @@
+"""
+pdf2docx fallback extractor, run as a separate process by utils.pdf_utils so it
+can be killed on timeout or memory exhaustion:
+
+    python -m utils.pdf_fallback <pdf_path> <docx_path> <output_txt_path>
+"""
+import sys
+from typing import Optional
+from pdf2docx import Converter
+import docx
+
+def extract_text_with_pdf2docx(pdf_path: str, docx_path: str) -> Optional[str]:
+    """
+    Convert the PDF to DOCX and read the text back with python-docx
+    """
+    print(f"[DEBUG] Converting PDF to DOCX: {pdf_path}")
+
+    # Convert PDF to DOCX
+    cv = Converter(pdf_path)
+    try:
+        cv.convert(docx_path)
+    finally:
+        cv.close()
+
+    print(f"[DEBUG] PDF converted to DOCX: {docx_path}")
+
+    # Extract text from DOCX
+    doc = docx.Document(docx_path)
+    text_parts = []
+
+    # Extract text from paragraphs
+    for para in doc.paragraphs:
+        if para.text.strip():
+            text_parts.append(para.text.strip())
+
+    # Extract text from tables
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                if cell.text.strip():
+                    text_parts.append(cell.text.strip())
+
+    if not text_parts:
+        print(f"[DEBUG] No text found in converted document")
+        return None
+
+    print(f"[DEBUG] Successfully extracted {len(text_parts)} text blocks via DOCX")
+    return '\n'.join(text_parts)
+
+def main(argv: list) -> int:
+    if len(argv) != 3:
+        print("usage: python -m utils.pdf_fallback <pdf_path> <docx_path> <output_txt_path>")
+        return 2
+
+    pdf_path, docx_path, output_path = argv
+    text = extract_text_with_pdf2docx(pdf_path, docx_path)
+    if not text:
+        return 1
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,110 +1,385 @@
 import os
-import os
+import sys
+import time
+import hashlib
+import subprocess
 import fitz  # PyMuPDF
-from typing import Optional
-from pdf2docx import Converter
-import docx
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Optional, Dict, Any, List, Tuple, Iterator
 import tempfile
 
-def extract_text_from_pdf(pdf_path: str) -> Optional[str]:
+try:
+    import resource  # POSIX only; used to cap fallback memory
+except ImportError:
+    resource = None
+
+# Batch extraction settings; workers default to the number of CPU cores
+PDF_EXTRACT_WORKERS = int(os.getenv('PDF_EXTRACT_WORKERS', '0')) or (os.cpu_count() or 1)
+PDF_EXTRACT_TIMEOUT = float(os.getenv('PDF_EXTRACT_TIMEOUT', '120'))
+
+# Hard limits for the isolated pdf2docx fallback subprocess
+PDF_FALLBACK_TIMEOUT = float(os.getenv('PDF_FALLBACK_TIMEOUT', '60'))
+PDF_FALLBACK_MAX_MEMORY_MB = int(os.getenv('PDF_FALLBACK_MAX_MEMORY_MB', '1024'))
+
+# Extraction budgets: stop reading once either is reached (0 disables the limit)
+PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', '10'))
+PDF_MAX_CHARS = int(os.getenv('PDF_MAX_CHARS', '20000'))
+
+# PyMuPDF extraction modes, tried in order until one yields text
+PYMUPDF_TIERS = ('text', 'blocks', 'words', 'rawdict')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _validate_doc(doc: fitz.Document) -> bool:
     """
-    Extract text content from a PDF file using PyMuPDF first, then fallback to pdf2docx if needed
+    Validate an already opened PyMuPDF document
     """
+    # Check if it's a valid PDF
+    is_pdf = doc.is_pdf
+    print(f"[DEBUG] PyMuPDF is_pdf check: {is_pdf}")
+    if not is_pdf:
+        print(f"[DEBUG] Not a valid PDF file according to PyMuPDF")
+        return False
+        
+    # Check if it has any pages
+    page_count = doc.page_count
+    print(f"[DEBUG] PDF page count: {page_count}")
+    if page_count == 0:
+        print(f"[DEBUG] PDF has no pages")
+        return False
+        
+    # Try to access first page metadata
     try:
-        # First validate the PDF
-        if not validate_pdf(pdf_path):
-            print(f"[DEBUG] Invalid PDF format: {pdf_path}")
-            return None
+        first_page = doc[0]
+        page_size = first_page.rect
+        print(f"[DEBUG] First page size: {page_size}")
+    except Exception as e:
+        print(f"[DEBUG] Error accessing first page: {str(e)}")
+        return False
+    
+    return True
 
-        print(f"[DEBUG] Attempting direct PDF text extraction with PyMuPDF: {pdf_path}")
+def _page_text(page: fitz.Page, mode: str) -> str:
+    """
+    Extract the text of a single page using one of the PYMUPDF_TIERS modes
+    """
+    if mode == 'text':
+        return page.get_text(
+            "text",  # Get plain text
+            sort=True,  # Sort blocks by reading order
+            flags=fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE  # Preserve formatting
+        ).strip()
+    
+    if mode == 'blocks':
+        # (x0, y0, x1, y1, text, block_no, block_type); type 0 is text
+        blocks = page.get_text("blocks", sort=True)
+        return '\n'.join(b[4].strip() for b in blocks if b[6] == 0 and b[4].strip())
+    
+    if mode == 'words':
+        # (x0, y0, x1, y1, word, block_no, line_no, word_no)
+        lines = {}
+        for w in page.get_text("words", sort=True):
+            lines.setdefault((w[5], w[6]), []).append(w[4])
+        return '\n'.join(' '.join(words) for words in lines.values()).strip()
+    
+    if mode == 'rawdict':
+        # Rebuild text character by character; catches fonts the other modes skip
+        lines = []
+        for block in page.get_text("rawdict").get('blocks', []):
+            for line in block.get('lines', []):
+                chars = [c['c'] for span in line.get('spans', []) for c in span.get('chars', [])]
+                line_text = ''.join(chars).strip()
+                if line_text:
+                    lines.append(line_text)
+        return '\n'.join(lines)
+    
+    raise ValueError(f"Unknown extraction mode: {mode}")
+
+def _iter_doc_pages(doc: fitz.Document, mode: str = 'text',
+                    max_pages: Optional[int] = None,
+                    max_chars: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily yield per-page text and stats from an opened document, stopping
+    once the page or character budget is used up. Empty pages are yielded
+    too (so stats stay complete) but don't count towards the char budget.
+    """
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    max_chars = PDF_MAX_CHARS if max_chars is None else max_chars
+    page_limit = min(doc.page_count, max_pages) if max_pages else doc.page_count
+    chars_left = max_chars or None
+    
+    for page_num in range(page_limit):
+        page_start = time.perf_counter()
+        page_text = _page_text(doc[page_num], mode)
         
-        try:
-            # Try direct PyMuPDF extraction first
-            doc = fitz.open(pdf_path)
-            text_parts = []
-            
-            for page_num in range(doc.page_count):
-                page = doc[page_num]
-                print(f"[DEBUG] Processing page {page_num + 1}/{doc.page_count}")
-                
-                # Get text with more detailed parameters
-                page_text = page.get_text(
-                    "text",  # Get plain text
-                    sort=True,  # Sort blocks by reading order
-                    flags=fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE  # Preserve formatting
-                ).strip()
-                
-                if page_text:
-                    text_parts.append(page_text)
-                    print(f"[DEBUG] Page {page_num + 1}: Found {len(page_text)} characters")
-                else:
-                    print(f"[DEBUG] Page {page_num + 1}: No text found")
-            
-            doc.close()
-            
-            if text_parts:
-                final_text = '\n\n'.join(text_parts)
-                print(f"[DEBUG] Successfully extracted {len(text_parts)} pages of text")
-                print(f"[DEBUG] Total text length: {len(final_text)} characters")
-                print(f"[DEBUG] First 200 chars:\n{final_text[:200]}...")
-                return final_text
-            else:
-                print("[DEBUG] No text found with PyMuPDF, trying pdf2docx fallback")
-        except Exception as e:
-            print(f"[DEBUG] Error in PyMuPDF extraction: {str(e)}")
-            print("[DEBUG] Falling back to pdf2docx method")
+        truncated = chars_left is not None and len(page_text) > chars_left
+        if truncated:
+            page_text = page_text[:chars_left]
+        if chars_left is not None:
+            chars_left -= len(page_text)
         
-        # Fallback to pdf2docx method
-        print(f"[DEBUG] Converting PDF to DOCX: {pdf_path}")
-        with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as tmp_docx:
-            docx_path = tmp_docx.name
+        yield {
+            'page': page_num + 1,
+            'text': page_text,
+            'chars': len(page_text),
+            'elapsed_ms': round((time.perf_counter() - page_start) * 1000, 2),
+            'truncated': truncated
+        }
         
+        if chars_left is not None and chars_left <= 0:
+            print(f"[DEBUG] Character budget of {max_chars} reached at page {page_num + 1}")
+            return
+    
+    if page_limit < doc.page_count:
+        print(f"[DEBUG] Page budget of {max_pages} reached, skipping {doc.page_count - page_limit} pages")
+
+def iter_pdf_pages(data: bytes, mode: str = 'text', max_pages: Optional[int] = None,
+                   max_chars: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream pages from in-memory PDF bytes. Each item holds the page number,
+    its text and stats; iteration stops early once a budget is reached.
+    """
+    doc = fitz.open(stream=data, filetype='pdf')
+    try:
+        yield from _iter_doc_pages(doc, mode, max_pages, max_chars)
+    finally:
+        doc.close()
+
+def _extract_text_from_doc(doc: fitz.Document, mode: str = 'text',
+                           max_pages: Optional[int] = None,
+                           max_chars: Optional[int] = None) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """
+    Extract budgeted text from an already opened PyMuPDF document.
+    Returns the text (None if nothing was found) and the per-page stats.
+    """
+    text_parts = []
+    page_stats = []
+    
+    for page in _iter_doc_pages(doc, mode, max_pages, max_chars):
+        page_stats.append({k: v for k, v in page.items() if k != 'text'})
+        
+        if page['text']:
+            text_parts.append(page['text'])
+            print(f"[DEBUG] Page {page['page']}/{doc.page_count} ({mode}): Found {page['chars']} characters")
+        else:
+            print(f"[DEBUG] Page {page['page']}/{doc.page_count} ({mode}): No text found")
+    
+    if not text_parts:
+        return None, page_stats
+    
+    final_text = '\n\n'.join(text_parts)
+    print(f"[DEBUG] Successfully extracted {len(text_parts)} pages of text")
+    print(f"[DEBUG] Total text length: {len(final_text)} characters")
+    print(f"[DEBUG] First 200 chars:\n{final_text[:200]}...")
+    return final_text, page_stats
+
+def _limit_fallback_memory():
+    """Runs in the fallback child before exec: cap its address space"""
+    limit = PDF_FALLBACK_MAX_MEMORY_MB * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def _extract_text_with_pdf2docx(data: bytes) -> Optional[str]:
+    """
+    Fallback extraction: run pdf2docx in a killable subprocess with a hard
+    wall-clock and memory limit. All temp files live in one directory that
+    is removed however the child exits.
+    """
+    with tempfile.TemporaryDirectory(prefix='pdf_fallback_') as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, 'input.pdf')
+        docx_path = os.path.join(tmp_dir, 'output.docx')
+        output_path = os.path.join(tmp_dir, 'output.txt')
+        with open(pdf_path, 'wb') as f:
+            f.write(data)
+        
+        print(f"[DEBUG] Running pdf2docx fallback in subprocess (timeout {PDF_FALLBACK_TIMEOUT:.0f}s)")
         try:
-            # Convert PDF to DOCX
-            cv = Converter(pdf_path)
-            cv.convert(docx_path)
-            cv.close()
-            
-            print(f"[DEBUG] PDF converted to DOCX: {docx_path}")
-            
-            # Extract text from DOCX
-            doc = docx.Document(docx_path)
-            text_parts = []
-            
-            # Extract text from paragraphs
-            for para in doc.paragraphs:
-                if para.text.strip():
-                    text_parts.append(para.text.strip())
-            
-            # Extract text from tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            text_parts.append(cell.text.strip())
-            
-            # Clean up
-            os.unlink(docx_path)
-            
-            if text_parts:
-                final_text = '\n'.join(text_parts)
-                print(f"[DEBUG] Successfully extracted {len(text_parts)} text blocks via DOCX")
-                print(f"[DEBUG] Total text length: {len(final_text)} characters")
-                print(f"[DEBUG] First 200 chars:\n{final_text[:200]}...")
-                return final_text
-            else:
-                print(f"[DEBUG] No text found in converted document")
-                return None
-                
-        except Exception as e:
-            print(f"[DEBUG] Error in pdf2docx conversion: {str(e)}")
-            if os.path.exists(docx_path):
-                os.unlink(docx_path)
+            completed = subprocess.run(
+                [sys.executable, '-m', 'utils.pdf_fallback', pdf_path, docx_path, output_path],
+                cwd=PROJECT_ROOT,
+                capture_output=True,
+                timeout=PDF_FALLBACK_TIMEOUT,
+                preexec_fn=_limit_fallback_memory if resource and os.name == 'posix' else None
+            )
+        except subprocess.TimeoutExpired:
+            print(f"[DEBUG] pdf2docx fallback killed after {PDF_FALLBACK_TIMEOUT:.0f}s")
             return None
-            
+        
+        if completed.returncode != 0 or not os.path.exists(output_path):
+            print(f"[DEBUG] pdf2docx fallback failed with exit code {completed.returncode}: "
+                  f"{completed.stderr.decode('utf-8', 'replace')[-500:]}")
+            return None
+        
+        with open(output_path, encoding='utf-8') as f:
+            final_text = f.read()
+    
+    print(f"[DEBUG] Total text length: {len(final_text)} characters")
+    print(f"[DEBUG] First 200 chars:\n{final_text[:200]}...")
+    return final_text
+
+def _ingest_result(filename: str, data: bytes, error: Optional[str] = None) -> Dict[str, Any]:
+    """Empty ingestion result; valid stays False until the PDF checks out"""
+    return {
+        'filename': filename,
+        'content_hash': hashlib.sha256(data).hexdigest(),
+        'valid': False,
+        'page_count': 0,
+        'text': None,
+        'archived_path': None,
+        'extraction_tier': None,
+        'tier_timings': {},
+        'page_stats': [],
+        'truncated': False,
+        'error': error
+    }
+
+def ingest_pdf(data: bytes, filename: str = '', archive_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Validate, count pages and extract text from in-memory PDF bytes using a
+    single PyMuPDF document handle. Writing the file to archive_dir is optional.
+    """
+    result = _ingest_result(filename, data)
+    print(f"[DEBUG] Ingesting PDF from memory: {filename} ({len(data)} bytes)")
+    
+    if not data:
+        result['error'] = 'empty file'
+        return result
+    if not data.startswith(b'%PDF'):
+        print(f"[DEBUG] Invalid PDF header: does not start with %PDF")
+        result['error'] = 'invalid PDF header'
+        return result
+    
+    try:
+        doc = fitz.open(stream=data, filetype='pdf')
+    except Exception as e:
+        print(f"[DEBUG] Error opening PDF stream: {str(e)}")
+        result['error'] = f'could not open PDF: {e}'
+        return result
+    
+    try:
+        if not _validate_doc(doc):
+            result['error'] = 'invalid PDF format'
+            return result
+        
+        result['valid'] = True
+        result['page_count'] = doc.page_count
+        
+        # Cheap PyMuPDF modes first; stop at the first one that yields text
+        for tier in PYMUPDF_TIERS:
+            tier_start = time.perf_counter()
+            try:
+                result['text'], result['page_stats'] = _extract_text_from_doc(doc, tier)
+            except Exception as e:
+                print(f"[DEBUG] Error in PyMuPDF '{tier}' extraction: {str(e)}")
+            result['tier_timings'][tier] = round((time.perf_counter() - tier_start) * 1000, 2)
+            if result['text']:
+                result['extraction_tier'] = tier
+                break
+    finally:
+        doc.close()
+    
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+        archived_path = os.path.join(archive_dir, filename or result['content_hash'] + '.pdf')
+        with open(archived_path, 'wb') as f:
+            f.write(data)
+        result['archived_path'] = archived_path
+        print(f"[DEBUG] Archived PDF to: {archived_path}")
+    
+    if not result['text']:
+        print("[DEBUG] No text found with PyMuPDF, trying pdf2docx fallback")
+        tier_start = time.perf_counter()
+        result['text'] = _extract_text_with_pdf2docx(data)
+        result['tier_timings']['pdf2docx'] = round((time.perf_counter() - tier_start) * 1000, 2)
+        if result['text']:
+            result['extraction_tier'] = 'pdf2docx'
+            if PDF_MAX_CHARS and len(result['text']) > PDF_MAX_CHARS:
+                result['text'] = result['text'][:PDF_MAX_CHARS]
+                result['truncated'] = True
+    else:
+        pages_read = len(result['page_stats'])
+        result['truncated'] = (pages_read < result['page_count']
+                               or any(p['truncated'] for p in result['page_stats']))
+    
+    print(f"[DEBUG] Extraction tier: {result['extraction_tier']}, timings (ms): {result['tier_timings']}, "
+          f"truncated: {result['truncated']}")
+    return result
+
+def _ingest_pdf_worker(data: bytes, filename: str, archive_dir: Optional[str]) -> Dict[str, Any]:
+    """Process-pool entry point; never raises so one bad file can't fail the batch"""
+    try:
+        return ingest_pdf(data, filename, archive_dir)
+    except Exception as e:
+        return _ingest_result(filename, data, error=f'extraction failed: {e}')
+
+def ingest_pdfs(files: List[Tuple[str, bytes]], max_workers: Optional[int] = None,
+                timeout: Optional[float] = None,
+                archive_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Ingest many (filename, bytes) pairs in parallel across a process pool.
+    Results are returned in input order; a file that fails or exceeds the
+    per-file timeout gets an 'error' entry instead of aborting the batch.
+    """
+    max_workers = max_workers or PDF_EXTRACT_WORKERS
+    timeout = timeout or PDF_EXTRACT_TIMEOUT
+    max_workers = max(1, min(max_workers, len(files)))
+    print(f"[DEBUG] Batch ingesting {len(files)} PDFs with {max_workers} workers")
+    
+    if max_workers == 1:
+        # Not worth the process start-up cost
+        return [_ingest_pdf_worker(data, filename, archive_dir) for filename, data in files]
+    
+    results = []
+    timed_out = False
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(_ingest_pdf_worker, data, filename, archive_dir)
+                   for filename, data in files]
+        start = time.monotonic()
+        for i, ((filename, data), future) in enumerate(zip(files, futures)):
+            # Files are queued behind each other, so the i-th file may only
+            # start once a worker frees up: give it one timeout per "round"
+            deadline = start + timeout * (i // max_workers + 1)
+            try:
+                results.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except FutureTimeoutError:
+                print(f"[DEBUG] Extraction timed out for {filename}")
+                timed_out = True
+                future.cancel()
+                results.append(_ingest_result(filename, data, error=f'extraction timed out after {timeout:.0f}s'))
+            except Exception as e:
+                # e.g. BrokenProcessPool if a worker crashed
+                print(f"[DEBUG] Extraction failed for {filename}: {str(e)}")
+                results.append(_ingest_result(filename, data, error=f'extraction failed: {e}'))
+    finally:
+        if timed_out:
+            # Don't leave hung workers behind; the executor has no public kill API
+            for process in list(getattr(executor, '_processes', {}).values()):
+                process.terminate()
+        executor.shutdown(wait=not timed_out, cancel_futures=True)
+    
+    return results
+
+def extract_text_from_pdf(pdf_path: str) -> Optional[str]:
+    """
+    Extract text content from a PDF file using PyMuPDF first, then fallback to pdf2docx if needed
+    """
+    try:
+        with open(pdf_path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        print(f"[DEBUG] Error reading PDF: {str(e)}")
+        return None
+    
+    try:
+        result = ingest_pdf(data, os.path.basename(pdf_path))
     except Exception as e:
         print(f"[DEBUG] Error extracting text from PDF: {str(e)}")
         return None
+    
+    if not result['valid']:
+        print(f"[DEBUG] Invalid PDF format: {pdf_path}")
+        return None
+    return result['text']
 
 def validate_pdf(file_path: str) -> bool:
     """
@@ -137,31 +412,7 @@ def validate_pdf(file_path: str) -> bool:
         print(f"[DEBUG] Attempting to open with PyMuPDF...")
         doc = fitz.open(file_path)
         
-        # Check if it's a valid PDF
-        is_pdf = doc.is_pdf
-        print(f"[DEBUG] PyMuPDF is_pdf check: {is_pdf}")
-        
-        if not is_pdf:
-            print(f"[DEBUG] Not a valid PDF file according to PyMuPDF: {file_path}")
-            doc.close()
-            return False
-            
-        # Check if it has any pages
-        page_count = doc.page_count
-        print(f"[DEBUG] PDF page count: {page_count}")
-        
-        if page_count == 0:
-            print(f"[DEBUG] PDF has no pages: {file_path}")
-            doc.close()
-            return False
-            
-        # Try to access first page metadata
-        try:
-            first_page = doc[0]
-            page_size = first_page.rect
-            print(f"[DEBUG] First page size: {page_size}")
-        except Exception as e:
-            print(f"[DEBUG] Error accessing first page: {str(e)}")
+        if not _validate_doc(doc):
             doc.close()
             return False
             
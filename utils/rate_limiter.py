@@ -0,0 +1,186 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from typing import Dict, Any, Optional
+
+# Together quota; override to match your account tier
+TOGETHER_RPM = float(os.getenv('TOGETHER_RPM', '60'))
+TOGETHER_TPM = float(os.getenv('TOGETHER_TPM', '60000'))
+
+# Retry policy for 429 / 5xx / connection errors
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '5'))
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', '1.0'))
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', '60'))
+
+class RateLimiter:
+    """
+    Client-side token bucket on requests/min and tokens/min. Callers block
+    (or await) in acquire() until both buckets have room, so concurrent
+    agents share one quota instead of each tripping the provider's limit.
+    """
+    def __init__(self, requests_per_minute: float = TOGETHER_RPM,
+                 tokens_per_minute: float = TOGETHER_TPM):
+        self.request_capacity = requests_per_minute
+        self.token_capacity = tokens_per_minute
+        self.request_rate = requests_per_minute / 60.0
+        self.token_rate = tokens_per_minute / 60.0
+        self.available_requests = requests_per_minute
+        self.available_tokens = tokens_per_minute
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+        self.waiting = 0
+        self.max_waiting = 0
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.retries = 0
+        self.rate_limited = 0
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        self.available_requests = min(self.request_capacity, self.available_requests + elapsed * self.request_rate)
+        self.available_tokens = min(self.token_capacity, self.available_tokens + elapsed * self.token_rate)
+        self.updated_at = now
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Take from both buckets if possible; otherwise return seconds to wait"""
+        # A request bigger than the whole bucket would never fit; let it through on a full bucket
+        tokens = min(tokens, self.token_capacity)
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+
+            self._refill(now)
+            if self.available_requests >= 1 and self.available_tokens >= tokens:
+                self.available_requests -= 1
+                self.available_tokens -= tokens
+                return 0.0
+
+            request_wait = (1 - self.available_requests) / self.request_rate if self.available_requests < 1 else 0.0
+            token_wait = (tokens - self.available_tokens) / self.token_rate if self.available_tokens < tokens else 0.0
+            return max(request_wait, token_wait)
+
+    def _start_waiting(self):
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def _finish_waiting(self, waited: float):
+        with self._lock:
+            self.waiting -= 1
+            self.acquired += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until a request of the given token size may be sent; returns seconds waited"""
+        start = time.monotonic()
+        self._start_waiting()
+        try:
+            while True:
+                wait = self._try_acquire(tokens)
+                if wait <= 0:
+                    break
+                time.sleep(wait)
+        finally:
+            waited = time.monotonic() - start
+            self._finish_waiting(waited)
+        return waited
+
+    async def acquire_async(self, tokens: int = 0) -> float:
+        """Async counterpart of acquire()"""
+        start = time.monotonic()
+        self._start_waiting()
+        try:
+            while True:
+                wait = self._try_acquire(tokens)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+        finally:
+            waited = time.monotonic() - start
+            self._finish_waiting(waited)
+        return waited
+
+    def pause(self, seconds: float):
+        """Hold back every caller, e.g. after the provider sent Retry-After"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def record_retry(self, status: Optional[int]):
+        with self._lock:
+            self.retries += 1
+            if status == 429:
+                self.rate_limited += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'queue_depth': self.waiting,
+                'max_queue_depth': self.max_waiting,
+                'acquired': self.acquired,
+                'total_wait_seconds': round(self.total_wait, 3),
+                'avg_wait_seconds': round(self.total_wait / self.acquired, 3) if self.acquired else 0.0,
+                'max_wait_seconds': round(self.max_wait, 3),
+                'retries': self.retries,
+                'rate_limited': self.rate_limited,
+                'requests_per_minute': self.request_capacity,
+                'tokens_per_minute': self.token_capacity
+            }
+
+_shared_limiter = None
+_shared_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter shared by every LLM client"""
+    global _shared_limiter
+    with _shared_limiter_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter()
+        return _shared_limiter
+
+def estimate_tokens(messages: list, max_tokens: int) -> int:
+    """Rough token cost of a request: ~4 characters per prompt token plus the completion budget"""
+    prompt_chars = sum(len(m.get('content', '')) for m in messages)
+    return prompt_chars // 4 + max_tokens
+
+def error_status(error: Exception) -> Optional[int]:
+    """Best-effort HTTP status of an SDK/HTTP exception"""
+    for attr in ('status_code', 'http_status', 'status'):
+        status = getattr(error, attr, None)
+        if isinstance(status, int):
+            return status
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    return status if isinstance(status, int) else None
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds from a Retry-After header on the error, if the provider sent one"""
+    headers = getattr(error, 'headers', None) or getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        value = headers.get('retry-after') or headers.get('Retry-After')
+        return float(value) if value is not None else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+def is_retryable(error: Exception) -> bool:
+    """429, 5xx and connection-level failures are worth retrying; other 4xx are not"""
+    status = error_status(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(error, (ConnectionError, TimeoutError)) or 'timeout' in type(error).__name__.lower() \
+        or 'connection' in type(error).__name__.lower()
+
+def backoff_delay(attempt: int, error: Exception) -> float:
+    """Retry-After if given, otherwise full-jitter exponential backoff"""
+    delay = retry_after(error)
+    if delay is not None:
+        return min(delay, LLM_BACKOFF_MAX)
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * (2 ** attempt)))
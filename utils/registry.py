@@ -0,0 +1,71 @@
+"""
+Process-wide registry of heavy, shareable components (spaCy model, LLM
+client, skill matcher, database handle). Each one is built lazily on first
+use, exactly once, and reused by every agent, workflow and route.
+"""
+import time
+import threading
+from typing import Dict, Callable, Any
+
+_components = {}
+_timings = {}
+_lock = threading.RLock()
+
+def _get_or_build(name: str, factory: Callable[[], Any]) -> Any:
+    component = _components.get(name)
+    if component is not None:
+        return component
+
+    with _lock:
+        # Another thread may have built it while we waited for the lock
+        if name not in _components:
+            start = time.perf_counter()
+            _components[name] = factory()
+            _timings[name] = round((time.perf_counter() - start) * 1000, 2)
+            print(f"[DEBUG] Registry built {name} in {_timings[name]}ms")
+        return _components[name]
+
+# The fallback only reads entities and sentence boundaries
+SPACY_EXCLUDED_PIPES = ["tagger", "parser", "attribute_ruler", "lemmatizer"]
+
+def get_nlp():
+    """
+    Shared spaCy pipeline, pruned to NER plus the lightweight sentence
+    recognizer; only loaded when a fallback path actually needs it
+    """
+    def build():
+        import spacy
+        nlp = spacy.load("en_core_web_sm", exclude=SPACY_EXCLUDED_PIPES)
+        # Without the parser, doc.sents needs senter (shipped disabled) or a rule-based splitter
+        if "senter" in nlp.component_names:
+            nlp.enable_pipe("senter")
+        else:
+            nlp.add_pipe("sentencizer")
+        print(f"[DEBUG] spaCy pipeline: {nlp.pipe_names}")
+        return nlp
+    return _get_or_build('nlp', build)
+
+def get_llm_client():
+    """Shared LLM client (sync and async), so the response cache and rate limiter stats are global"""
+    def build():
+        from utils.llm_client import AsyncTogetherLLMClient
+        return AsyncTogetherLLMClient()
+    return _get_or_build('llm_client', build)
+
+def get_skill_matcher():
+    """Shared skill taxonomy automaton for the deterministic fast path"""
+    def build():
+        from utils.skill_matcher import SkillMatcher
+        return SkillMatcher()
+    return _get_or_build('skill_matcher', build)
+
+def get_db():
+    """Shared LocalDB handle"""
+    def build():
+        from utils.local_db import LocalDB
+        return LocalDB()
+    return _get_or_build('db', build)
+
+def component_timings() -> Dict[str, float]:
+    """Milliseconds each component took to build, in build order"""
+    return dict(_timings)
@@ -0,0 +1,184 @@
+"""
+First-stage retrieval for job matching: a local BM25 ranker over each
+resume's skills, summary and content that shortlists the PREFILTER_K most
+relevant candidates, so only those are sent to the LLM matcher.
+"""
+import os
+import re
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from utils.registry import get_skill_matcher
+
+# Candidates handed to the LLM matcher; 0 disables the prefilter
+PREFILTER_K = int(os.getenv('PREFILTER_K', 50))
+# Per-field weights, e.g. PREFILTER_WEIGHTS="skills=3,summary=1.5,content=1,semantic=1";
+# 'semantic' is cosine similarity from the embedding index, when one is given
+DEFAULT_WEIGHTS = {'skills': 3.0, 'summary': 1.5, 'content': 1.0, 'semantic': 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*')
+STOPWORDS = frozenset('''
+    a an and are as at be been but by can for from has have in is it its of on or our
+    that the their this to was we were will with you your they them who what which
+    work working role team teams including using use experience years year plus
+'''.split())
+
+def parse_weights(spec: Optional[str]) -> Dict[str, float]:
+    """Field weights from a "field=weight,..." string; unknown fields are ignored"""
+    weights = dict(DEFAULT_WEIGHTS)
+    for part in (spec or '').split(','):
+        field, _, value = part.partition('=')
+        field = field.strip().lower()
+        if field in weights and value.strip():
+            weights[field] = float(value)
+    return weights
+
+PREFILTER_WEIGHTS = parse_weights(os.getenv('PREFILTER_WEIGHTS'))
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_RE.findall((text or '').lower()) if token not in STOPWORDS]
+
+class BM25Field:
+    """
+    BM25 over one field of every document, stored as term-sorted postings
+    arrays so a query is scored with a handful of vectorized NumPy operations.
+    """
+    def __init__(self, docs: Sequence[List[str]], k1: float = BM25_K1, b: float = BM25_B):
+        self.n_docs = len(docs)
+        self.vocab = {}
+        doc_ids, term_ids, tfs = [], [], []
+        doc_len = np.zeros(self.n_docs, dtype=np.float32)
+        for doc_id, tokens in enumerate(docs):
+            doc_len[doc_id] = len(tokens)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                doc_ids.append(doc_id)
+                term_ids.append(self.vocab.setdefault(token, len(self.vocab)))
+                tfs.append(count)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind='stable')
+        self.postings_doc = np.asarray(doc_ids, dtype=np.int64)[order]
+        tfs = np.asarray(tfs, dtype=np.float32)[order]
+        df = np.bincount(term_ids, minlength=len(self.vocab))
+        self.indptr = np.concatenate(([0], np.cumsum(df)))
+        self.idf = np.log1p((self.n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        # Precompute each posting's BM25 term-frequency factor
+        avg_len = float(doc_len.mean()) if self.n_docs and doc_len.sum() else 1.0
+        norm = k1 * (1 - b + b * doc_len[self.postings_doc] / avg_len)
+        self.postings_weight = tfs * (k1 + 1) / (tfs + norm)
+
+    def score(self, query_tokens: List[str]) -> np.ndarray:
+        """BM25 score of every document for the query"""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        terms = {self.vocab[token] for token in query_tokens if token in self.vocab}
+        if not terms:
+            return scores
+        slices = [np.arange(self.indptr[t], self.indptr[t + 1]) for t in terms]
+        idf = np.concatenate([np.full(len(s), self.idf[t], dtype=np.float32) for t, s in zip(terms, slices)])
+        postings = np.concatenate(slices)
+        return np.bincount(self.postings_doc[postings], weights=self.postings_weight[postings] * idf,
+                           minlength=self.n_docs).astype(np.float32)
+
+class ResumePrefilter:
+    """
+    Ranks resumes against a job description with per-field BM25. Skills are
+    compared as canonical taxonomy names (so "k8s" in a job description
+    matches a "Kubernetes" skill); summary and content as words. Each field's
+    scores are scaled to [0, 1] before weighting so no field dominates by
+    length alone. The index is reused while the set of resumes is unchanged.
+    With an embedding index, its similarity to the job description is added
+    as the 'semantic' field.
+    """
+    def __init__(self, weights: Optional[Dict[str, float]] = None, embeddings=None):
+        self.weights = dict(weights or PREFILTER_WEIGHTS)
+        self.embeddings = embeddings
+        self.skill_matcher = get_skill_matcher()
+        # (resume ids, field indexes), replaced in one assignment so concurrent
+        # requests never see one request's key with another's indexes
+        self._index = (None, {})
+
+    def _skill_tokens(self, skills: List[str]) -> List[str]:
+        return [self.skill_matcher.canonical(skill).lower() for skill in skills if str(skill).strip()]
+
+    def _build(self, resumes: List[Dict]) -> Dict[str, BM25Field]:
+        """Field indexes for resumes, reusing the last ones if the resumes are the same"""
+        key = tuple(resume.get('id') for resume in resumes)
+        index_key, fields = self._index
+        if key == index_key and None not in key:
+            return fields
+        fields = {
+            'skills': BM25Field([self._skill_tokens(r.get('skills') or []) for r in resumes]),
+            'summary': BM25Field([tokenize(r.get('professional_summary') or r.get('summary') or '')
+                                  for r in resumes]),
+            'content': BM25Field([tokenize(r.get('content') or '') for r in resumes])
+        }
+        self._index = (key, fields)
+        print(f"[DEBUG] Prefilter index built for {len(resumes)} resumes "
+              f"({len(fields['content'].vocab)} content terms)")
+        return fields
+
+    def scores(self, resumes: List[Dict], job_description: str) -> np.ndarray:
+        """Weighted relevance of every resume to the job description"""
+        fields = self._build(resumes)
+        words = tokenize(job_description)
+        queries = {
+            'skills': [skill.lower() for skill in self.skill_matcher.find(job_description)],
+            'summary': words,
+            'content': words
+        }
+        total = np.zeros(len(resumes), dtype=np.float32)
+        for field, index in fields.items():
+            weight = self.weights.get(field, 0.0)
+            if not weight:
+                continue
+            field_scores = index.score(queries[field])
+            top = float(field_scores.max()) if len(field_scores) else 0.0
+            if top > 0:
+                total += weight * field_scores / top
+
+        ids = [resume.get('id') for resume in resumes]
+        weight = self.weights.get('semantic', 0.0)
+        if self.embeddings is not None and weight and None not in ids:
+            similarity = np.clip(self.embeddings.similarity(ids, self.embeddings.encode(job_description)), 0, None)
+            top = float(similarity.max()) if len(similarity) else 0.0
+            if top > 0:
+                total += weight * similarity / top
+        return total
+
+    def shortlist(self, resumes: List[Dict], job_description: str, k: int) -> List[int]:
+        """Indices of the k most relevant resumes, best first (ties keep input order)"""
+        if k <= 0 or len(resumes) <= k:
+            return list(range(len(resumes)))
+        scores = self.scores(resumes, job_description)
+        # argpartition picks arbitrarily among scores tied at the k-th place,
+        # so take everything above it and fill up with the earliest ties
+        kth = -np.partition(-scores, k - 1)[k - 1]
+        above = np.flatnonzero(scores > kth)
+        tied = np.flatnonzero(scores == kth)[:k - len(above)]
+        top = np.concatenate([above, tied])
+        # Best first; among equal scores the earlier resume wins
+        order = np.lexsort((top, -scores[top]))
+        return [int(i) for i in top[order]]
+
+def recall_at_k(reference: Sequence[Tuple[Any, float]], shortlist: Sequence, n: int) -> float:
+    """
+    Share of the reference ranking's top n that the shortlist recovers.
+    reference is [(id, score)] best first; candidates tied with the n-th
+    score are interchangeable, so any of them fills one of the tied slots.
+    """
+    if not reference or n <= 0:
+        return math.nan
+    n = min(n, len(reference))
+    cutoff = reference[n - 1][1]
+    kept = set(shortlist)
+    above = [item for item, score in reference if score > cutoff]
+    tied = [item for item, score in reference if score == cutoff]
+    recovered = sum(1 for item in above if item in kept)
+    recovered += min(n - len(above), sum(1 for item in tied if item in kept))
+    return recovered / n
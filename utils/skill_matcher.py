@@ -0,0 +1,123 @@
+"""
+Multi-pattern skill matcher: an Aho-Corasick automaton over every name and
+alias in the skill taxonomy (data/skills.txt), so a resume is scanned once
+regardless of how many skills the taxonomy holds.
+"""
+import os
+from collections import deque
+from typing import Dict, List, Tuple
+
+SKILLS_PATH = os.getenv(
+    'SKILLS_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'skills.txt')
+)
+
+# Names/aliases this short are matched case-sensitively ("R", "Go", "C#")
+CASE_SENSITIVE_MAX_LEN = 2
+
+def load_taxonomy(path: str = SKILLS_PATH) -> Dict[str, str]:
+    """Map every skill name and alias (as written in the file) to its canonical name"""
+    aliases = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            names = [name.strip() for name in line.split('|') if name.strip()]
+            for name in names:
+                aliases.setdefault(name, names[0])
+    return aliases
+
+class SkillMatcher:
+    def __init__(self, path: str = SKILLS_PATH):
+        self.aliases = load_taxonomy(path)
+        self._canonical_by_alias = {alias.lower(): canonical for alias, canonical in self.aliases.items()}
+        # Lower-cased pattern -> [(alias as written, canonical)]
+        self._patterns = {}
+        for alias, canonical in self.aliases.items():
+            self._patterns.setdefault(alias.lower(), []).append((alias, canonical))
+        self._build()
+        print(f"[DEBUG] Skill matcher built: {len(self.aliases)} names, {len(self._goto)} states")
+
+    def canonical(self, skill: str) -> str:
+        """Taxonomy name for a skill or alias ("js" -> "JavaScript"); unknown skills are tidied up as-is"""
+        skill = ' '.join(str(skill).split())
+        return self._canonical_by_alias.get(skill.lower(), skill)
+
+    def _build(self):
+        """Trie of all patterns plus failure links (breadth-first)"""
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern in self._patterns:
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(pattern)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                state = self._fail[node]
+                while state and ch not in self._goto[state]:
+                    state = self._fail[state]
+                self._fail[nxt] = self._goto[state].get(ch, 0)
+                # Patterns ending at the failure state also end here
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _scan(self, text: str) -> List[Tuple[int, int, str]]:
+        """All (start, end, pattern) occurrences of lower-cased patterns"""
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters change length when lower-cased; keep offsets aligned
+            lowered = ''.join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+        hits = []
+        node = 0
+        for i, ch in enumerate(lowered):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for pattern in self._out[node]:
+                hits.append((i - len(pattern) + 1, i + 1, pattern))
+        return hits
+
+    def find(self, text: str, short_aliases: bool = True) -> List[str]:
+        """
+        Canonical skills mentioned in text, in order of first mention. With
+        short_aliases=False, names of CASE_SENSITIVE_MAX_LEN characters or
+        fewer are ignored (for prose, where "Go" or "R" is rarely a skill).
+        """
+        matches = []
+        for start, end, pattern in self._scan(text):
+            # Whole words only: "Java" must not match inside "JavaScript"
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            if end < len(text) and text[end].isalnum():
+                continue
+            surface = text[start:end]
+            for alias, canonical in self._patterns[pattern]:
+                if len(alias) > CASE_SENSITIVE_MAX_LEN or (short_aliases and surface == alias):
+                    matches.append((start, end, canonical))
+                    break
+
+        # Longest match wins where matches overlap ("Spring Boot" over "Spring")
+        matches.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        skills = []
+        covered_until = 0
+        for start, end, canonical in matches:
+            if start < covered_until:
+                continue
+            covered_until = end
+            if canonical not in skills:
+                skills.append(canonical)
+        return skills
@@ -0,0 +1,167 @@
+"""
+Normalization and section segmentation of extracted resume text, used to
+build compact, budgeted LLM prompts that carry only the sections a given
+field can come from instead of the whole raw PDF text.
+"""
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List
+
+# Upper bound (in estimated tokens, ~4 chars each) on resume text sent in one prompt
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', 1500))
+
+# Lines seen at least this often are treated as running page headers/footers
+REPEATED_LINE_MIN = 3
+
+# Canonical order sections are stored and rendered in; 'header' is the text
+# before the first recognised heading (name, contact block), 'other' collects
+# sections we do not use for extraction (references, hobbies, declaration, ...)
+SECTION_ORDER = ('header', 'summary', 'experience', 'education', 'skills',
+                 'projects', 'achievements', 'other')
+
+SECTION_HEADINGS = {
+    'summary': ['summary', 'professional summary', 'profile', 'professional profile',
+                'objective', 'career objective', 'about me', 'about'],
+    'experience': ['experience', 'work experience', 'professional experience', 'employment',
+                   'employment history', 'work history', 'career history', 'internships',
+                   'internship', 'internship experience', 'relevant experience'],
+    'education': ['education', 'academic background', 'academics', 'academic details',
+                  'qualifications', 'educational qualifications', 'education and training'],
+    'skills': ['skills', 'technical skills', 'key skills', 'core competencies', 'competencies',
+               'technologies', 'tools and technologies', 'technical proficiency', 'skill set', 'skillset'],
+    'projects': ['projects', 'personal projects', 'academic projects', 'key projects',
+                 'selected projects', 'project experience'],
+    'achievements': ['achievements', 'awards', 'honors', 'honours', 'accomplishments',
+                     'awards and achievements', 'honors and awards', 'certifications',
+                     'certifications and awards', 'publications'],
+    'other': ['references', 'declaration', 'hobbies', 'interests', 'hobbies and interests',
+              'personal details', 'personal information', 'languages', 'extracurricular activities',
+              'extra curricular activities', 'activities', 'volunteering']
+}
+
+# Sections written as lists of "Label: items" lines ("Languages: Python, Go"),
+# where an inline label is a sub-heading, not the start of a new section
+LIST_SECTIONS = ('skills', 'achievements')
+
+_HEADING_LOOKUP = {heading: section for section, headings in SECTION_HEADINGS.items()
+                   for heading in headings}
+
+# Sections each extracted field can be found in, most useful first
+FIELD_SECTIONS = {
+    'name': ['header'],
+    'email': ['header'],
+    'phone': ['header'],
+    'total_years_experience': ['summary', 'experience'],
+    'skills': ['skills', 'experience', 'projects'],
+    'achievements': ['achievements', 'projects', 'experience'],
+    'cgpa': ['education'],
+    'professional_summary': ['summary', 'experience', 'skills', 'projects', 'achievements', 'education']
+}
+
+_PAGE_NUMBER = re.compile(r'^(page\s*)?\d+(\s*(of|/)\s*\d+)?$', re.IGNORECASE)
+_SPACES = re.compile(r'[ \t\u00a0\u2000-\u200b]+')
+
+def _heading_section(line: str):
+    """Section name if the line is a heading, else None"""
+    if len(line) > 40:
+        return None
+    key = re.sub(r'[^a-z ]', '', line.lower().replace('&', ' and '))
+    return _HEADING_LOOKUP.get(' '.join(key.split()))
+
+def normalize_text(text: str) -> str:
+    """
+    Collapse the whitespace PyMuPDF preserves, drop page numbers and running
+    headers/footers (short lines repeated on every page, first copy kept)
+    and squeeze blank lines.
+    """
+    text = unicodedata.normalize('NFKC', text or '').replace('\r', '\n')
+    lines = [_SPACES.sub(' ', line).strip() for line in text.split('\n')]
+    counts = Counter(line.lower() for line in lines if line)
+
+    kept = []
+    seen = set()
+    for line in lines:
+        if not line:
+            if kept and kept[-1]:
+                kept.append('')
+            continue
+        if _PAGE_NUMBER.match(line):
+            continue
+        lowered = line.lower()
+        if counts[lowered] >= REPEATED_LINE_MIN and len(line) <= 80 and lowered in seen:
+            continue
+        seen.add(lowered)
+        kept.append(line)
+    return '\n'.join(kept).strip()
+
+def segment_sections(text: str) -> Dict[str, str]:
+    """
+    Normalize the text and split it on recognised headings. Returns
+    {section: text} in SECTION_ORDER; repeated headings are merged. Text with
+    no recognised headings ends up entirely under 'header'.
+    """
+    parts = {}
+    current = 'header'
+    for line in normalize_text(text).split('\n'):
+        section = _heading_section(line)
+        rest = ''
+        if section is None and ':' in line and current not in LIST_SECTIONS:
+            # Inline heading, e.g. "Skills: Python, SQL"
+            head, rest = line.split(':', 1)
+            section = _heading_section(head)
+        if section is not None:
+            current = section
+            line = rest.strip()
+            if not line:
+                continue
+        parts.setdefault(current, []).append(line)
+
+    sections = {}
+    for section in SECTION_ORDER:
+        body = '\n'.join(parts.get(section, [])).strip()
+        if body:
+            sections[section] = body
+    return sections
+
+def _selected_sections(sections: Dict[str, str], fields: Iterable[str]) -> List[str]:
+    wanted = set()
+    for field in fields:
+        found = [s for s in FIELD_SECTIONS.get(field, SECTION_ORDER) if s in sections]
+        # Heading missing (or unrecognised): the value may sit anywhere
+        wanted.update(found or ('header', 'other'))
+    selected = [s for s in SECTION_ORDER if s in wanted and s in sections]
+    return selected or [s for s in SECTION_ORDER if s in sections]
+
+def build_prompt_text(sections: Dict[str, str], fields: Iterable[str],
+                      budget_tokens: int = PROMPT_TOKEN_BUDGET) -> str:
+    """
+    Render only the sections the requested fields need, trimming the longest
+    sections first so the result stays within budget_tokens.
+    """
+    selected = _selected_sections(sections, fields)
+    budget = budget_tokens * 4
+    # Share the character budget out evenly; short sections hand their unused
+    # share on to the longer ones
+    allowance = {}
+    remaining = budget
+    by_length = sorted(selected, key=lambda s: len(sections[s]))
+    for i, section in enumerate(by_length):
+        share = remaining // (len(by_length) - i)
+        allowance[section] = min(len(sections[section]), share)
+        remaining -= allowance[section]
+
+    blocks = []
+    for section in selected:
+        body = sections[section]
+        if len(body) > allowance[section]:
+            # Cut at a line boundary where possible
+            body = body[:allowance[section]]
+            if '\n' in body:
+                body = body.rsplit('\n', 1)[0]
+        if section == 'header' and len(selected) == 1:
+            blocks.append(body)
+        else:
+            blocks.append(f"{section.upper()}\n{body}")
+    return '\n\n'.join(blocks)
@@ -0,0 +1,243 @@
+"""
+Bulk directory ingestion:
+
+    python -m workflows.bulk_ingest uploads/ --concurrency 4
+
+Walks a directory for PDFs and runs extraction → parse → summarize → save
+for each one. Progress is checkpointed in SQLite, so re-running the same
+command after an interruption skips files that were already ingested.
+Each chunk's parsed resumes are written in a single bulk insert, and
+byte-identical files within a chunk are parsed and saved only once.
+Resumes whose LLM extraction fails are parsed at the end of each chunk in
+one batched spaCy pass instead of one at a time.
+"""
+import os
+import sys
+import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+from dotenv import load_dotenv
+
+load_dotenv()
+from utils.pdf_utils import ingest_pdfs
+from agents.parser_agent import LLMExtractionError
+from workflows.resume_workflow import ResumeWorkflow
+
+def find_pdfs(directory: str) -> List[str]:
+    """Return all PDF paths under directory, sorted for a stable processing order"""
+    paths = []
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            if filename.lower().endswith('.pdf'):
+                paths.append(os.path.join(root, filename))
+    return sorted(paths)
+
+class BulkIngestor:
+    def __init__(self, concurrency: int = 4, chunk_size: int = 32, retry_failed: bool = True):
+        self.workflow = ResumeWorkflow()
+        self.db = self.workflow.db
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.retry_failed = retry_failed
+        self.stats = {'found': 0, 'skipped': 0, 'cached': 0, 'duplicates': 0, 'ingested': 0, 'fallback': 0,
+                      'failed': 0}
+        self.failures = []
+        self._fallback_queue = []
+        # Parsed resumes of the current chunk, saved together by _save_pending
+        self._pending = []
+        # Content hash -> resume id of the files saved from the current chunk
+        self._saved_ids = {}
+        self._stats_lock = threading.Lock()
+
+    def _record_failure(self, path: str, content_hash: str, error: str):
+        print(f"[DEBUG] Failed to ingest {path}: {error}")
+        self.db.save_ingest_checkpoint(path, content_hash, 'failed', error=error)
+        with self._stats_lock:
+            self.stats['failed'] += 1
+            self.failures.append((path, error))
+
+    def _process_text(self, path: str, content_hash: str, text: str):
+        """Parse and summarize one extracted resume; runs on a worker thread"""
+        try:
+            processed = self.workflow.process_resume(
+                text, filename=os.path.basename(path), content_hash=content_hash,
+                defer_fallback=True, save=False
+            )
+        except LLMExtractionError:
+            with self._stats_lock:
+                self._fallback_queue.append({'path': path, 'content_hash': content_hash, 'text': text,
+                                             'filename': os.path.basename(path)})
+            return
+        except Exception as e:
+            self._record_failure(path, content_hash, f'processing failed: {e}')
+            return
+        with self._stats_lock:
+            self._pending.append({'path': path, 'content_hash': content_hash, 'parsed': processed})
+
+    def _save_pending(self):
+        """Write the chunk's parsed resumes in one bulk insert"""
+        with self._stats_lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        try:
+            self.workflow.save_processed([item['parsed'] for item in pending],
+                                         [item['content_hash'] for item in pending])
+        except Exception as e:
+            for item in pending:
+                self._record_failure(item['path'], item['content_hash'], f'saving failed: {e}')
+            return
+        for item in pending:
+            self.db.save_ingest_checkpoint(item['path'], item['content_hash'], 'done',
+                                           resume_id=item['parsed']['document_id'])
+            self._saved_ids[item['content_hash']] = item['parsed']['document_id']
+        self.stats['ingested'] += len(pending)
+
+    def _process_chunk(self, chunk: List[Dict[str, Any]], executor: ThreadPoolExecutor):
+        to_extract = []
+        # Copies of a file earlier in the chunk, resolved once the original is saved
+        duplicates = []
+        first_paths = {}
+        self._saved_ids = {}
+        for item in chunk:
+            if item['content_hash'] in first_paths:
+                duplicates.append(item)
+                continue
+            first_paths[item['content_hash']] = item['path']
+            # Files ingested before (e.g. through the web form) come from the cache
+            cached = self.workflow.get_cached_resume(item['content_hash'])
+            if cached is not None:
+                self.db.save_ingest_checkpoint(item['path'], item['content_hash'], 'done',
+                                               resume_id=cached.get('document_id'))
+                self._saved_ids[item['content_hash']] = cached.get('document_id')
+                self.stats['cached'] += 1
+            else:
+                to_extract.append(item)
+
+        if to_extract:
+            self._ingest(to_extract, executor)
+        for item in duplicates:
+            original = first_paths[item['content_hash']]
+            if item['content_hash'] not in self._saved_ids:
+                self._record_failure(item['path'], item['content_hash'],
+                                     f'same content as {original}, which failed')
+                continue
+            print(f"[DEBUG] {item['path']} has the same content as {original}, not ingested again")
+            self.db.save_ingest_checkpoint(item['path'], item['content_hash'], 'done',
+                                           resume_id=self._saved_ids[item['content_hash']])
+            self.stats['duplicates'] += 1
+
+    def _ingest(self, to_extract: List[Dict[str, Any]], executor: ThreadPoolExecutor):
+        """Extract, parse and save files the cache has not seen"""
+        extracted = ingest_pdfs([(os.path.basename(i['path']), i['data']) for i in to_extract])
+        futures = []
+        for item, result in zip(to_extract, extracted):
+            if not result['valid'] or not result['text']:
+                self._record_failure(item['path'], item['content_hash'],
+                                     result['error'] or 'no text extracted')
+                continue
+            futures.append(executor.submit(self._process_text, item['path'],
+                                           item['content_hash'], result['text']))
+        for future in futures:
+            future.result()
+        self._save_pending()
+        self._process_fallback()
+
+    def _process_fallback(self):
+        """Batch-parse the chunk's resumes whose LLM extraction failed"""
+        with self._stats_lock:
+            queue, self._fallback_queue = self._fallback_queue, []
+        if not queue:
+            return
+        print(f"[DEBUG] LLM extraction failed for {len(queue)} resumes, running batched fallback")
+        try:
+            processed = self.workflow.process_fallback_batch(queue)
+        except Exception as e:
+            for item in queue:
+                self._record_failure(item['path'], item['content_hash'], f'fallback failed: {e}')
+            return
+        for item, parsed in zip(queue, processed):
+            self.db.save_ingest_checkpoint(item['path'], item['content_hash'], 'done',
+                                           resume_id=parsed.get('document_id'))
+            self._saved_ids[item['content_hash']] = parsed.get('document_id')
+        self.stats['ingested'] += len(processed)
+        self.stats['fallback'] += len(processed)
+
+    def run(self, directory: str) -> Dict[str, Any]:
+        start = time.monotonic()
+        paths = find_pdfs(directory)
+        self.stats['found'] = len(paths)
+        checkpoints = self.db.get_ingest_checkpoints()
+        print(f"[DEBUG] Found {len(paths)} PDFs in {directory}, {len(checkpoints)} checkpoints on record")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            chunk = []
+            for path in paths:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                content_hash = hashlib.sha256(data).hexdigest()
+
+                checkpoint = checkpoints.get(path)
+                if checkpoint and checkpoint['content_hash'] == content_hash and (
+                        checkpoint['status'] == 'done' or not self.retry_failed):
+                    self.stats['skipped'] += 1
+                    continue
+
+                chunk.append({'path': path, 'data': data, 'content_hash': content_hash})
+                if len(chunk) >= self.chunk_size:
+                    self._process_chunk(chunk, executor)
+                    chunk = []
+                    self._report_progress(start)
+            if chunk:
+                self._process_chunk(chunk, executor)
+
+        elapsed = time.monotonic() - start
+        processed = self.stats['ingested'] + self.stats['cached']
+        self.stats['elapsed_seconds'] = round(elapsed, 2)
+        self.stats['resumes_per_minute'] = round(processed / elapsed * 60, 2) if elapsed > 0 else 0.0
+        return self.stats
+
+    def _report_progress(self, start: float):
+        elapsed = time.monotonic() - start
+        done = self.stats['ingested'] + self.stats['cached']
+        rate = done / elapsed * 60 if elapsed > 0 else 0.0
+        print(f"[PROGRESS] {done} ingested, {self.stats['failed']} failed, "
+              f"{self.stats['skipped']} skipped ({rate:.1f} resumes/min)")
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Bulk-ingest a directory of PDF resumes')
+    parser.add_argument('directory', help='Directory to scan for PDFs (recursively)')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Number of resumes parsed/summarized concurrently (default: 4)')
+    parser.add_argument('--chunk-size', type=int, default=32,
+                        help='Number of PDFs read and extracted per batch (default: 32)')
+    parser.add_argument('--skip-failed', action='store_true',
+                        help='Do not retry files that failed in a previous run')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        print(f"Not a directory: {args.directory}")
+        return 2
+
+    ingestor = BulkIngestor(concurrency=args.concurrency, chunk_size=args.chunk_size,
+                            retry_failed=not args.skip_failed)
+    stats = ingestor.run(args.directory)
+
+    print("\n===== Bulk ingestion finished =====")
+    print(f"Found:      {stats['found']}")
+    print(f"Ingested:   {stats['ingested']} ({stats['fallback']} without the LLM)")
+    print(f"From cache: {stats['cached']}")
+    print(f"Duplicates: {stats['duplicates']} (same content as another file)")
+    print(f"Skipped:    {stats['skipped']} (already done in a previous run)")
+    print(f"Failed:     {stats['failed']}")
+    print(f"Elapsed:    {stats['elapsed_seconds']}s ({stats['resumes_per_minute']} resumes/min)")
+    for path, error in ingestor.failures:
+        print(f"  ✗ {path}: {error}")
+
+    return 1 if ingestor.failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
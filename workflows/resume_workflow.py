@@ -1,62 +1,173 @@
-from typing import Dict, Any, List
-from agents.parser_agent import ParserAgent
+import os
+from typing import Dict, Any, List, Optional
+from agents.parser_agent import ParserAgent, LLMExtractionError, PARSER_VERSION
 from agents.summarizer_agent import SummarizerAgent
-from agents.matcher_agent import MatcherAgent
-from utils.local_db import LocalDB
+from agents.matcher_agent import MatcherAgent, SCORE_FALLBACK_EXPLANATION
+from utils.registry import get_db
+from utils.text_sections import segment_sections
+from utils.retrieval import ResumePrefilter, PREFILTER_K
+
+# "combined": one JSON call returns the profile and the summary (default)
+# "two_step": legacy parse_resume → generate_summary round trips
+EXTRACTION_MODE = os.getenv('EXTRACTION_MODE', 'combined').lower()
 
 class ResumeWorkflow:
-    def __init__(self):
+    def __init__(self, db=None, extraction_mode: Optional[str] = None):
+        # Agents pull the shared spaCy model and LLM client from the registry
         self.parser = ParserAgent()
         self.summarizer = SummarizerAgent()
         self.matcher = MatcherAgent()
-        self.db = LocalDB()
+        self.db = db or get_db()
+        self.extraction_mode = (extraction_mode or EXTRACTION_MODE).lower()
+        self.prefilter = ResumePrefilter(embeddings=getattr(self.db, 'embeddings', None))
+    
+    def _ingest_cache_key(self, content_hash: str) -> str:
+        """Cache key for a PDF hash; parser/model changes invalidate old entries"""
+        return f"{content_hash}:{PARSER_VERSION}:{self.extraction_mode}:{self.parser.llm_client.model}"
+    
+    @staticmethod
+    def _db_row(parsed_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Map parsed_data to DB columns"""
+        return {
+            'filename': parsed_data.get('filename', ''),
+            'content': parsed_data.get('content', ''),
+            'name': parsed_data.get('name', ''),
+            'summary': parsed_data.get('professional_summary', ''),
+            'skills': parsed_data.get('skills', []),
+            'experience': parsed_data.get('total_years_experience', 0),
+            'cgpa': parsed_data.get('cgpa', 0.0),
+            'sections': parsed_data.get('sections', {}),
+        }
+    
+    def _save_to_db(self, parsed_data: Dict[str, Any]) -> int:
+        """Insert a resumes row for parsed_data"""
+        return self.db.save_resume(self._db_row(parsed_data))
+    
+    def _update_ingest_cache(self, parsed_data: Dict[str, Any], content_hash: str):
+        cached_profile = {k: v for k, v in parsed_data.items()
+                          if k not in ('content', 'document_id')}
+        self.db.save_ingest_cache(
+            self._ingest_cache_key(content_hash), content_hash,
+            parsed_data['content'], cached_profile, parsed_data['document_id']
+        )
+    
+    def save_processed(self, parsed_list: List[Dict[str, Any]],
+                       content_hashes: Optional[List[Optional[str]]] = None) -> List[int]:
+        """
+        Save profiles from process_resume(save=False) in one bulk insert, set
+        their document_id and fill the ingest cache for those with a content hash.
+        """
+        ids = self.db.save_resumes([self._db_row(parsed_data) for parsed_data in parsed_list])
+        for parsed_data, doc_id in zip(parsed_list, ids):
+            parsed_data['document_id'] = doc_id
+        for parsed_data, content_hash in zip(parsed_list, content_hashes or []):
+            if content_hash:
+                self._update_ingest_cache(parsed_data, content_hash)
+        return ids
+    
+    def get_cached_resume(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the parsed profile for a previously ingested PDF, or None.
+        Re-creates the resumes row from the cache if it was deleted since.
+        """
+        cached = self.db.get_ingest_cache(self._ingest_cache_key(content_hash))
+        if not cached:
+            print(f"[DEBUG] Ingest cache miss: {content_hash}")
+            return None
+        
+        parsed_data = cached['parsed']
+        parsed_data['content'] = cached['text']
+        resume_id = cached['resume_id']
+        if resume_id is None or not self.db.resume_exists(resume_id):
+            print(f"[DEBUG] Cached resume row missing, re-inserting from cache")
+            resume_id = self._save_to_db(parsed_data)
+            self.db.save_ingest_cache(
+                self._ingest_cache_key(content_hash), content_hash,
+                cached['text'], cached['parsed'], resume_id
+            )
+        
+        print(f"[DEBUG] Ingest cache hit: {content_hash} -> resume {resume_id}")
+        parsed_data['document_id'] = resume_id
+        return parsed_data
+    
+    def _parse_two_step(self, resume_text: str, sections: Optional[Dict[str, str]] = None,
+                        spacy_fallback: bool = True) -> Dict[str, Any]:
+        """Legacy extraction: parse_resume, then a second call for the summary"""
+        # Parse resume
+        print("\n[DEBUG] ----- Parsing Resume -----")
+        try:
+            parsed_data = self.parser.parse_resume(resume_text, sections, spacy_fallback=spacy_fallback)
+            print(f"[DEBUG] Parsed data type: {type(parsed_data)}")
+            print(f"[DEBUG] Parsed data: {parsed_data}")
+        except Exception as e:
+            print(f"[DEBUG] ERROR in parse_resume: {str(e)}")
+            print(f"[DEBUG] Error type: {type(e)}")
+            raise
+        
+        # Generate summary
+        print("\n[DEBUG] ----- Generating Summary -----")
+        try:
+            summary = self.summarizer.generate_summary(parsed_data)
+            print(f"[DEBUG] Summary type: {type(summary)}")
+            print(f"[DEBUG] Summary: {summary}")
+            parsed_data['professional_summary'] = summary
+        except Exception as e:
+            print(f"[DEBUG] ERROR in generate_summary: {str(e)}")
+            print(f"[DEBUG] Error type: {type(e)}")
+            raise
+        return parsed_data
     
-    def process_resume(self, resume_text: str) -> Dict[str, Any]:
+    def process_resume(self, resume_text: str, filename: str = '',
+                       content_hash: Optional[str] = None,
+                       defer_fallback: bool = False, save: bool = True) -> Dict[str, Any]:
         """
         Process a single resume through the parse → summarize workflow
+        (one combined LLM call, or two in "two_step" mode).
+        If content_hash (SHA-256 of the PDF bytes) is given, the result is
+        stored in the ingestion cache so re-uploads skip parsing.
+        With defer_fallback, an LLM failure raises LLMExtractionError instead
+        of running spaCy on this resume alone; collect those resumes and pass
+        them to process_fallback_batch.
+        With save=False nothing is written; pass the results (and hashes) to
+        save_processed to insert a whole batch at once.
         """
         try:
             print("\n[DEBUG] ===== Starting process_resume =====")
             print(f"[DEBUG] Resume text length: {len(resume_text)}")
             print(f"[DEBUG] First 100 chars: {resume_text[:100]}...")
             
-            # Parse resume
-            print("\n[DEBUG] ----- Parsing Resume -----")
-            try:
-                parsed_data = self.parser.parse_resume(resume_text)
-                print(f"[DEBUG] Parsed data type: {type(parsed_data)}")
-                print(f"[DEBUG] Parsed data: {parsed_data}")
-            except Exception as e:
-                print(f"[DEBUG] ERROR in parse_resume: {str(e)}")
-                print(f"[DEBUG] Error type: {type(e)}")
-                raise
+            # Normalize and segment once; every prompt below is built from these
+            sections = segment_sections(resume_text)
+            print(f"[DEBUG] Sections found: {list(sections)}")
             
-            # Generate summary
-            print("\n[DEBUG] ----- Generating Summary -----")
-            try:
-                summary = self.summarizer.generate_summary(parsed_data)
-                print(f"[DEBUG] Summary type: {type(summary)}")
-                print(f"[DEBUG] Summary: {summary}")
-                parsed_data['professional_summary'] = summary
-            except Exception as e:
-                print(f"[DEBUG] ERROR in generate_summary: {str(e)}")
-                print(f"[DEBUG] Error type: {type(e)}")
-                raise
+            parsed_data = None
+            if self.extraction_mode == 'combined':
+                print("\n[DEBUG] ----- Parsing + Summarizing (combined) -----")
+                try:
+                    parsed_data = self.parser.parse_and_summarize(resume_text, sections)
+                    if not parsed_data.get('professional_summary'):
+                        print("[DEBUG] Combined extraction returned no summary, generating separately")
+                        parsed_data['professional_summary'] = self.summarizer.generate_summary(parsed_data)
+                except Exception as e:
+                    if defer_fallback:
+                        # A second round of LLM calls would most likely fail the same way
+                        raise LLMExtractionError(str(e)) from e
+                    print(f"[DEBUG] ERROR in parse_and_summarize, falling back to two-step: {str(e)}")
+                    parsed_data = None
+            
+            if parsed_data is None:
+                parsed_data = self._parse_two_step(resume_text, sections, spacy_fallback=not defer_fallback)
+            parsed_data['sections'] = sections
+            
+            parsed_data['filename'] = filename
+            parsed_data['content'] = resume_text
+            if not save:
+                return parsed_data
             
             # Save to database
             print("\n[DEBUG] ----- Saving to Database -----")
             try:
-                # Map parsed_data to DB columns and sanitize
-                db_resume = {
-                    'filename': parsed_data.get('filename', ''),
-                    'content': parsed_data.get('content', ''),
-                    'name': parsed_data.get('name', ''),
-                    'summary': parsed_data.get('professional_summary', ''),
-                    'skills': parsed_data.get('skills', []),
-                    'experience': parsed_data.get('total_years_experience', 0),
-                    'cgpa': parsed_data.get('cgpa', 0.0),
-                }
-                doc_id = self.db.save_resume(db_resume)
+                doc_id = self._save_to_db(parsed_data)
                 print(f"[DEBUG] doc_id type: {type(doc_id)}")
                 print(f"[DEBUG] doc_id: {doc_id}")
                 parsed_data['document_id'] = doc_id
@@ -65,6 +176,10 @@ class ResumeWorkflow:
                 print(f"[DEBUG] Error type: {type(e)}")
                 raise
             
+            if content_hash:
+                print("\n[DEBUG] ----- Updating Ingest Cache -----")
+                self._update_ingest_cache(parsed_data, content_hash)
+            
             print("\n[DEBUG] ===== Completed process_resume =====")
             return parsed_data
             
@@ -73,6 +188,27 @@ class ResumeWorkflow:
             print(f"[DEBUG] Error type: {type(e)}")
             raise
     
+    def process_fallback_batch(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Parse and save resumes whose LLM extraction failed, without the LLM:
+        one batched spaCy pass over all of them and a template summary.
+        entries are {'text', 'filename'} dicts. Results are not written to
+        the ingest cache, so a later re-upload gets a full LLM parse.
+        """
+        if not entries:
+            return []
+        texts = [entry['text'] for entry in entries]
+        sections_list = [segment_sections(text) for text in texts]
+        parsed_list = self.parser.parse_resumes_fallback(texts, sections_list)
+        
+        for entry, sections, parsed_data in zip(entries, sections_list, parsed_list):
+            parsed_data['professional_summary'] = self.summarizer.fallback_summary(parsed_data)
+            parsed_data['sections'] = sections
+            parsed_data['filename'] = entry.get('filename', '')
+            parsed_data['content'] = entry['text']
+        self.save_processed(parsed_list)
+        return parsed_list
+    
     def process_resumes(self, resume_texts: List[str]) -> List[Dict[str, Any]]:
         """
         Process multiple resumes in sequence
@@ -96,19 +232,77 @@ class ResumeWorkflow:
                 raise  # Re-raise to handle in the upload route
         return results
     
-    def match_resumes(self, job_description: str, num_matches: int = 5) -> List[Dict[str, Any]]:
+    def match_resumes(self, job_description: str, num_matches: int = 5,
+                      required_skills: List[str] = None,
+                      min_years: int = None,
+                      min_cgpa: float = None,
+                      prefilter_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Match resumes against a job description; see match_resumes_with_stats
+        """
+        matches, _ = self.match_resumes_with_stats(job_description, num_matches, required_skills,
+                                                   min_years, min_cgpa, prefilter_k)
+        return matches
+    
+    def match_resumes_with_stats(self, job_description: str, num_matches: int = 5,
+                                 required_skills: List[str] = None,
+                                 min_years: int = None,
+                                 min_cgpa: float = None,
+                                 prefilter_k: Optional[int] = None):
         """
-        Match resumes against a job description
+        Match resumes against a job description. Candidates meeting the hard
+        requirements are shortlisted to the prefilter_k (PREFILTER_K) most
+        relevant by local BM25, and only the shortlist is scored by the LLM,
+        concurrently. prefilter_k=0 scores every resume. LLM scores are
+        persisted per (job description, resume version, model), so a repeat
+        match only scores new or changed resumes. Returns (matches, stats).
         """
         resumes = self.db.get_all_resumes()
-        scored_resumes = []
+        stats = {'resumes': len(resumes)}
+        k = PREFILTER_K if prefilter_k is None else prefilter_k
+        if k > 0 and len(resumes) > k:
+            eligible, rejected = [], []
+            for resume in resumes:
+                qualified = self.matcher.meets_requirements(resume, required_skills, min_years, min_cgpa)
+                (eligible if qualified else rejected).append(resume)
+            shortlist = [eligible[i] for i in self.prefilter.shortlist(eligible, job_description, k)]
+            # Too few qualified candidates: fill up with the rest (scored without the LLM)
+            shortlist += rejected[:max(0, num_matches - len(shortlist))]
+            print(f"[DEBUG] Prefilter shortlisted {len(shortlist)} of {len(resumes)} resumes "
+                  f"({len(eligible)} meet the requirements)")
+            resumes = shortlist
+        stats['shortlisted'] = len(resumes)
+        
+        # Reuse stored scores; candidates failing the requirements are scored locally anyway
+        job_hash = self.matcher.job_key(job_description)
+        model = getattr(self.matcher.llm_client, 'model', '')
+        versions = {resume['id']: self.matcher.profile_version(resume) for resume in resumes
+                    if self.matcher.meets_requirements(resume, required_skills, min_years, min_cgpa)}
+        stored = self.db.get_match_scores(job_hash, model, versions)
+        to_score = [resume for resume in resumes if resume['id'] not in stored]
+        
+        scored = self.matcher.rank_candidates(
+            to_score, job_description, required_skills, min_years, min_cgpa
+        )
+        self.db.save_match_scores(job_hash, model, [
+            (c['id'], versions[c['id']], c['match_score'], c['match_explanation'])
+            for c in scored
+            if c['id'] in versions and c['match_explanation'] != SCORE_FALLBACK_EXPLANATION
+        ])
+        
+        by_id = {c['id']: c for c in scored}
         for resume in resumes:
-            score, explanation = self.matcher.score_resume(
-                resume, job_description
-            )
-            resume['match_score'] = score
-            resume['match_explanation'] = explanation
-            scored_resumes.append(resume)
-        scored_resumes.sort(key=lambda x: x['match_score'], reverse=True)
-        return scored_resumes[:num_matches]
-    
+            if resume['id'] in stored:
+                score, explanation = stored[resume['id']]
+                by_id[resume['id']] = {**resume, 'match_score': score, 'match_explanation': explanation,
+                                       'match_cached': True}
+        # Same order as scoring everything at once: by score, ties in input order
+        scored_resumes = sorted((by_id[resume['id']] for resume in resumes),
+                                key=lambda x: x['match_score'], reverse=True)
+        
+        llm_candidates = len(versions)
+        stats['cached'] = len(stored)
+        stats['scored'] = llm_candidates - len(stored)
+        stats['hit_rate'] = round(len(stored) / llm_candidates, 3) if llm_candidates else 0.0
+        print(f"[DEBUG] Match scores: {stats}")
+        return scored_resumes[:num_matches], stats